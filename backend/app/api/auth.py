@@ -1,12 +1,11 @@
 """
 Authentication API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from typing import Optional
 
 from app.core.database import get_db
 from app.core.config import settings
@@ -29,9 +28,10 @@ from app.schemas.auth import (
 )
 from app.schemas.user import UserResponse, UserMe
 from app.core.email import send_password_reset_email, send_verification_email
+from app.services.rate_limiter import ip_rate_limit
+from app.services.event_bus import event_bus, UserRegistered
 
 router = APIRouter()
-limiter = Limiter(key_func=get_remote_address)
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -50,21 +50,35 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    user = get_user_from_token(token, db)
+    if user is None:
+        raise credentials_exception
+
+    return user
+
+
+def get_user_from_token(token: Optional[str], db: Session) -> Optional[User]:
+    """
+    Resolve a JWT access token to its user
+    Also used by streaming endpoints that cannot send an Authorization header
+
+    Returns:
+        User, or None if the token is missing, invalid or expired
+    """
+    if not token:
+        return None
+
     # Decode token
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        return None
 
     user_id: str = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        return None
 
     # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
-
-    return user
+    return db.query(User).filter(User.id == user_id).first()
 
 
 @router.get("/check-email")
@@ -77,9 +91,13 @@ async def check_email_availability(email: str, db: Session = Depends(get_db)):
     return {"available": existing_user is None, "email": email}
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit(settings.RATE_LIMIT_REGISTER)  # Max registrations per time window (configurable in .env)
-async def register(request: Request, user_data: UserRegister, db: Session = Depends(get_db)):
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(ip_rate_limit("register", settings.RATE_LIMIT_REGISTER))]  # Max registrations per time window (configurable in .env)
+)
+async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """
     Register a new user
 
@@ -127,6 +145,7 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    event_bus.emit(UserRegistered(user_id=new_user.id))
 
     # Create verification token and send email
     verification_token = EmailVerificationToken.create_token(new_user.id)
@@ -144,9 +163,12 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
     return new_user
 
 
-@router.post("/login", response_model=Token)
-@limiter.limit(settings.RATE_LIMIT_LOGIN)  # Max login attempts per time window (configurable in .env)
-async def login(request: Request, user_data: UserLogin, db: Session = Depends(get_db)):
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(ip_rate_limit("login", settings.RATE_LIMIT_LOGIN))]  # Max login attempts per time window (configurable in .env)
+)
+async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     """
     Login user and return access token
 
@@ -185,10 +207,12 @@ async def login(request: Request, user_data: UserLogin, db: Session = Depends(ge
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.post("/login/form", response_model=Token)
-@limiter.limit(settings.RATE_LIMIT_LOGIN)  # Max login attempts per time window (configurable in .env)
+@router.post(
+    "/login/form",
+    response_model=Token,
+    dependencies=[Depends(ip_rate_limit("login", settings.RATE_LIMIT_LOGIN))]  # Shares the login budget
+)
 async def login_form(
-    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -240,9 +264,12 @@ async def logout(current_user: User = Depends(get_current_user)):
     return {"message": "Successfully logged out"}
 
 
-@router.post("/forgot-password", response_model=ForgotPasswordResponse)
-@limiter.limit(settings.RATE_LIMIT_FORGOT_PASSWORD)  # Max password reset requests per time window (configurable in .env)
-async def forgot_password(http_request: Request, request: ForgotPasswordRequest, db: Session = Depends(get_db)):
+@router.post(
+    "/forgot-password",
+    response_model=ForgotPasswordResponse,
+    dependencies=[Depends(ip_rate_limit("forgot_password", settings.RATE_LIMIT_FORGOT_PASSWORD))]  # Max password reset requests per time window (configurable in .env)
+)
+async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
     """
     Request password reset email
 
@@ -0,0 +1,98 @@
+"""
+Server-pushed events API endpoint (Server-Sent Events)
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.api.auth import get_user_from_token
+from app.services.pubsub import broker
+from app.services.search import visible_post_ids
+
+router = APIRouter()
+
+# Client reconnect delay (milliseconds) announced at the start of the stream
+RECONNECT_DELAY_MS = 3000
+
+# Posts one stream can watch for like/comment events
+MAX_WATCHED_POSTS = 100
+
+
+@router.get("/stream")
+async def event_stream(
+    request: Request,
+    token: Optional[str] = Query(None, description="JWT access token (EventSource cannot send headers)"),
+    last_event_id: Optional[str] = Query(None),
+    posts: Optional[str] = Query(
+        None,
+        description=f"Comma-separated IDs of the posts on screen (up to {MAX_WATCHED_POSTS}); "
+                    "like_count/new_comment/comment_deleted are sent for these only"
+    ),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Stream events for the current user
+
+    Events: new_message, unread_count, like_count, new_comment,
+    comment_deleted, and resync (reload state: events were missed).
+    Browsers resume automatically by sending Last-Event-ID on reconnect;
+    a client that shows other posts opens a new stream with them and the
+    last event id.
+    """
+    if not token and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+
+    requested_post_ids = list(dict.fromkeys(filter(None, (posts or "").split(","))))
+    if len(requested_post_ids) > MAX_WATCHED_POSTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_WATCHED_POSTS} posts can be watched"
+        )
+
+    # Authenticate once, then release the session: the stream may stay open for hours
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(token, db)
+        user_id = user.id if user else None
+        # Posts the user cannot see are silently left out
+        watched_post_ids = visible_post_ids(db, user, requested_post_ids) if user else []
+    finally:
+        db.close()
+
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    resume_from = last_event_id_header or last_event_id
+
+    async def stream():
+        subscription = broker.subscribe(user_id, resume_from, watched_post_ids)
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+            while True:
+                event = await subscription.get(timeout=settings.EVENT_STREAM_HEARTBEAT_INTERVAL)
+                if event is None:
+                    if await request.is_disconnected():
+                        break
+                    # Comment line: keeps proxies from closing an idle connection
+                    yield ": heartbeat\n\n"
+                else:
+                    yield event.encode()
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable nginx response buffering
+        }
+    )
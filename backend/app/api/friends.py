@@ -3,42 +3,317 @@ Friends API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from typing import List
+from sqlalchemy import and_, or_, func, tuple_, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
+from datetime import date
 
 from app.core.database import get_db
+from app.core.pagination import encode_cursor, decode_cursor
 from app.api.auth import get_current_user
 from app.models.user import User
-from app.models.friendship import Friendship
-from app.schemas.user import UserResponse
+from app.models.friendship import Friendship, FriendSuggestion as FriendSuggestionRow, friendship_key
+from app.schemas.user import (
+    UserResponse, UserPage, UpcomingBirthday, UpcomingBirthdaysResponse, FriendSuggestion,
+    BulkFriendsRequest, BulkFriendResult, BulkFriendsResponse
+)
+from app.services.birthdays import birthday_in, upcoming_ranges
+from app.services.event_bus import event_bus, FriendAdded, FriendRemoved
+from app.services.social_graph import get_friend_graph, are_friends_in_db
+from app.services.suggestions import SUGGESTIONS_PER_USER
 
 router = APIRouter()
 
+MAX_MUTUAL_COUNT_IDS = 100
 
-@router.get("/", response_model=List[UserResponse])
+
+def friends_by_birthday(
+    db: Session,
+    user_id: str,
+    lo: int,
+    hi: int,
+    after: Optional[Tuple[int, str]],
+    limit: int
+) -> List[Tuple[int, str]]:
+    """
+    (birth_md, friend_id) of a user's friends with birth_md in lo..hi,
+    in that order, starting after `after`
+
+    The user's friendships as the low and as the high side are two ordered
+    range scans over the covering birthday indexes, merged here.
+    """
+    sides = (
+        (Friendship.user_low_id, Friendship.high_birth_md, Friendship.user_high_id),
+        (Friendship.user_high_id, Friendship.low_birth_md, Friendship.user_low_id),
+    )
+    rows = []
+    for owner, friend_md, friend_id in sides:
+        query = db.query(friend_md, friend_id).filter(
+            owner == user_id,
+            friend_md.between(lo, hi)
+        )
+        if after is not None:
+            # The plain bound lets the index seek; the row value breaks ties
+            query = query.filter(friend_md >= after[0], tuple_(friend_md, friend_id) > tuple_(*after))
+        rows.extend((md, friend) for md, friend in query.order_by(friend_md, friend_id).limit(limit).all())
+    return sorted(rows)[:limit]
+
+
+def decode_birthday_cursor(cursor: Optional[str], *fields: str) -> Optional[dict]:
+    """decode_cursor() for (md, id) cursors, with md checked to be an int"""
+    after = decode_cursor(cursor, "md", "id", *fields)
+    if after is not None:
+        try:
+            after = {**after, "md": int(after["md"]), "id": str(after["id"])}
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    return after
+
+
+@router.get("/", response_model=UserPage)
 async def get_my_friends(
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get list of friends, in birthday (calendar) order
+    """
+    after = decode_birthday_cursor(cursor)
+    rows = friends_by_birthday(
+        db, current_user.id, 101, 1231,
+        (after["md"], after["id"]) if after is not None else None,
+        limit + 1
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        md, friend_id = rows[limit - 1]
+        next_cursor = encode_cursor({"md": md, "id": friend_id})
+    friend_ids = [friend_id for _, friend_id in rows[:limit]]
+
+    # Get friend users, kept in birthday order
+    users = {u.id: u for u in db.query(User).filter(User.id.in_(friend_ids)).all()} if friend_ids else {}
+    friends = [UserResponse.model_validate(users[friend_id]) for friend_id in friend_ids if friend_id in users]
+
+    return UserPage(items=friends, next_cursor=next_cursor)
+
+
+@router.get("/upcoming-birthdays", response_model=UpcomingBirthdaysResponse)
+async def get_upcoming_birthdays(
+    days: int = Query(30, ge=1, le=365),
+    start: Optional[date] = Query(None, description="First day (YYYY-MM-DD), defaults to today"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get list of friends (people I follow)
+    Friends whose birthday falls within the next `days` days, soonest first
+
+    Reads the friendships birthday indexes as at most two ordered ranges
+    (rest of this year, start of next year), so the cost depends on the
+    page size, not on the number of friends.
     """
-    # Get friend IDs
-    friend_ids = db.query(Friendship.friend_id).filter(
-        Friendship.user_id == current_user.id
-    ).limit(limit).offset(offset).all()
+    today = start or date.today()
+    ranges = upcoming_ranges(today, days)
+
+    after = decode_birthday_cursor(cursor, "range")
+    if after is not None:
+        try:
+            after["range"] = int(after["range"])
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
 
-    if not friend_ids:
-        return []
+    # (range index, birth_md, friend_id) in calendar order
+    rows = []
+    for index, key_range in enumerate(ranges):
+        if after is not None and index < after["range"]:
+            continue
 
-    friend_ids = [f[0] for f in friend_ids]
+        page = friends_by_birthday(
+            db, current_user.id, key_range.lo, key_range.hi,
+            (after["md"], after["id"]) if after is not None and index == after["range"] else None,
+            limit + 1 - len(rows)
+        )
+        rows.extend((index, md, friend_id) for md, friend_id in page)
+        if len(rows) > limit:
+            break
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    friend_ids = [friend_id for _, _, friend_id in rows]
+    friends = {u.id: u for u in db.query(User).filter(User.id.in_(friend_ids)).all()} if friend_ids else {}
+
+    items = []
+    for index, _, friend_id in rows:
+        friend = friends.get(friend_id)
+        if friend is None:
+            continue
+        occurrence = birthday_in(friend.birth_date, ranges[index].year)
+        items.append(UpcomingBirthday(
+            friend=UserResponse.model_validate(friend),
+            next_birthday=occurrence,
+            days_until=(occurrence - today).days,
+            turning=occurrence.year - friend.birth_date.year
+        ))
+
+    next_cursor = None
+    if has_more:
+        index, md, friend_id = rows[-1]
+        next_cursor = encode_cursor({"range": index, "md": md, "id": friend_id})
+
+    return UpcomingBirthdaysResponse(items=items, next_cursor=next_cursor)
+
+
+@router.get("/suggestions", response_model=List[FriendSuggestion])
+async def get_friend_suggestions(
+    limit: int = Query(10, ge=1, le=SUGGESTIONS_PER_USER),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    People you may know, best first
 
-    # Get friend users
-    friends = db.query(User).filter(User.id.in_(friend_ids)).all()
+    Precomputed by the suggestions batch job (app.services.suggestions) and
+    read in rank order from the friend_suggestions primary key. People added
+    as friends since the last run are skipped.
+    """
+    rows = db.query(FriendSuggestionRow, User).join(
+        User, User.id == FriendSuggestionRow.suggested_id
+    ).filter(
+        FriendSuggestionRow.user_id == current_user.id,
+        User.is_discoverable == True
+    ).order_by(FriendSuggestionRow.rank).all()
+
+    graph = get_friend_graph(db)
+    suggestions = []
+    for row, user in rows:
+        if graph.is_friend(current_user.id, user.id):
+            continue
+        suggestions.append(FriendSuggestion(
+            user=UserResponse.model_validate(user),
+            mutual_friends=row.mutual_count,
+            birthday_twin=row.birthday_twin,
+            same_city=row.same_city
+        ))
+        if len(suggestions) == limit:
+            break
+
+    return suggestions
+
+
+def validate_bulk_ids(db: Session, current_user: User, user_ids: List[str]):
+    """
+    Split bulk request IDs into existing other users and per-ID errors
 
-    return friends
+    Returns:
+        (unique IDs in request order, IDs of existing users, {id: error status})
+    """
+    unique_ids = list(dict.fromkeys(user_ids))
+    existing = {
+        user_id for (user_id,) in db.query(User.id).filter(User.id.in_(unique_ids)).all()
+    } if unique_ids else set()
+
+    errors = {}
+    for user_id in unique_ids:
+        if user_id == current_user.id:
+            errors[user_id] = "self"
+        elif user_id not in existing:
+            errors[user_id] = "not_found"
+    return unique_ids, [user_id for user_id in unique_ids if user_id not in errors], errors
+
+
+@router.post("/bulk", response_model=BulkFriendsResponse)
+async def add_friends_bulk(
+    request: BulkFriendsRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Add up to 500 friends at once (e.g. all birthday twins, an import)
+
+    IDs are validated with one IN query and the friendships inserted with
+    one INSERT ... ON CONFLICT DO NOTHING in a single transaction; the
+    rows it returns tell new friendships from existing ones.
+    """
+    unique_ids, valid_ids, errors = validate_bulk_ids(db, current_user, request.user_ids)
+
+    added = set()
+    if valid_ids:
+        pairs = [friendship_key(current_user.id, user_id) for user_id in valid_ids]
+        inserted = db.execute(
+            insert(Friendship)
+            .values([{"user_low_id": low, "user_high_id": high} for low, high in pairs])
+            .on_conflict_do_nothing()
+            .returning(Friendship.user_low_id, Friendship.user_high_id)
+        ).all()
+        db.commit()
+        added = {low if high == current_user.id else high for low, high in inserted}
+
+    for user_id in valid_ids:
+        if user_id in added:
+            event_bus.emit(FriendAdded(user_id=current_user.id, friend_id=user_id))
+
+    return BulkFriendsResponse(
+        changed=len(added),
+        results=[
+            BulkFriendResult(
+                user_id=user_id,
+                status=errors.get(user_id) or ("added" if user_id in added else "already_friends")
+            )
+            for user_id in unique_ids
+        ]
+    )
+
+
+@router.delete("/bulk", response_model=BulkFriendsResponse)
+async def remove_friends_bulk(
+    request: BulkFriendsRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Remove up to 500 friends at once, in one DELETE and one transaction
+    """
+    unique_ids, valid_ids, errors = validate_bulk_ids(db, current_user, request.user_ids)
+
+    removed = set()
+    if valid_ids:
+        # The current user is the low side of some pairs and the high side of the others
+        deleted = db.execute(
+            delete(Friendship)
+            .where(or_(
+                and_(Friendship.user_low_id == current_user.id, Friendship.user_high_id.in_(valid_ids)),
+                and_(Friendship.user_high_id == current_user.id, Friendship.user_low_id.in_(valid_ids))
+            ))
+            .returning(Friendship.user_low_id, Friendship.user_high_id)
+        ).all()
+        db.commit()
+        removed = {low if high == current_user.id else high for low, high in deleted}
+
+    for user_id in valid_ids:
+        if user_id in removed:
+            event_bus.emit(FriendRemoved(user_id=current_user.id, friend_id=user_id))
+
+    return BulkFriendsResponse(
+        changed=len(removed),
+        results=[
+            BulkFriendResult(
+                user_id=user_id,
+                status=errors.get(user_id) or ("removed" if user_id in removed else "not_friends")
+            )
+            for user_id in unique_ids
+        ]
+    )
 
 
 @router.post("/{friend_id}", status_code=status.HTTP_201_CREATED)
@@ -68,41 +343,25 @@ async def add_friend(
             detail="User not found"
         )
 
-    # Check if friendship already exists (either direction)
-    existing = db.query(Friendship).filter(
-        or_(
-            and_(
-                Friendship.user_id == current_user.id,
-                Friendship.friend_id == friend_id
-            ),
-            and_(
-                Friendship.user_id == friend_id,
-                Friendship.friend_id == current_user.id
-            )
+    # One row per pair, in canonical order
+    low_id, high_id = friendship_key(current_user.id, friend_id)
+    if db.get(Friendship, (low_id, high_id)) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already friends"
         )
-    ).first()
 
-    if existing:
+    db.add(Friendship(user_low_id=low_id, user_high_id=high_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Added concurrently by the other user
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Already friends"
         )
-
-    # Create two-way friendship
-    # A -> B
-    friendship1 = Friendship(
-        user_id=current_user.id,
-        friend_id=friend_id
-    )
-    # B -> A
-    friendship2 = Friendship(
-        user_id=friend_id,
-        friend_id=current_user.id
-    )
-
-    db.add(friendship1)
-    db.add(friendship2)
-    db.commit()
+    event_bus.emit(FriendAdded(user_id=current_user.id, friend_id=friend_id))
 
     return {
         "message": "Friend added successfully",
@@ -122,35 +381,46 @@ async def remove_friend(
     - B is removed from A's friend list
     - A is automatically removed from B's friend list
     """
-    # Find both directions of friendship
-    friendships = db.query(Friendship).filter(
-        or_(
-            and_(
-                Friendship.user_id == current_user.id,
-                Friendship.friend_id == friend_id
-            ),
-            and_(
-                Friendship.user_id == friend_id,
-                Friendship.friend_id == current_user.id
-            )
-        )
-    ).all()
+    low_id, high_id = friendship_key(current_user.id, friend_id)
+    deleted = db.query(Friendship).filter(
+        Friendship.user_low_id == low_id,
+        Friendship.user_high_id == high_id
+    ).delete(synchronize_session=False)
 
-    if not friendships:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Friendship not found"
         )
 
-    # Delete both directions
-    for friendship in friendships:
-        db.delete(friendship)
-
     db.commit()
+    event_bus.emit(FriendRemoved(user_id=current_user.id, friend_id=friend_id))
 
     return None
 
 
+@router.get("/mutual-counts")
+async def get_mutual_friend_counts(
+    ids: str = Query(..., description="Comma-separated user IDs (up to 100)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Number of mutual friends with each of several users (for user lists)
+
+    Answered from the in-memory friendship graph: one sorted-list
+    intersection per user, no database round trips.
+    """
+    user_ids = list(dict.fromkeys(user_id.strip() for user_id in ids.split(",") if user_id.strip()))
+    if not user_ids or len(user_ids) > MAX_MUTUAL_COUNT_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {MAX_MUTUAL_COUNT_IDS} user IDs"
+        )
+
+    return {"counts": get_friend_graph(db).mutual_counts(current_user.id, user_ids)}
+
+
 @router.get("/mutual/{user_id}")
 async def get_mutual_friends(
     user_id: str,
@@ -160,20 +430,8 @@ async def get_mutual_friends(
     """
     Get mutual friends between current user and another user
     """
-    # Get my friend IDs
-    my_friend_ids = db.query(Friendship.friend_id).filter(
-        Friendship.user_id == current_user.id
-    ).all()
-    my_friend_ids = {f[0] for f in my_friend_ids}
-
-    # Get their friend IDs
-    their_friend_ids = db.query(Friendship.friend_id).filter(
-        Friendship.user_id == user_id
-    ).all()
-    their_friend_ids = {f[0] for f in their_friend_ids}
-
-    # Find intersection
-    mutual_ids = my_friend_ids.intersection(their_friend_ids)
+    # Sorted friend list intersection in the in-memory graph
+    mutual_ids = get_friend_graph(db).mutual_ids(current_user.id, user_id)
 
     if not mutual_ids:
         return {"count": 0, "friends": []}
@@ -197,19 +455,8 @@ async def check_friendship(
     Check friendship status between current user and another user
     With two-way friendships, if A is friends with B, then B is friends with A
     """
-    # Check if friendship exists (either direction means mutual friendship)
-    are_friends = db.query(Friendship).filter(
-        or_(
-            and_(
-                Friendship.user_id == current_user.id,
-                Friendship.friend_id == user_id
-            ),
-            and_(
-                Friendship.user_id == user_id,
-                Friendship.friend_id == current_user.id
-            )
-        )
-    ).first() is not None
+    # From the table, not the graph: this is what clients act on
+    are_friends = are_friends_in_db(db, current_user.id, user_id)
 
     return {
         "are_friends": are_friends
@@ -1,23 +1,30 @@
 """
 Messages API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy import and_, or_, desc, func
-from typing import List
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from typing import Dict, List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.config import settings
-from app.api.auth import get_current_user
+from app.api.auth import get_current_user, get_user_from_token
 from app.core.security_utils import sanitize_message_content
 from app.models.user import User
 from app.models.message import Message
 from app.schemas.message import MessageCreate, MessageResponse, MessageSender, ConversationResponse
+from app.services.rate_limiter import RateLimit, rate_limiter, user_rate_limit
+from app.services.chat import chat_manager, ChatConnection, CLOSE_POLICY_VIOLATION
+from app.services.event_bus import event_bus, MessageSent, MessagesRead
 
 router = APIRouter()
-limiter = Limiter(key_func=get_remote_address)
+
+# Message IDs one "read" chat frame may mark
+MAX_READ_MESSAGE_IDS = 500
 
 
 def get_message_sender(user: User) -> MessageSender:
@@ -30,16 +37,22 @@ def get_message_sender(user: User) -> MessageSender:
     )
 
 
-@router.post("/", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit(settings.RATE_LIMIT_SEND_MESSAGE)  # Max messages per time window (configurable in .env)
-async def send_message(
-    request: Request,
-    message_data: MessageCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def count_unread_messages(db: Session, user_id: str) -> int:
+    """Number of unread messages sent to a user"""
+    return db.query(func.count(Message.id)).filter(
+        and_(
+            Message.recipient_id == user_id,
+            Message.is_read == False
+        )
+    ).scalar()
+
+
+def create_message(db: Session, sender: User, message_data: MessageCreate) -> MessageResponse:
     """
-    Send a message to another user
+    Validate and store a message (shared by the HTTP and WebSocket transports)
+
+    Raises:
+        HTTPException: Recipient missing or the sender themselves
     """
     # Check if recipient exists
     recipient = db.query(User).filter(User.id == message_data.recipient_id).first()
@@ -50,7 +63,7 @@ async def send_message(
         )
 
     # Cannot message yourself
-    if message_data.recipient_id == current_user.id:
+    if message_data.recipient_id == sender.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You cannot send a message to yourself"
@@ -61,7 +74,7 @@ async def send_message(
 
     # Create message
     new_message = Message(
-        sender_id=current_user.id,
+        sender_id=sender.id,
         recipient_id=message_data.recipient_id,
         content=sanitized_content,
         is_read=False
@@ -73,8 +86,92 @@ async def send_message(
 
     # Prepare response
     response = MessageResponse.model_validate(new_message)
-    response.sender = get_message_sender(current_user)
+    response.sender = get_message_sender(sender)
+    return response
+
+
+def notify_new_message(db: Session, message: MessageResponse, origin: Optional[ChatConnection] = None):
+    """Emit MessageSent (delivered to both parties' chat sockets and event streams)"""
+    event_bus.emit(MessageSent(
+        message_id=message.id,
+        sender_id=message.sender_id,
+        recipient_id=message.recipient_id,
+        message=message.model_dump(mode="json"),
+        recipient_unread_count=count_unread_messages(db, message.recipient_id),
+        origin_connection_id=origin.id if origin else None
+    ))
+
+
+def mark_messages_read(
+    db: Session,
+    reader_id: str,
+    message_ids: Optional[List[str]] = None,
+    sender_id: Optional[str] = None
+) -> List[Message]:
+    """
+    Mark unread messages to `reader_id` as read, by id or from one sender
+
+    Returns:
+        The messages that changed
+    """
+    query = db.query(Message).filter(
+        and_(
+            Message.recipient_id == reader_id,
+            Message.is_read == False
+        )
+    )
+    if message_ids is not None:
+        query = query.filter(Message.id.in_(message_ids))
+    if sender_id is not None:
+        query = query.filter(Message.sender_id == sender_id)
+
+    unread_messages = query.all()
+    for msg in unread_messages:
+        msg.is_read = True
+
+    if unread_messages:
+        db.commit()
+    return unread_messages
+
 
+def notify_messages_read(
+    db: Session,
+    reader_id: str,
+    read_messages: List[Message],
+    origin: Optional[ChatConnection] = None
+):
+    """Emit MessagesRead (read receipts for senders, sync for the reader's other sockets/streams)"""
+    if not read_messages:
+        return
+
+    by_sender: Dict[str, List[str]] = {}
+    for msg in read_messages:
+        by_sender.setdefault(msg.sender_id, []).append(msg.id)
+
+    event_bus.emit(MessagesRead(
+        reader_id=reader_id,
+        message_ids_by_sender=by_sender,
+        reader_unread_count=count_unread_messages(db, reader_id),
+        origin_connection_id=origin.id if origin else None
+    ))
+
+
+@router.post(
+    "/",
+    response_model=MessageResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(user_rate_limit("send_message", settings.RATE_LIMIT_SEND_MESSAGE))]  # Max messages per time window (configurable in .env)
+)
+async def send_message(
+    message_data: MessageCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Send a message to another user
+    """
+    response = create_message(db, current_user, message_data)
+    notify_new_message(db, response)
     return response
 
 
@@ -178,19 +275,8 @@ async def get_conversation(
     ).order_by(Message.created_at.asc()).offset(offset).limit(limit).all()
 
     # Mark messages as read (messages sent TO current user FROM other user)
-    unread_messages = db.query(Message).filter(
-        and_(
-            Message.sender_id == user_id,
-            Message.recipient_id == current_user.id,
-            Message.is_read == False
-        )
-    ).all()
-
-    for msg in unread_messages:
-        msg.is_read = True
-
-    if unread_messages:
-        db.commit()
+    read_messages = mark_messages_read(db, current_user.id, sender_id=user_id)
+    notify_messages_read(db, current_user.id, read_messages)
 
     # Get sender info
     current_user_info = get_message_sender(current_user)
@@ -214,14 +300,7 @@ async def get_unread_count(
     """
     Get count of unread messages
     """
-    count = db.query(func.count(Message.id)).filter(
-        and_(
-            Message.recipient_id == current_user.id,
-            Message.is_read == False
-        )
-    ).scalar()
-
-    return {"unread_count": count}
+    return {"unread_count": count_unread_messages(db, current_user.id)}
 
 
 @router.put("/{message_id}/read", status_code=status.HTTP_204_NO_CONTENT)
@@ -246,7 +325,123 @@ async def mark_as_read(
             detail="Message not found"
         )
 
-    message.is_read = True
-    db.commit()
+    read_messages = mark_messages_read(db, current_user.id, message_ids=[message.id])
+    notify_messages_read(db, current_user.id, read_messages)
 
     return None
+
+
+# ===== WEBSOCKET CHAT =====
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Chat over one WebSocket: authenticate once, then send and acknowledge messages
+
+    Client frames:
+        {"type": "send", "recipient_id": ..., "content": ..., "client_id": ...}
+        {"type": "read", "message_ids": [...]} (up to 500) or {"type": "read", "user_id": ...}
+        {"type": "ping"}
+    Server frames:
+        {"type": "sent", "client_id": ..., "message": {...}}  reply to "send"
+        {"type": "message", "message": {...}}                 new message in a conversation
+        {"type": "read", "reader_id": ..., "message_ids": [...]}
+        {"type": "error", "client_id": ..., "detail": ...}
+        {"type": "pong"}
+    """
+    # Authenticate once; the detached user is reused for every frame
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(token, db)
+    finally:
+        db.close()
+
+    if user is None:
+        # Browsers cannot send an Authorization header on WebSockets, so the token is a query param
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = chat_manager.connect(websocket, user.id)
+    send_limit = RateLimit.parse(settings.RATE_LIMIT_SEND_MESSAGE)
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            try:
+                # Binary frames carry "bytes" instead of "text"
+                frame = json.loads(message["text"]) if message.get("text") is not None else None
+            except ValueError:
+                frame = None
+            if not isinstance(frame, dict):
+                connection.send({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+
+            if frame.get("type") == "send":
+                # Same per-user limit as the HTTP endpoint; the store can block, so check it off the loop
+                try:
+                    await run_in_threadpool(rate_limiter.check, f"send_message:user:{user.id}", send_limit)
+                except HTTPException as exc:
+                    connection.send({"type": "error", "client_id": frame.get("client_id"), "detail": exc.detail})
+                    continue
+
+            # Short-lived session per frame, like an HTTP request
+            db = SessionLocal()
+            try:
+                handle_chat_frame(db, user, connection, frame)
+            finally:
+                db.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await chat_manager.disconnect(connection)
+
+
+def handle_chat_frame(db: Session, user: User, connection: ChatConnection, frame: dict):
+    """Apply one client frame (send frames have passed the rate limit); errors are reported on the socket"""
+    frame_type = frame.get("type")
+    client_id = frame.get("client_id")
+    try:
+        if frame_type == "send":
+            message_data = MessageCreate(
+                recipient_id=frame.get("recipient_id"),
+                content=frame.get("content")
+            )
+            response = create_message(db, user, message_data)
+            connection.send({
+                "type": "sent",
+                "client_id": client_id,
+                "message": response.model_dump(mode="json")
+            })
+            notify_new_message(db, response, origin=connection)
+        elif frame_type == "read":
+            message_ids = frame.get("message_ids")
+            sender_id = frame.get("user_id")
+            if isinstance(message_ids, list):
+                if len(message_ids) > MAX_READ_MESSAGE_IDS:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"A read frame can mark at most {MAX_READ_MESSAGE_IDS} messages"
+                    )
+                read_messages = mark_messages_read(db, user.id, message_ids=[str(m) for m in message_ids])
+            elif isinstance(sender_id, str):
+                read_messages = mark_messages_read(db, user.id, sender_id=sender_id)
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A read frame needs message_ids or user_id"
+                )
+            notify_messages_read(db, user.id, read_messages, origin=connection)
+        elif frame_type == "ping":
+            connection.send({"type": "pong"})
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown frame type: {frame_type!r}"
+            )
+    except HTTPException as exc:
+        connection.send({"type": "error", "client_id": client_id, "detail": exc.detail})
+    except ValidationError as exc:
+        connection.send({"type": "error", "client_id": client_id, "detail": exc.errors()[0]["msg"]})
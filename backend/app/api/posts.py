@@ -1,25 +1,38 @@
 """
 Posts API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, func, text, literal_column
 from typing import List, Optional
-from datetime import datetime
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.core.database import get_db
 from app.core.config import settings
 from app.api.auth import get_current_user
 from app.core.security_utils import sanitize_post_content, sanitize_comment_content
 from app.models.user import User
-from app.models.post import Post, PostLike, Comment
-from app.models.friendship import Friendship
-from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostAuthor, CommentCreate, CommentResponse
+from app.models.post import Post, PostLike, Comment, CommentLike, PostChange
+from app.schemas.post import (
+    PostCreate, PostUpdate, PostResponse, PostAuthor, FeedChangesResponse,
+    PostSearchResponse, CommentCreate, CommentResponse, CommentSearchResponse,
+    CommentThread, CommentThreadPage, CommentPage
+)
+from app.core.pagination import encode_cursor, decode_cursor
+from app.services.birthdays import twins_condition
+from app.services.social_graph import friend_ids_in_db
+from app.services.search import build_match_query, search_posts, search_comments
+from app.services.rate_limiter import user_rate_limit
+from app.services.post_counters import apply_pending_counts, post_counts
+from app.services.likes import (
+    add_post_like, remove_post_like, post_like_count,
+    add_comment_like, remove_comment_like, comment_like_count
+)
+from app.services.event_bus import (
+    event_bus, PostCreated, PostUpdated, PostDeleted, PostLiked, PostUnliked,
+    CommentCreated, CommentDeleted
+)
 
 router = APIRouter()
-limiter = Limiter(key_func=get_remote_address)
 
 
 def get_post_author(user: User) -> PostAuthor:
@@ -32,10 +45,13 @@ def get_post_author(user: User) -> PostAuthor:
     )
 
 
-@router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit(settings.RATE_LIMIT_CREATE_POST)  # Max posts per time window (configurable in .env)
+@router.post(
+    "/",
+    response_model=PostResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(user_rate_limit("create_post", settings.RATE_LIMIT_CREATE_POST))]  # Max posts per time window (configurable in .env)
+)
 async def create_post(
-    request: Request,
     post_data: PostCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -57,6 +73,7 @@ async def create_post(
     db.add(new_post)
     db.commit()
     db.refresh(new_post)
+    event_bus.emit(PostCreated(post_id=new_post.id, author_id=current_user.id))
 
     # Prepare response
     response = PostResponse.model_validate(new_post)
@@ -66,66 +83,41 @@ async def create_post(
     return response
 
 
-@router.get("/feed", response_model=List[PostResponse])
-async def get_feed(
-    filter_type: str = Query("friends", regex="^(friends|twins|my)$"),
-    limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def get_feed_author_ids(db: Session, current_user: User, filter_type: str) -> List[str]:
     """
-    Get posts feed based on filter
+    Authors whose posts make up a feed
     - friends: Posts from friends
     - twins: Posts from birthday twins
     - my: Only my posts
     """
-    query = db.query(Post).order_by(Post.created_at.desc())
-
     if filter_type == "my":
-        # Only my posts
-        query = query.filter(Post.author_id == current_user.id)
+        return [current_user.id]
 
-    elif filter_type == "friends":
-        # Get friend IDs
-        friend_ids = db.query(Friendship.friend_id).filter(
-            Friendship.user_id == current_user.id
-        ).all()
-        friend_ids = [f[0] for f in friend_ids]
+    if filter_type == "friends":
+        # From the table, not the graph: this decides who sees friends-only posts
+        return friend_ids_in_db(db, current_user.id)
 
-        if not friend_ids:
-            return []
+    # Get users with same birthday
+    twin_ids = db.query(User.id).filter(twins_condition(current_user)).all()
+    return [t[0] for t in twin_ids]
 
-        # Posts from friends
-        query = query.filter(Post.author_id.in_(friend_ids))
 
-    elif filter_type == "twins":
-        # Get users with same birthday
-        twin_ids = db.query(User.id).filter(
-            and_(
-                User.birth_date == current_user.birth_date,
-                User.id != current_user.id,
-                User.is_discoverable == True
-            )
-        ).all()
-        twin_ids = [t[0] for t in twin_ids]
-
-        if not twin_ids:
-            return []
+def build_post_responses(db: Session, posts: List[Post], current_user: User) -> List[PostResponse]:
+    """PostResponses with authors, the current user's likes and pending counts (one query each)"""
+    if not posts:
+        return []
 
-        # Posts from birthday twins
-        query = query.filter(Post.author_id.in_(twin_ids))
+    post_ids = [p.id for p in posts]
 
-    # Apply pagination
-    posts = query.limit(limit).offset(offset).all()
-
-    # Get liked post IDs for current user
-    liked_post_ids = set(
-        db.query(PostLike.post_id).filter(
-            PostLike.user_id == current_user.id
+    # Get liked post IDs for current user (only among these posts)
+    liked_post_ids = {
+        pid[0] for pid in db.query(PostLike.post_id).filter(
+            and_(
+                PostLike.user_id == current_user.id,
+                PostLike.post_id.in_(post_ids)
+            )
         ).all()
-    )
-    liked_post_ids = {pid[0] for pid in liked_post_ids}
+    }
 
     # Get all author IDs
     author_ids = list(set([p.author_id for p in posts]))
@@ -140,7 +132,202 @@ async def get_feed(
         post_response.is_liked = post.id in liked_post_ids
         result.append(post_response)
 
-    return result
+    return apply_pending_counts(db, result)
+
+
+def get_comment_authors(db: Session, comments: List[Comment]) -> dict:
+    """PostAuthor of each comment's author, by user ID (one query)"""
+    author_ids = list(set([c.author_id for c in comments]))
+    authors = db.query(User).filter(User.id.in_(author_ids)).all() if author_ids else []
+    return {a.id: get_post_author(a) for a in authors}
+
+
+def get_liked_comment_ids(db: Session, comments: List[Comment], current_user: User) -> set:
+    """IDs of the comments the current user has liked, among `comments` (one query)"""
+    if not comments:
+        return set()
+    return {
+        comment_id for (comment_id,) in db.query(CommentLike.comment_id).filter(
+            CommentLike.user_id == current_user.id,
+            CommentLike.comment_id.in_([c.id for c in comments])
+        ).all()
+    }
+
+
+def build_comment_response(comment: Comment, authors_dict: dict, liked_comment_ids: set, response_class=CommentResponse):
+    comment_response = response_class.model_validate(comment)
+    comment_response.author = authors_dict.get(comment.author_id)
+    comment_response.is_liked = comment.id in liked_comment_ids
+    return comment_response
+
+
+@router.get("/feed", response_model=List[PostResponse])
+async def get_feed(
+    filter_type: str = Query("friends", regex="^(friends|twins|my)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get posts feed based on filter
+    - friends: Posts from friends
+    - twins: Posts from birthday twins
+    - my: Only my posts
+    """
+    author_ids = get_feed_author_ids(db, current_user, filter_type)
+    if not author_ids:
+        return []
+
+    # Apply pagination
+    posts = db.query(Post).filter(
+        Post.author_id.in_(author_ids)
+    ).order_by(Post.created_at.desc()).limit(limit).offset(offset).all()
+
+    return build_post_responses(db, posts, current_user)
+
+
+@router.get("/feed/changes", response_model=FeedChangesResponse)
+async def get_feed_changes(
+    since: Optional[str] = Query(None, description="Token from the previous call; omit to get the current token"),
+    filter_type: str = Query("friends", regex="^(friends|twins|my)$"),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Feed changes since a token: new posts, edited/liked/commented posts, deleted post ids
+
+    Fetch a token before loading the feed, then call this with it to stay
+    up to date. When nothing happened the response is just the same token.
+    """
+    head = db.query(func.max(PostChange.seq)).scalar() or 0
+
+    if since is None:
+        return FeedChangesResponse(token=str(head))
+
+    try:
+        since_seq = int(since)
+    except ValueError:
+        since_seq = -1
+    if since_seq < 0 or since_seq > head:
+        # Not a token from this database
+        return FeedChangesResponse(token=str(head), reset=True)
+
+    author_ids = get_feed_author_ids(db, current_user, filter_type)
+    if not author_ids or since_seq == head:
+        return FeedChangesResponse(token=str(head))
+
+    changes = db.query(PostChange).filter(
+        and_(
+            PostChange.author_id.in_(author_ids),
+            PostChange.seq > since_seq
+        )
+    ).order_by(PostChange.seq).limit(limit + 1).all()
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    token = changes[-1].seq if has_more else max(head, changes[-1].seq if changes else 0)
+
+    deleted = [c.post_id for c in changes if c.deleted]
+    live = {c.post_id: c for c in changes if not c.deleted}
+    posts = db.query(Post).filter(Post.id.in_(list(live))).order_by(Post.created_at.desc()).all() if live else []
+
+    created, updated = [], []
+    for post_response in build_post_responses(db, posts, current_user):
+        if live[post_response.id].created_seq > since_seq:
+            created.append(post_response)
+        else:
+            updated.append(post_response)
+
+    return FeedChangesResponse(
+        token=str(token),
+        has_more=has_more,
+        created=created,
+        updated=updated,
+        deleted=deleted
+    )
+
+
+def decode_search_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """decode_cursor() for search cursors, with score checked to be a number and rowid an int"""
+    after = decode_cursor(cursor, "score", "rowid")
+    if after is not None:
+        try:
+            after = {"score": float(after["score"]), "rowid": int(after["rowid"])}
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    return after
+
+
+@router.get("/search", response_model=PostSearchResponse)
+async def search_posts_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search over post titles and content
+    Ranked by relevance (BM25); only posts visible to the current user
+    """
+    after = decode_search_cursor(cursor)
+    match = build_match_query(q)
+    if match is None:
+        return PostSearchResponse(items=[])
+
+    hits = search_posts(db, current_user, match, limit + 1, after)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+
+    posts_by_id = {p.id: p for p in db.query(Post).filter(Post.id.in_([h[0] for h in hits])).all()} if hits else {}
+    posts = [posts_by_id[h[0]] for h in hits if h[0] in posts_by_id]
+
+    next_cursor = None
+    if has_more:
+        _, score, rowid = hits[-1]
+        next_cursor = encode_cursor({"score": score, "rowid": rowid})
+
+    return PostSearchResponse(items=build_post_responses(db, posts, current_user), next_cursor=next_cursor)
+
+
+@router.get("/search/comments", response_model=CommentSearchResponse)
+async def search_comments_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search over comments on posts visible to the current user
+    """
+    after = decode_search_cursor(cursor)
+    match = build_match_query(q)
+    if match is None:
+        return CommentSearchResponse(items=[])
+
+    hits = search_comments(db, current_user, match, limit + 1, after)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+
+    comments_by_id = {c.id: c for c in db.query(Comment).filter(Comment.id.in_([h[0] for h in hits])).all()} if hits else {}
+    comments = [comments_by_id[h[0]] for h in hits if h[0] in comments_by_id]
+
+    authors_dict = get_comment_authors(db, comments)
+    liked_comment_ids = get_liked_comment_ids(db, comments, current_user)
+    items = [build_comment_response(comment, authors_dict, liked_comment_ids) for comment in comments]
+
+    next_cursor = None
+    if has_more:
+        _, score, rowid = hits[-1]
+        next_cursor = encode_cursor({"score": score, "rowid": rowid})
+
+    return CommentSearchResponse(items=items, next_cursor=next_cursor)
 
 
 @router.get("/{post_id}", response_model=PostResponse)
@@ -175,6 +362,7 @@ async def get_post(
     response = PostResponse.model_validate(post)
     response.author = get_post_author(author) if author else None
     response.is_liked = is_liked
+    apply_pending_counts(db, [response])
 
     return response
 
@@ -208,10 +396,10 @@ async def update_post(
     post.content = sanitize_post_content(post_data.content)
     if post_data.title is not None:
         post.title = post_data.title
-    post.updated_at = datetime.utcnow()
 
     db.commit()
     db.refresh(post)
+    event_bus.emit(PostUpdated(post_id=post.id, author_id=post.author_id))
 
     # Check if liked
     is_liked = db.query(PostLike).filter(
@@ -225,6 +413,7 @@ async def update_post(
     response = PostResponse.model_validate(post)
     response.author = get_post_author(current_user)
     response.is_liked = is_liked
+    apply_pending_counts(db, [response])
 
     return response
 
@@ -255,63 +444,137 @@ async def delete_post(
 
     db.delete(post)
     db.commit()
+    event_bus.emit(PostDeleted(post_id=post_id, author_id=current_user.id))
 
     return None
 
 
-@router.post("/{post_id}/like", status_code=status.HTTP_200_OK)
+def post_like_response(db: Session, post_id: str, user_id: str, liked: bool, like_count: Optional[int]) -> dict:
+    """Response for a like write; emits the event only if the like actually changed"""
+    if like_count is None:
+        # Already in the requested state: read the unchanged count
+        like_count = post_like_count(db, post_id)
+        if like_count is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+    else:
+        event_class = PostLiked if liked else PostUnliked
+        event_bus.emit(event_class(post_id=post_id, user_id=user_id, like_count=like_count))
+    return {"liked": liked, "like_count": like_count}
+
+
+@router.put("/{post_id}/like", status_code=status.HTTP_200_OK)
 async def like_post(
     post_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
+):
+    """
+    Like a post (no-op if already liked, so safe to retry)
+    """
+    like_count = add_post_like(db, post_id, current_user.id)
+    return post_like_response(db, post_id, current_user.id, True, like_count)
+
+
+@router.delete("/{post_id}/like", status_code=status.HTTP_200_OK)
+async def unlike_post(
+    post_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Remove a like from a post (no-op if not liked, so safe to retry)
+    """
+    like_count = remove_post_like(db, post_id, current_user.id)
+    return post_like_response(db, post_id, current_user.id, False, like_count)
+
+
+@router.post("/{post_id}/like", status_code=status.HTTP_200_OK, deprecated=True)
+async def toggle_post_like(
+    post_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Like a post (or unlike if already liked)
+
+    Deprecated: a retried toggle undoes itself; use PUT/DELETE instead.
     """
-    post = db.query(Post).filter(Post.id == post_id).first()
+    like_count = remove_post_like(db, post_id, current_user.id)
+    if like_count is not None:
+        return post_like_response(db, post_id, current_user.id, False, like_count)
+    like_count = add_post_like(db, post_id, current_user.id)
+    return post_like_response(db, post_id, current_user.id, True, like_count)
 
-    if not post:
+
+# ===== COMMENT ENDPOINTS =====
+
+# Comments are paged in rowid (creation) order: the thread indexes end in rowid
+comment_rowid = literal_column("comments.rowid")
+
+
+def decode_rowid_cursor(cursor: Optional[str]) -> Optional[int]:
+    """decode_cursor() for {"rowid": n} cursors, returning n checked to be an int"""
+    after = decode_cursor(cursor, "rowid")
+    if after is None:
+        return None
+    try:
+        return int(after["rowid"])
+    except (TypeError, ValueError):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
         )
 
-    # Check if already liked
-    existing_like = db.query(PostLike).filter(
-        and_(
-            PostLike.user_id == current_user.id,
-            PostLike.post_id == post_id
-        )
-    ).first()
 
-    if existing_like:
-        # Unlike (trigger will auto-decrement like_count)
-        db.delete(existing_like)
-        db.commit()
-        db.refresh(post)  # Refresh to get updated like_count from trigger
-        return {"liked": False, "like_count": post.like_count}
-    else:
-        # Like (trigger will auto-increment like_count)
-        new_like = PostLike(
-            user_id=current_user.id,
-            post_id=post_id
+def first_replies(db: Session, parent_ids: List[str], per_parent: int) -> dict:
+    """
+    The oldest `per_parent` replies of each parent, as {parent_id: [(rowid, Comment)]}
+
+    Two queries whatever the number of parents: one index range per parent
+    (UNION ALL of LIMITed seeks) for the reply keys, then the rows themselves.
+    """
+    if not parent_ids or per_parent <= 0:
+        return {}
+
+    params = {"limit": per_parent}
+    seeks = []
+    for i, parent_id in enumerate(parent_ids):
+        params[f"p{i}"] = parent_id
+        seeks.append(
+            f"SELECT * FROM (SELECT id, rowid AS rid FROM comments "
+            f"WHERE parent_comment_id = :p{i} ORDER BY rowid LIMIT :limit)"
         )
-        db.add(new_like)
-        db.commit()
-        db.refresh(post)  # Refresh to get updated like_count from trigger
-        return {"liked": True, "like_count": post.like_count}
+    keys = db.execute(text(" UNION ALL ".join(seeks)), params).all()
+    if not keys:
+        return {}
 
+    rowids = {comment_id: rid for comment_id, rid in keys}
+    replies = {}
+    for reply in db.query(Comment).filter(Comment.id.in_(list(rowids))).all():
+        replies.setdefault(reply.parent_comment_id, []).append((rowids[reply.id], reply))
+    for thread in replies.values():
+        thread.sort(key=lambda item: item[0])
+    return replies
 
-# ===== COMMENT ENDPOINTS =====
 
-@router.get("/{post_id}/comments", response_model=List[CommentResponse])
+@router.get("/{post_id}/comments", response_model=CommentThreadPage)
 async def get_comments(
     post_id: str,
+    limit: int = Query(20, ge=1, le=50),
+    replies: int = Query(3, ge=0, le=10, description="Replies inlined per comment"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get all comments for a post
+    Get a page of a post's top-level comments, oldest first
+
+    Each comment carries its reply_count and its first `replies` replies;
+    load the rest from /comments/{comment_id}/replies?cursor=replies_cursor.
+    The page takes a fixed number of queries however many comments it holds.
     """
     # Check if post exists
     post = db.query(Post).filter(Post.id == post_id).first()
@@ -321,30 +584,85 @@ async def get_comments(
             detail="Post not found"
         )
 
-    # Get comments (only top-level, no replies for now)
-    comments = db.query(Comment).filter(
-        Comment.post_id == post_id
-    ).order_by(Comment.created_at.asc()).all()
+    after_rowid = decode_rowid_cursor(cursor)
+    query = db.query(Comment, comment_rowid).filter(
+        Comment.post_id == post_id,
+        Comment.parent_comment_id.is_(None)
+    )
+    if after_rowid is not None:
+        query = query.filter(comment_rowid > after_rowid)
+    rows = query.order_by(comment_rowid).limit(limit + 1).all()
 
-    # Get all unique author IDs
-    author_ids = list(set([c.author_id for c in comments]))
-    authors = db.query(User).filter(User.id.in_(author_ids)).all()
-    authors_dict = {a.id: get_post_author(a) for a in authors}
+    next_cursor = encode_cursor({"rowid": rows[limit - 1][1]}) if len(rows) > limit else None
+    comments = [comment for comment, _ in rows[:limit]]
 
-    # Prepare response
-    result = []
+    # Replies are only looked up for comments that have some
+    replies_by_parent = first_replies(db, [c.id for c in comments if c.reply_count], replies)
+    reply_comments = [reply for thread in replies_by_parent.values() for _, reply in thread]
+
+    authors_dict = get_comment_authors(db, comments + reply_comments)
+    liked_comment_ids = get_liked_comment_ids(db, comments + reply_comments, current_user)
+
+    threads = []
     for comment in comments:
-        comment_response = CommentResponse.model_validate(comment)
-        comment_response.author = authors_dict.get(comment.author_id)
-        result.append(comment_response)
+        thread = build_comment_response(comment, authors_dict, liked_comment_ids, CommentThread)
+        inlined = replies_by_parent.get(comment.id, [])
+        thread.replies = [build_comment_response(reply, authors_dict, liked_comment_ids) for _, reply in inlined]
+        threads.append(thread)
+        if thread.reply_count > len(inlined):
+            last_rowid = inlined[-1][0] if inlined else 0
+            thread.replies_cursor = encode_cursor({"rowid": last_rowid})
 
-    return result
+    return CommentThreadPage(items=threads, next_cursor=next_cursor)
 
 
-@router.post("/{post_id}/comments", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit(settings.RATE_LIMIT_CREATE_COMMENT)  # Max comments per time window (configurable in .env)
+@router.get("/{post_id}/comments/{comment_id}/replies", response_model=CommentPage)
+async def get_comment_replies(
+    post_id: str,
+    comment_id: str,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="replies_cursor or next_cursor from the previous page"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a page of replies to a comment, oldest first
+    """
+    parent = db.query(Comment).filter(
+        and_(
+            Comment.id == comment_id,
+            Comment.post_id == post_id
+        )
+    ).first()
+    if not parent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comment not found"
+        )
+
+    after_rowid = decode_rowid_cursor(cursor)
+    query = db.query(Comment, comment_rowid).filter(Comment.parent_comment_id == comment_id)
+    if after_rowid is not None:
+        query = query.filter(comment_rowid > after_rowid)
+    rows = query.order_by(comment_rowid).limit(limit + 1).all()
+
+    next_cursor = encode_cursor({"rowid": rows[limit - 1][1]}) if len(rows) > limit else None
+    replies = [comment for comment, _ in rows[:limit]]
+    authors_dict = get_comment_authors(db, replies)
+    liked_comment_ids = get_liked_comment_ids(db, replies, current_user)
+    return CommentPage(
+        items=[build_comment_response(reply, authors_dict, liked_comment_ids) for reply in replies],
+        next_cursor=next_cursor
+    )
+
+
+@router.post(
+    "/{post_id}/comments",
+    response_model=CommentResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(user_rate_limit("create_comment", settings.RATE_LIMIT_CREATE_COMMENT))]  # Max comments per time window (configurable in .env)
+)
 async def create_comment(
-    request: Request,
     post_id: str,
     comment_data: CommentCreate,
     current_user: User = Depends(get_current_user),
@@ -361,6 +679,22 @@ async def create_comment(
             detail="Post not found"
         )
 
+    # Threads are one level deep: a reply to a reply joins its top-level thread
+    parent_comment_id = comment_data.parent_comment_id
+    if parent_comment_id:
+        parent = db.query(Comment).filter(Comment.id == parent_comment_id).first()
+        if not parent:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Parent comment not found"
+            )
+        if parent.post_id != post_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Parent comment belongs to another post"
+            )
+        parent_comment_id = parent.parent_comment_id or parent.id
+
     # Sanitize comment content to prevent XSS attacks
     sanitized_content = sanitize_comment_content(comment_data.content)
 
@@ -369,18 +703,25 @@ async def create_comment(
         post_id=post_id,
         author_id=current_user.id,
         content=sanitized_content,
-        parent_comment_id=comment_data.parent_comment_id
+        parent_comment_id=parent_comment_id
     )
 
     db.add(new_comment)
     db.commit()
     db.refresh(new_comment)
-    db.refresh(post)  # Refresh to get updated comment_count from trigger
+    _, comment_count = post_counts(db, post_id)
 
     # Prepare response
     response = CommentResponse.model_validate(new_comment)
     response.author = get_post_author(current_user)
 
+    event_bus.emit(CommentCreated(
+        comment_id=new_comment.id,
+        post_id=post.id,
+        author_id=current_user.id,
+        comment_count=comment_count
+    ))
+
     return response
 
 
@@ -414,7 +755,59 @@ async def delete_comment(
             detail="You can only delete your own comments"
         )
 
+    # Its replies go with it (foreign keys, and so ON DELETE CASCADE, are not
+    # enforced on app connections)
+    db.query(Comment).filter(Comment.parent_comment_id == comment_id).delete(synchronize_session=False)
     db.delete(comment)
     db.commit()
 
+    counts = post_counts(db, post_id)
+    if counts is not None:
+        event_bus.emit(CommentDeleted(
+            comment_id=comment_id,
+            post_id=post_id,
+            author_id=current_user.id,
+            comment_count=counts[1]
+        ))
+
     return None
+
+
+def comment_like_response(db: Session, post_id: str, comment_id: str, liked: bool, like_count: Optional[int]) -> dict:
+    if like_count is None:
+        # Already in the requested state: read the unchanged count
+        like_count = comment_like_count(db, post_id, comment_id)
+        if like_count is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Comment not found"
+            )
+    return {"liked": liked, "like_count": like_count}
+
+
+@router.post("/{post_id}/comments/{comment_id}/like", status_code=status.HTTP_200_OK)
+async def like_comment(
+    post_id: str,
+    comment_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Like a comment (no-op if already liked)
+    """
+    like_count = add_comment_like(db, post_id, comment_id, current_user.id)
+    return comment_like_response(db, post_id, comment_id, True, like_count)
+
+
+@router.delete("/{post_id}/comments/{comment_id}/like", status_code=status.HTTP_200_OK)
+async def unlike_comment(
+    post_id: str,
+    comment_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Remove a like from a comment (no-op if not liked)
+    """
+    like_count = remove_comment_like(db, post_id, comment_id, current_user.id)
+    return comment_like_response(db, post_id, comment_id, False, like_count)
@@ -1,24 +1,52 @@
 """
 Users API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy import and_, func, desc, inspect
 from typing import List, Optional
 from datetime import date
+import hashlib
+import json
 import os
-import uuid
-from PIL import Image
-import io
 
-from app.core.database import get_db
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import get_db, background_session
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor
 from app.api.auth import get_current_user
 from app.core.security_utils import sanitize_bio
 from app.models.user import User
 from app.models.post import Post
-from app.models.friendship import Friendship
 from app.models.message import Message
-from app.schemas.user import UserResponse, UserUpdate
+from app.schemas.user import UserResponse, UserUpdate, UserPage
+from app.services.event_bus import event_bus, ProfileUpdated
+from app.services.birthdays import (
+    BIRTHDAY_MODE_PATTERN, DEFAULT_WINDOW_DAYS, MAX_WINDOW_DAYS, MODE_EXACT,
+    birthday_condition, twins_condition
+)
+from app.services.social_graph import get_friend_graph
+from app.services.post_counters import pending_counts
+from app.services.public_profiles import public_profile_cache, profile_stats
+from app.services.people_search import MIN_INDEXED_LENGTH, PeopleFilters, query_terms, search_people
+from app.services.image_processing import (
+    MULTIPART_OVERHEAD,
+    FileTooLargeError,
+    InvalidUploadError,
+    stream_upload_to_tempfile,
+    run_in_process_pool,
+    generate_profile_picture_variants,
+    write_file_async,
+    remove_files_async
+)
+from app.services.profile_pictures import (
+    content_key,
+    canonical_url,
+    parse_content_key,
+    variant_filenames,
+    profile_picture_variant_urls
+)
 
 router = APIRouter()
 
@@ -26,13 +54,89 @@ router = APIRouter()
 UPLOAD_DIR = "uploads/profile_pictures"
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
-THUMBNAIL_SIZE = (150, 150)
-FULL_SIZE = (800, 800)
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def page_users_by_id(query, limit: int, cursor: Optional[str]) -> UserPage:
+    """
+    One page of a User query in id order, continuing after `cursor`
+
+    The birthday indexes end in id, so each page is an index seek.
+    """
+    after = decode_cursor(cursor, "id")
+    if after is not None:
+        query = query.filter(User.id > str(after["id"]))
+
+    users = query.order_by(User.id).limit(limit + 1).all()
+    next_cursor = encode_cursor({"id": users[limit - 1].id}) if len(users) > limit else None
+    return UserPage(
+        items=[UserResponse.model_validate(user) for user in users[:limit]],
+        next_cursor=next_cursor
+    )
+
+
+def variants_exist(key: str) -> bool:
+    return all(os.path.exists(os.path.join(UPLOAD_DIR, name)) for name in variant_filenames(key))
+
+
+async def ensure_profile_picture_variants(source_path: str, key: str):
+    """Generate the variant files of content `key` from the upload at `source_path`, unless they exist"""
+    if await run_in_threadpool(variants_exist, key):
+        return  # Identical content was uploaded before - reuse its variants
+
+    # Decode/resize/encode in the process pool so the event loop stays free
+    variants = await run_in_process_pool(generate_profile_picture_variants, source_path, key)
+    for name, data in variants.items():
+        await write_file_async(os.path.join(UPLOAD_DIR, name), data)
+
+
+def remove_unused_variants(profile_picture_url: str, key: str):
+    """
+    Delete the variant files of `key` if no user references them
+
+    The check and the delete hold the database write lock (on a connection
+    of their own), so an upload reusing these files commits its reference
+    either before the check (the files are kept) or after the delete (the
+    upload then regenerates them).
+    """
+    db = background_session(immediate=True)
+    try:
+        still_used = db.query(User.id).filter(
+            User.profile_picture_url == profile_picture_url
+        ).first() is not None
+        if not still_used:
+            for name in variant_filenames(key):
+                path = os.path.join(UPLOAD_DIR, name)
+                if os.path.exists(path):
+                    os.remove(path)
+    finally:
+        db.close()
+
+
+async def remove_profile_picture_files(profile_picture_url: str):
+    """
+    Delete the files behind a profile picture URL that is no longer in use
+
+    Variant files are content-addressed and may be shared by several users
+    (identical uploads), so they are only deleted once nobody references them.
+    """
+    key = parse_content_key(profile_picture_url)
+
+    if key is None:
+        # Legacy upload: user-<id>.<ext> plus user-<id>-thumb.<ext>
+        filename = os.path.basename(profile_picture_url)
+        name, ext = os.path.splitext(filename)
+        await remove_files_async(
+            os.path.join(UPLOAD_DIR, filename),
+            os.path.join(UPLOAD_DIR, f"{name}-thumb{ext}")
+        )
+        return
+
+    await run_in_threadpool(remove_unused_variants, profile_picture_url, key)
+
+
 # ===== PUBLIC ENDPOINTS (No Auth Required) =====
 
 @router.get("/recent", response_model=List[UserResponse])
@@ -54,6 +158,8 @@ async def get_recent_users(
 @router.get("/public/search-by-birthday", response_model=List[UserResponse])
 async def public_search_by_birthday(
     date_str: str = Query(..., description="Date in YYYY-MM-DD format"),
+    mode: str = Query(MODE_EXACT, regex=BIRTHDAY_MODE_PATTERN),
+    window_days: int = Query(DEFAULT_WINDOW_DAYS, ge=1, le=MAX_WINDOW_DAYS),
     limit: int = Query(3, ge=1, le=10),
     db: Session = Depends(get_db)
 ):
@@ -69,29 +175,22 @@ async def public_search_by_birthday(
             detail="Invalid date format. Use YYYY-MM-DD"
         )
 
-    # Get total count
-    total_count = db.query(func.count(User.id)).filter(
-        and_(
-            User.birth_date == search_date,
-            User.is_discoverable == True
-        )
-    ).scalar()
-
-    # Get limited results
+    # Get limited results (the total is served by /count)
     users = db.query(User).filter(
         and_(
-            User.birth_date == search_date,
+            birthday_condition(search_date, mode, window_days),
             User.is_discoverable == True
         )
     ).limit(limit).all()
 
-    # Return results with count metadata
     return users
 
 
 @router.get("/public/search-by-birthday/count")
 async def public_search_birthday_count(
     date_str: str = Query(..., description="Date in YYYY-MM-DD format"),
+    mode: str = Query(MODE_EXACT, regex=BIRTHDAY_MODE_PATTERN),
+    window_days: int = Query(DEFAULT_WINDOW_DAYS, ge=1, le=MAX_WINDOW_DAYS),
     db: Session = Depends(get_db)
 ):
     """
@@ -107,7 +206,7 @@ async def public_search_birthday_count(
 
     count = db.query(func.count(User.id)).filter(
         and_(
-            User.birth_date == search_date,
+            birthday_condition(search_date, mode, window_days),
             User.is_discoverable == True
         )
     ).scalar()
@@ -115,14 +214,8 @@ async def public_search_birthday_count(
     return {"count": count, "date": date_str}
 
 
-@router.get("/public/{user_id}")
-async def get_public_profile(
-    user_id: str,
-    db: Session = Depends(get_db)
-):
-    """
-    Get user's public profile with their posts (PUBLIC - no auth required)
-    """
+def build_public_profile_document(db: Session, user_id: str) -> dict:
+    """The cacheable part of a public profile: the user and their latest public posts"""
     user = db.query(User).filter(User.id == user_id).first()
 
     if not user:
@@ -144,25 +237,7 @@ async def get_public_profile(
             Post.visibility == 'public'
         )
     ).order_by(desc(Post.created_at)).limit(20).all()
-
-    # Count total posts
-    total_posts = db.query(func.count(Post.id)).filter(
-        Post.author_id == user_id
-    ).scalar()
-
-    # Count friends
-    friends_count = db.query(func.count(Friendship.id)).filter(
-        Friendship.user_id == user_id
-    ).scalar()
-
-    # Count birthday twins
-    birthday_twins_count = db.query(func.count(User.id)).filter(
-        and_(
-            User.birth_date == user.birth_date,
-            User.id != user_id,
-            User.is_discoverable == True
-        )
-    ).scalar()
+    pending = pending_counts(db, [post.id for post in posts])
 
     return {
         "user": {
@@ -175,26 +250,79 @@ async def get_public_profile(
             "region": user.region,
             "country": user.country,
             "profile_picture_url": user.profile_picture_url,
+            "profile_picture_variants": profile_picture_variant_urls(user.profile_picture_url),
             "created_at": user.created_at.isoformat() if user.created_at else None
         },
-        "stats": {
-            "posts": total_posts,
-            "friends": friends_count,
-            "birthdayTwins": birthday_twins_count
-        },
         "posts": [
             {
                 "id": post.id,
                 "content": post.content,
                 "created_at": post.created_at.isoformat() if post.created_at else None,
-                "like_count": post.like_count,
-                "comment_count": post.comment_count
+                "like_count": post.like_count + pending.get(post.id, (0, 0))[0],
+                "comment_count": post.comment_count + pending.get(post.id, (0, 0))[1]
             }
             for post in posts
         ]
     }
 
 
+@router.get("/public/{user_id}")
+async def get_public_profile(
+    user_id: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Get user's public profile with their posts (PUBLIC - no auth required)
+
+    The user and posts come from a per-user cache and the stats from
+    maintained counters, so a cached profile costs one query (which also
+    rechecks that the profile is still discoverable). Responses carry
+    an ETag (304 on If-None-Match) and a public Cache-Control, so a reverse
+    proxy can serve repeat hits.
+    """
+    document = public_profile_cache.get(user_id)
+    if document is None:
+        document = build_public_profile_document(db, user_id)
+        public_profile_cache.put(user_id, document)
+
+    stats = profile_stats(db, user_id)
+    if stats is None:
+        # Removed since it was cached
+        public_profile_cache.invalidate(user_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    total_posts, birth_date_count, is_discoverable = stats
+    if not is_discoverable:
+        # Made private since it was cached
+        public_profile_cache.invalidate(user_id)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This user's profile is private"
+        )
+
+    body = json.dumps({
+        "user": document["user"],
+        "stats": {
+            "posts": total_posts,
+            "friends": get_friend_graph(db).friend_count(user_id),
+            "birthdayTwins": max(birth_date_count - 1, 0)  # Everyone else born that day
+        },
+        "posts": document["posts"]
+    }, ensure_ascii=False, separators=(",", ":")).encode()
+
+    headers = {
+        "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        "Cache-Control": f"public, max-age={settings.PUBLIC_PROFILE_MAX_AGE}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 # ===== AUTHENTICATED ENDPOINTS =====
 
 @router.get("/me", response_model=UserResponse)
@@ -239,134 +367,111 @@ async def update_my_profile(
     if user_update.profile_picture_url is not None:
         current_user.profile_picture_url = user_update.profile_picture_url
 
+    # Columns whose value actually changed (for ProfileUpdated subscribers)
+    changed = tuple(attr.key for attr in inspect(current_user).attrs if attr.history.has_changes())
+
     db.commit()
     db.refresh(current_user)
+    if changed:
+        event_bus.emit(ProfileUpdated(user_id=current_user.id, fields=changed))
 
     return current_user
 
 
-@router.post("/me/profile-picture")
+# The body is parsed by the endpoint itself (see stream_upload_to_tempfile),
+# so the file field is declared here for the OpenAPI docs only
+PROFILE_PICTURE_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+
+@router.post("/me/profile-picture", openapi_extra=PROFILE_PICTURE_REQUEST_BODY)
 async def upload_profile_picture(
-    file: UploadFile = File(...),
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Upload profile picture for current user
-    Accepts: jpg, jpeg, png, gif, webp (max 5MB)
-    Generates thumbnail (150x150) and full size (800x800)
+    Accepts: jpg, jpeg, png, gif, webp (max 5MB) as the multipart field "file"
+    Generates WebP and JPEG variants (48, 96, 150 square and 800 full size)
+    named by content hash, in the image process pool
     """
+    too_large = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
+    )
+
+    # Reject early when the client declares an oversized body
+    declared_size = request.headers.get("content-length")
+    if declared_size and declared_size.isdigit() and int(declared_size) > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        raise too_large
+
+    # Parse the body as it arrives, validating size and hashing as we go: the
+    # limit holds on the wire and the file is written to disk once
+    try:
+        source_path, digest, filename = await stream_upload_to_tempfile(request, "file", MAX_FILE_SIZE)
+    except FileTooLargeError:
+        raise too_large
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     # Validate file extension
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_ext = os.path.splitext(filename)[1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
+        await remove_files_async(source_path)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
         )
 
-    # Read file content
-    file_content = await file.read()
-
-    # Validate file size
-    if len(file_content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
-        )
-
-    # Track image objects to ensure cleanup
-    image = None
-    thumbnail = None
-    full_image = None
-    background = None
+    key = content_key(digest)
 
     try:
-        # Open image with PIL
-        image = Image.open(io.BytesIO(file_content))
-
-        # Convert RGBA to RGB if necessary (for PNG with transparency)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            # Create white background
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-            # Close original image and use background
-            image.close()
-            image = background
-            background = None  # Reassigned to image
-
-        # Generate unique filename
-        filename = f"user-{current_user.id}{file_ext}"
-        thumb_filename = f"user-{current_user.id}-thumb{file_ext}"
-
-        # Create thumbnail (150x150, maintain aspect ratio with crop)
-        thumbnail = image.copy()
-        thumbnail.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-
-        # Crop to square if needed
-        width, height = thumbnail.size
-        if width != height:
-            min_dim = min(width, height)
-            left = (width - min_dim) // 2
-            top = (height - min_dim) // 2
-            thumbnail = thumbnail.crop((left, top, left + min_dim, top + min_dim))
-            thumbnail = thumbnail.resize(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-
-        # Create full size (800x800, maintain aspect ratio)
-        full_image = image.copy()
-        full_image.thumbnail(FULL_SIZE, Image.Resampling.LANCZOS)
-
-        # Delete old profile picture if exists (BEFORE saving new ones)
-        if current_user.profile_picture_url:
-            old_filename = os.path.basename(current_user.profile_picture_url)
-            # Get the old file's name and extension
-            old_name, old_ext = os.path.splitext(old_filename)
-            old_thumb_filename = f"{old_name}-thumb{old_ext}"
-
-            old_path = os.path.join(UPLOAD_DIR, old_filename)
-            old_thumb_path = os.path.join(UPLOAD_DIR, old_thumb_filename)
-
-            if os.path.exists(old_path):
-                os.remove(old_path)
-            if os.path.exists(old_thumb_path):
-                os.remove(old_thumb_path)
-
-        # Save thumbnail (AFTER deleting old files)
-        thumb_path = os.path.join(UPLOAD_DIR, thumb_filename)
-        thumbnail.save(thumb_path, quality=85, optimize=True)
-
-        # Save full size
-        full_path = os.path.join(UPLOAD_DIR, filename)
-        full_image.save(full_path, quality=90, optimize=True)
+        try:
+            await ensure_profile_picture_variants(source_path, key)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error processing image: {str(e)}"
+            )
 
         # Update user's profile_picture_url
-        current_user.profile_picture_url = f"profile_pictures/{filename}"
+        old_url = current_user.profile_picture_url
+        current_user.profile_picture_url = canonical_url(key)
         db.commit()
         db.refresh(current_user)
+        event_bus.emit(ProfileUpdated(user_id=current_user.id, fields=("profile_picture_url",)))
 
-        return {
-            "message": "Profile picture uploaded successfully",
-            "profile_picture_url": current_user.profile_picture_url,
-            "thumbnail_url": f"profile_pictures/{thumb_filename}"
-        }
+        # Until the commit nothing referenced the variants: removing the last
+        # other picture with this content may have deleted them meanwhile
+        await ensure_profile_picture_variants(source_path, key)
+    finally:
+        await remove_files_async(source_path)
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing image: {str(e)}"
-        )
+    # Delete the previous picture once nothing points at it any more
+    if old_url and old_url != current_user.profile_picture_url:
+        await remove_profile_picture_files(old_url)
 
-    finally:
-        # Explicitly close all PIL Image objects to prevent memory leaks
-        if image is not None:
-            image.close()
-        if thumbnail is not None:
-            thumbnail.close()
-        if full_image is not None:
-            full_image.close()
-        if background is not None:
-            background.close()
+    variants = profile_picture_variant_urls(current_user.profile_picture_url)
+
+    return {
+        "message": "Profile picture uploaded successfully",
+        "profile_picture_url": current_user.profile_picture_url,
+        "thumbnail_url": variants["jpeg"]["150"],
+        "profile_picture_variants": variants
+    }
 
 
 @router.delete("/me/profile-picture")
@@ -383,24 +488,15 @@ async def delete_profile_picture(
             detail="No profile picture to delete"
         )
 
-    # Get filename from URL
-    filename = os.path.basename(current_user.profile_picture_url)
-    file_ext = os.path.splitext(filename)[1]
-    thumb_filename = filename.replace(file_ext, f"-thumb{file_ext}")
-
-    # Delete files
-    full_path = os.path.join(UPLOAD_DIR, filename)
-    thumb_path = os.path.join(UPLOAD_DIR, thumb_filename)
-
-    if os.path.exists(full_path):
-        os.remove(full_path)
-    if os.path.exists(thumb_path):
-        os.remove(thumb_path)
-
     # Update database
+    old_url = current_user.profile_picture_url
     current_user.profile_picture_url = None
     db.commit()
     db.refresh(current_user)
+    event_bus.emit(ProfileUpdated(user_id=current_user.id, fields=("profile_picture_url",)))
+
+    # Delete files (shared variants are kept while another user still uses them)
+    await remove_profile_picture_files(old_url)
 
     return {"message": "Profile picture deleted successfully"}
 
@@ -415,17 +511,11 @@ async def get_my_stats(
     """
     # Count birthday twins
     birthday_twins_count = db.query(func.count(User.id)).filter(
-        and_(
-            User.birth_date == current_user.birth_date,
-            User.id != current_user.id,
-            User.is_discoverable == True
-        )
+        twins_condition(current_user)
     ).scalar()
 
     # Count friends (people I follow)
-    friends_count = db.query(func.count(Friendship.id)).filter(
-        Friendship.user_id == current_user.id
-    ).scalar()
+    friends_count = get_friend_graph(db).friend_count(current_user.id)
 
     # Count my posts
     posts_count = db.query(func.count(Post.id)).filter(
@@ -448,25 +538,59 @@ async def get_my_stats(
     }
 
 
-@router.get("/birthday-twins", response_model=List[UserResponse])
+@router.get("/birthday-twins", response_model=UserPage)
 async def get_birthday_twins(
+    mode: str = Query(MODE_EXACT, regex=BIRTHDAY_MODE_PATTERN),
+    window_days: int = Query(DEFAULT_WINDOW_DAYS, ge=1, le=MAX_WINDOW_DAYS),
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get users with the same birthday as current user
+    Get users with the same birthday as current user, in id order
+    - exact: same birth date
+    - day: same month and day, any year
+    - window: birthday within window_days of the current user's
     """
-    twins = db.query(User).filter(
-        and_(
-            User.birth_date == current_user.birth_date,
-            User.id != current_user.id,
-            User.is_discoverable == True
+    query = db.query(User).filter(twins_condition(current_user, mode, window_days))
+    return page_users_by_id(query, limit, cursor)
+
+
+@router.get("/search", response_model=List[UserResponse])
+async def search_users(
+    q: Optional[str] = Query(None, max_length=100, description="Name (prefix or up to one typo per word)"),
+    city: Optional[str] = Query(None, max_length=100),
+    region: Optional[str] = Query(None, max_length=100),
+    country: Optional[str] = Query(None, max_length=100),
+    birth_date: Optional[date] = Query(None, description="Date in YYYY-MM-DD format"),
+    birthday_mode: str = Query(MODE_EXACT, regex=BIRTHDAY_MODE_PATTERN),
+    window_days: int = Query(DEFAULT_WINDOW_DAYS, ge=1, le=MAX_WINDOW_DAYS),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search discoverable users by name, location and/or birth date
+    """
+    filters = PeopleFilters(
+        city=city, region=region, country=country,
+        birth_date=birth_date, birthday_mode=birthday_mode, window_days=window_days
+    )
+    terms = query_terms(q)
+
+    if not terms and not filters:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a name or at least one filter"
+        )
+    if not filters and all(len(term) < MIN_INDEXED_LENGTH for term in terms):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Name search needs at least {MIN_INDEXED_LENGTH} letters"
         )
-    ).limit(limit).offset(offset).all()
 
-    return twins
+    return search_people(db, q, filters, limit=limit, exclude_user_id=current_user.id)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -495,18 +619,20 @@ async def get_user_profile(
     return user
 
 
-@router.get("/search/by-birthday")
+@router.get("/search/by-birthday", response_model=UserPage)
 async def search_by_birthday(
     year: int = Query(..., ge=1900, le=2024),
     month: int = Query(..., ge=1, le=12),
     day: int = Query(..., ge=1, le=31),
+    mode: str = Query(MODE_EXACT, regex=BIRTHDAY_MODE_PATTERN),
+    window_days: int = Query(DEFAULT_WINDOW_DAYS, ge=1, le=MAX_WINDOW_DAYS),
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Search users by specific birthday
+    Search users by specific birthday, in id order
     """
     from datetime import date
 
@@ -518,12 +644,11 @@ async def search_by_birthday(
             detail="Invalid date"
         )
 
-    users = db.query(User).filter(
+    query = db.query(User).filter(
         and_(
-            User.birth_date == search_date,
+            birthday_condition(search_date, mode, window_days),
             User.id != current_user.id,
             User.is_discoverable == True
         )
-    ).limit(limit).offset(offset).all()
-
-    return users
+    )
+    return page_users_by_id(query, limit, cursor)
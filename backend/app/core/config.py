@@ -31,6 +31,55 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     SMTP_FROM_NAME: str = "AnotherMe"
     SMTP_FROM_EMAIL: str = "noreply@anotherme.com"
+    SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT: int = 30  # seconds
+    SMTP_POOL_SIZE: int = 2  # idle authenticated sessions kept open
+    SMTP_POOL_IDLE_TIMEOUT: int = 60  # seconds before an idle session is discarded
+
+    # Image processing (profile pictures are resized in a process pool)
+    IMAGE_PROCESS_WORKERS: int = 2
+
+    # Uploads serving: "" (app sends files), "x-accel-redirect" (nginx) or "x-sendfile" (Apache/lighttpd)
+    UPLOADS_OFFLOAD_MODE: str = ""
+    UPLOADS_OFFLOAD_PREFIX: str = "/protected-uploads"  # internal location for X-Accel-Redirect
+
+    # Server-pushed event stream (/api/events/stream)
+    EVENT_STREAM_HEARTBEAT_INTERVAL: int = 15  # seconds between keep-alive comments on idle streams
+    EVENT_STREAM_HISTORY_SIZE: int = 1000  # recent events kept for Last-Event-ID resume
+    EVENT_STREAM_QUEUE_SIZE: int = 100  # per-stream backlog before the client is told to resync
+
+    # WebSocket chat (/api/messages/ws): frames queued per connection before a slow client is disconnected
+    CHAT_SEND_QUEUE_SIZE: int = 64
+    # Seconds between log lines with this worker's open chat connection counts (0 = off)
+    CHAT_METRICS_LOG_INTERVAL: int = 300
+
+    # Domain event relay between worker processes ("" = single process, no relay)
+    # e.g. "./database/event_relay.db"; other workers see events within the poll interval (seconds)
+    EVENT_RELAY_PATH: str = ""
+    EVENT_RELAY_POLL_INTERVAL: float = 0.5
+    EVENT_RELAY_RETENTION: int = 300  # seconds relayed events are kept
+
+    # In-memory friend graph (counts, mutual friends, suggestions): seconds between full reloads, which pick up
+    # friendship rows changed without events (cascading deletes, scripts, workers without EVENT_RELAY_PATH)
+    # (0 = load at startup only)
+    FRIEND_GRAPH_RELOAD_INTERVAL: int = 300
+
+    # Friend suggestions batch job: seconds between runs over queued users in this process (0 = off). Enable it
+    # on one worker only (or run `python -m app.services.suggestions` from cron): runners in several workers would
+    # race on the queue, each ranking with its own in-memory friend graph
+    FRIEND_SUGGESTIONS_REFRESH_INTERVAL: int = 0
+
+    # Post like/comment counters: seconds between folds of the pending deltas into posts (0 = do not fold
+    # in this process, e.g. on all but one worker, or when running `python -m app.services.post_counters`
+    # from cron). Reads include pending deltas, so this only bounds how many pile up.
+    POST_COUNTER_FOLD_INTERVAL: int = 10
+
+    # Public profiles (/api/users/public/{id}): seconds browsers and reverse proxies may reuse a response
+    # before revalidating it with its ETag
+    PUBLIC_PROFILE_MAX_AGE: int = 60
+    # Seconds a worker keeps a public profile's user and posts cached. Events invalidate it sooner, but only
+    # those raised in this worker unless EVENT_RELAY_PATH is set, so this bounds how stale other workers get
+    PUBLIC_PROFILE_CACHE_TTL: int = 300
 
     # Frontend URL
     FRONTEND_URL: str = "http://localhost:8080"
@@ -43,6 +92,9 @@ class Settings(BaseSettings):
     RATE_LIMIT_CREATE_POST: str = "10/5minutes"
     RATE_LIMIT_CREATE_COMMENT: str = "20/5minutes"
     RATE_LIMIT_SEND_MESSAGE: str = "30/5minutes"
+    # SQLite file shared by all worker processes; drained buckets are purged every interval (seconds)
+    RATE_LIMIT_STORAGE_PATH: str = "./database/rate_limits.db"
+    RATE_LIMIT_CLEANUP_INTERVAL: int = 300
 
     class Config:
         env_file = ".env"
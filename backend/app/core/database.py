@@ -1,10 +1,10 @@
 """
 Database connection and session management
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
 from app.core.config import settings
 
 # Create database engine
@@ -19,6 +19,30 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Background jobs (graph loads, suggestion refreshes, counter folds) must not
+# use SessionLocal: its sessions share StaticPool's single connection, and
+# so one transaction, with every request. This engine opens a connection
+# per session instead, and starts transactions itself so that all of a
+# job's statements (reads included) run in one transaction.
+background_engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": 30},  # Wait for request writers
+    poolclass=NullPool,
+    echo=False
+)
+
+
+@event.listens_for(background_engine, "connect")
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    # The driver would only BEGIN before writes; the "begin" hook below does it instead
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(background_engine, "begin")
+def _begin(connection):
+    mode = "IMMEDIATE" if connection.get_execution_options().get("begin_immediate") else "DEFERRED"
+    connection.exec_driver_sql(f"BEGIN {mode}")
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -35,6 +59,22 @@ def get_db():
         db.close()
 
 
+def background_session(immediate: bool = False) -> Session:
+    """
+    Session on its own connection, for jobs running outside requests and
+    for short locked sections that must not share the requests' transaction
+
+    With `immediate`, each transaction takes the database write lock when it
+    begins (BEGIN IMMEDIATE): nothing can be written between the job's
+    reads and its writes.
+    """
+    return Session(
+        bind=background_engine.execution_options(begin_immediate=immediate),
+        autocommit=False,
+        autoflush=False
+    )
+
+
 def init_db():
     """
     Initialize database - create all tables
@@ -2,12 +2,193 @@
 Email utility functions for sending emails via SMTP
 """
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import List, Optional
 from app.core.config import settings
 
 
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP sessions that are reused across messages
+
+    Opening a session costs a TCP connect, EHLO, STARTTLS handshake and AUTH.
+    The pool keeps up to `size` idle sessions alive so consecutive emails skip
+    all of that, and transparently reconnects when the server has dropped an
+    idle session (most providers time out after a few minutes).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        size: int = 2,
+        idle_timeout: float = 60,
+        timeout: float = 30
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        # Idle sessions as (connection, last_used) - most recently used last
+        self._idle: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open a new session: connect, STARTTLS and login"""
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        """Close a session, ignoring errors from already-dead sockets"""
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _acquire(self) -> smtplib.SMTP:
+        """Take an idle session from the pool or open a new one"""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+
+            # Drop sessions the server has most likely timed out already
+            if now - last_used > self.idle_timeout:
+                self._close(server)
+                continue
+
+            return server
+
+        return self._connect()
+
+    def _release(self, server: smtplib.SMTP):
+        """Return a healthy session to the pool (or close it if the pool is full)"""
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((server, time.monotonic()))
+                return
+        self._close(server)
+
+    def send_many(self, messages: List[MIMEMultipart]) -> List[bool]:
+        """
+        Send a batch of messages over one session
+
+        Returns:
+            List with True/False per message, in the same order
+        """
+        try:
+            server = self._acquire()
+        except Exception as e:
+            print(f"Error connecting to SMTP server: {e}")
+            return [False] * len(messages)
+
+        results = []
+        for message in messages:
+            try:
+                try:
+                    server.send_message(message)
+                except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+                    # Server closed the idle session - reconnect and retry once
+                    self._close(server)
+                    server = None  # Nothing left to close if the reconnect fails
+                    server = self._connect()
+                    server.send_message(message)
+                results.append(True)
+            except smtplib.SMTPRecipientsRefused as e:
+                # Bad address - smtplib already reset the session, keep going
+                print(f"Error sending email to {message['To']}: {e}")
+                results.append(False)
+            except Exception as e:
+                # Session unusable even after reconnecting - give up on the rest
+                print(f"Error sending email: {e}")
+                if server is not None:
+                    self._close(server)
+                results.extend([False] * (len(messages) - len(results)))
+                return results
+
+        self._release(server)
+        return results
+
+    def close_all(self):
+        """Close every idle session (call on application shutdown)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+
+# Shared pool for the whole process
+smtp_pool = SMTPConnectionPool(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    user=settings.SMTP_USER,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    size=settings.SMTP_POOL_SIZE,
+    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT,
+    timeout=settings.SMTP_TIMEOUT
+)
+
+
+def build_email_message(
+    to_email: str,
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None
+) -> MIMEMultipart:
+    """
+    Build a multipart email message
+
+    Args:
+        to_email: Recipient email address
+        subject: Email subject
+        html_content: HTML version of email body
+        text_content: Plain text version (optional, falls back to HTML)
+
+    Returns:
+        MIMEMultipart message ready to send
+    """
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
+    message["To"] = to_email
+
+    # Add text and HTML parts
+    if text_content:
+        text_part = MIMEText(text_content, "plain")
+        message.attach(text_part)
+
+    html_part = MIMEText(html_content, "html")
+    message.attach(html_part)
+
+    return message
+
+
 def send_email(
     to_email: str,
     subject: str,
@@ -15,7 +196,7 @@ def send_email(
     text_content: Optional[str] = None
 ) -> bool:
     """
-    Send an email via SMTP
+    Send an email via SMTP (over a pooled connection)
 
     Args:
         to_email: Recipient email address
@@ -27,31 +208,28 @@ def send_email(
         True if email sent successfully, False otherwise
     """
     try:
-        # Create message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = subject
-        message["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
-        message["To"] = to_email
+        message = build_email_message(to_email, subject, html_content, text_content)
+    except Exception as e:
+        print(f"Error sending email: {e}")
+        return False
 
-        # Add text and HTML parts
-        if text_content:
-            text_part = MIMEText(text_content, "plain")
-            message.attach(text_part)
+    return smtp_pool.send_many([message])[0]
 
-        html_part = MIMEText(html_content, "html")
-        message.attach(html_part)
 
-        # Send email
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(message)
+def send_email_batch(messages: List[MIMEMultipart]) -> List[bool]:
+    """
+    Send many emails over a single SMTP session
 
-        return True
+    Args:
+        messages: Messages built with build_email_message()
 
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+    Returns:
+        List with True/False per message, in the same order
+    """
+    if not messages:
+        return []
+
+    return smtp_pool.send_many(messages)
 
 
 def send_contact_form_email(
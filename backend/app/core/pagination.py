@@ -0,0 +1,45 @@
+"""
+Cursor (keyset) pagination helpers
+
+A cursor is the sort key of the last item returned, encoded as an opaque
+URL-safe string. The next page continues strictly after that key, so it
+costs an index seek instead of scanning skipped rows like OFFSET does.
+"""
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(key: dict) -> str:
+    """Opaque cursor string for a sort key"""
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *fields: str) -> Optional[dict]:
+    """
+    Decode a cursor produced by encode_cursor()
+
+    Returns:
+        The sort key, or None when no cursor was given
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or lacks `fields`
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        key = None
+
+    if not isinstance(key, dict) or any(field not in key for field in fields):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return key
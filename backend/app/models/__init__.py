@@ -3,9 +3,9 @@ Database models package
 Import all models here for easy access
 """
 from app.models.user import User
-from app.models.post import Post, Comment, PostLike, CommentLike
+from app.models.post import Post, Comment, PostLike, CommentLike, PostChange
 from app.models.message import Message
-from app.models.friendship import Friendship
+from app.models.friendship import Friendship, FriendSuggestion
 from app.models.password_reset import PasswordResetToken
 from app.models.email_verification import EmailVerificationToken
 
@@ -15,8 +15,10 @@ __all__ = [
     "Comment",
     "PostLike",
     "CommentLike",
+    "PostChange",
     "Message",
     "Friendship",
+    "FriendSuggestion",
     "PasswordResetToken",
     "EmailVerificationToken",
 ]
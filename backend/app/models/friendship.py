@@ -1,22 +1,46 @@
 """
-Friendship model (one-way)
+Friendship model (undirected, one row per pair)
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
+from typing import Tuple
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, CheckConstraint
 from sqlalchemy.sql import func
 from app.core.database import Base
-import uuid
+
+
+def friendship_key(user_id: str, other_id: str) -> Tuple[str, str]:
+    """(user_low_id, user_high_id) of the friendship between two users"""
+    return (user_id, other_id) if user_id < other_id else (other_id, user_id)
 
 
 class Friendship(Base):
     __tablename__ = "friendships"
     __table_args__ = (
-        UniqueConstraint('user_id', 'friend_id', name='unique_friendship'),
+        CheckConstraint('user_low_id < user_high_id', name='canonical_friendship'),
     )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    friend_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_low_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    user_high_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Each user's users.birth_md, maintained by triggers in schema.sql
+    low_birth_md = Column(Integer)
+    high_birth_md = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     def __repr__(self):
-        return f"<Friendship {self.user_id} -> {self.friend_id}>"
+        return f"<Friendship {self.user_low_id} <-> {self.user_high_id}>"
+
+
+class FriendSuggestion(Base):
+    """Precomputed "people you may know" entry (written by app.services.suggestions)"""
+    __tablename__ = "friend_suggestions"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 0 = best
+    suggested_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Integer, nullable=False)
+    mutual_count = Column(Integer, nullable=False, default=0)
+    birthday_twin = Column(Boolean, nullable=False, default=False)
+    same_city = Column(Boolean, nullable=False, default=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<FriendSuggestion {self.user_id} #{self.rank} -> {self.suggested_id}>"
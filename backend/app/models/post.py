@@ -1,7 +1,7 @@
 """
 Post and Comment models
 """
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, ForeignKey
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -18,7 +18,7 @@ class Post(Base):
     like_count = Column(Integer, default=0)
     comment_count = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())  # Set by the timestamp trigger on edits
 
     def __repr__(self):
         return f"<Post {self.id} by {self.author_id}>"
@@ -33,8 +33,9 @@ class Comment(Base):
     parent_comment_id = Column(String, ForeignKey("comments.id", ondelete="CASCADE"), index=True)
     content = Column(Text, nullable=False)  # Max 500 chars enforced at API level
     like_count = Column(Integer, default=0)
+    reply_count = Column(Integer, default=0)  # Maintained by triggers in schema.sql
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())  # Set by the timestamp trigger on edits
 
     def __repr__(self):
         return f"<Comment {self.id} on Post {self.post_id}>"
@@ -62,3 +63,17 @@ class CommentLike(Base):
 
     def __repr__(self):
         return f"<CommentLike {self.user_id} -> {self.comment_id}>"
+
+
+class PostChange(Base):
+    """Latest change sequence number per post (maintained by triggers in schema.sql)"""
+    __tablename__ = "post_changes"
+
+    post_id = Column(String, primary_key=True)
+    author_id = Column(String, nullable=False, index=True)
+    created_seq = Column(Integer, nullable=False, default=0)  # 0: post predates the change log
+    seq = Column(Integer, nullable=False, unique=True)
+    deleted = Column(Boolean, nullable=False, default=False)
+
+    def __repr__(self):
+        return f"<PostChange {self.post_id} @{self.seq}>"
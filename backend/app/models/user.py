@@ -1,7 +1,7 @@
 """
 User model
 """
-from sqlalchemy import Column, String, Date, Boolean, DateTime, Text
+from sqlalchemy import Column, String, Date, Boolean, DateTime, Text, Integer, Computed
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -16,6 +16,8 @@ class User(Base):
     full_name = Column(String, nullable=False)
     display_name = Column(String)
     birth_date = Column(Date, nullable=False, index=True)
+    # Month-day key (May 17 -> 517) for year-agnostic birthday lookups; see app.services.birthdays
+    birth_md = Column(Integer, Computed("CAST(strftime('%m%d', birth_date) AS INTEGER)", persisted=False), index=True)
     gender = Column(String, nullable=False)  # Male, Female, Other, Prefer not to say
     city = Column(String, nullable=False, index=True)
     region = Column(String, nullable=False)
@@ -27,8 +29,9 @@ class User(Base):
     oauth_provider = Column(String)  # google, facebook, or None
     oauth_id = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())  # Set by the timestamp trigger on edits
     last_login = Column(DateTime(timezone=True))
+    post_count = Column(Integer, default=0)  # Maintained by triggers in schema.sql
 
     def __repr__(self):
         return f"<User {self.email}>"
@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field, field_serializer
 from typing import Optional
 from datetime import datetime
 
+from app.schemas.user import ProfilePictureVariantsMixin
+
 
 class MessageCreate(BaseModel):
     """Schema for sending a message"""
@@ -12,7 +14,7 @@ class MessageCreate(BaseModel):
     content: str = Field(..., min_length=1, max_length=2000)
 
 
-class MessageSender(BaseModel):
+class MessageSender(ProfilePictureVariantsMixin):
     """Nested sender info for message response"""
     id: str
     full_name: str
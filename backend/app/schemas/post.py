@@ -2,9 +2,11 @@
 Post schemas for request/response validation
 """
 from pydantic import BaseModel, Field, field_serializer
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+from app.schemas.user import ProfilePictureVariantsMixin
+
 
 class PostCreate(BaseModel):
     """Schema for creating a post"""
@@ -19,7 +21,7 @@ class PostUpdate(BaseModel):
     title: Optional[str] = Field(None, max_length=200)
 
 
-class PostAuthor(BaseModel):
+class PostAuthor(ProfilePictureVariantsMixin):
     """Nested author info for post response"""
     id: str
     full_name: str
@@ -57,6 +59,16 @@ class PostResponse(BaseModel):
         from_attributes = True
 
 
+class FeedChangesResponse(BaseModel):
+    """Feed delta since a change token"""
+    token: str  # Pass as ?since= on the next call
+    reset: bool = False  # Token unknown (e.g. database recreated): reload the feed
+    has_more: bool = False  # More changes pending: call again with the new token
+    created: List[PostResponse] = []
+    updated: List[PostResponse] = []
+    deleted: List[str] = []
+
+
 class CommentCreate(BaseModel):
     """Schema for creating a comment"""
     content: str = Field(..., min_length=1, max_length=500)
@@ -72,6 +84,7 @@ class CommentResponse(BaseModel):
     parent_comment_id: Optional[str]
     content: str
     like_count: int
+    is_liked: bool = False  # Whether current user has liked this comment
     created_at: datetime
     updated_at: datetime
 
@@ -86,3 +99,34 @@ class CommentResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PostSearchResponse(BaseModel):
+    """One page of post search results (best match first)"""
+    items: List[PostResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; null on the last page
+
+
+class CommentSearchResponse(BaseModel):
+    """One page of comment search results (best match first)"""
+    items: List[CommentResponse]
+    next_cursor: Optional[str] = None
+
+
+class CommentThread(CommentResponse):
+    """A top-level comment with its first replies"""
+    reply_count: int = 0
+    replies: List[CommentResponse] = []  # Oldest first
+    replies_cursor: Optional[str] = None  # For /comments/{id}/replies?cursor=; null if all replies are inlined
+
+
+class CommentThreadPage(BaseModel):
+    """One page of a post's top-level comments (oldest first)"""
+    items: List[CommentThread]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; null on the last page
+
+
+class CommentPage(BaseModel):
+    """One page of replies to a comment (oldest first)"""
+    items: List[CommentResponse]
+    next_cursor: Optional[str] = None
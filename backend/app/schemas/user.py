@@ -1,10 +1,22 @@
 """
 User schemas (request/response models)
 """
-from pydantic import BaseModel, EmailStr, Field, field_serializer
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_serializer, computed_field
+from typing import Dict, List, Optional
 from datetime import date, datetime
 
+from app.services.profile_pictures import profile_picture_variant_urls
+
+
+class ProfilePictureVariantsMixin(BaseModel):
+    """Adds resized avatar URLs derived from profile_picture_url"""
+
+    @computed_field
+    @property
+    def profile_picture_variants(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """WebP/JPEG URLs by pixel size, e.g. {"webp": {"48": ...}}; None for legacy pictures"""
+        return profile_picture_variant_urls(self.profile_picture_url)
+
 
 class UserBase(BaseModel):
     """Base user schema"""
@@ -37,7 +49,7 @@ class UserUpdate(BaseModel):
     is_discoverable: Optional[bool] = None
 
 
-class UserResponse(UserBase):
+class UserResponse(ProfilePictureVariantsMixin, UserBase):
     """User response schema (public info)"""
     id: str
     is_discoverable: bool
@@ -60,6 +72,12 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserPage(BaseModel):
+    """One page of a user list"""
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; null on the last page
+
+
 class UserMe(UserResponse):
     """Current user response (includes private info)"""
     oauth_provider: Optional[str] = None
@@ -76,3 +94,43 @@ class UserSearch(BaseModel):
     gender: Optional[str] = None
     min_age: Optional[int] = None
     max_age: Optional[int] = None
+
+
+class UpcomingBirthday(BaseModel):
+    """A friend's next birthday"""
+    friend: UserResponse
+    next_birthday: date  # Next occurrence (Feb 29 birthdays fall on Feb 28 in common years)
+    days_until: int  # 0 = today
+    turning: int  # Age on that day
+
+
+class UpcomingBirthdaysResponse(BaseModel):
+    """One page of upcoming birthdays, in calendar order"""
+    items: List[UpcomingBirthday]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; null on the last page
+
+
+class FriendSuggestion(BaseModel):
+    """Someone the user may know, and why"""
+    user: UserResponse
+    mutual_friends: int
+    birthday_twin: bool  # Same birthday (month and day)
+    same_city: bool
+
+
+class BulkFriendsRequest(BaseModel):
+    """User IDs to add or remove as friends in one call"""
+    user_ids: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class BulkFriendResult(BaseModel):
+    """Outcome for one ID of a bulk friend operation"""
+    user_id: str
+    # added, removed, already_friends, not_friends, not_found or self
+    status: str
+
+
+class BulkFriendsResponse(BaseModel):
+    """Per-ID outcomes, in request order (duplicates reported once)"""
+    changed: int
+    results: List[BulkFriendResult]
@@ -0,0 +1,117 @@
+"""
+Birthday matching
+
+users.birth_md is a generated, indexed month-day key (May 17 -> 517), so
+"same day, any year" and "within N days" lookups are index seeks instead
+of scans over birth_date. Three modes:
+
+- exact:  same birth date (same day of the same year), the original
+          definition of a birthday twin
+- day:    same month and day, any year
+- window: month-day within +/- N days of the date, wrapping around the
+          turn of the year
+
+Upcoming birthdays read friendships.low_birth_md/high_birth_md (per-friendship
+copies of the key) as at most two key ranges: the rest of this year and the start
+of next year. In years without Feb 29, those birthdays fall on Feb 28.
+"""
+import calendar
+from datetime import date, timedelta
+from typing import List, NamedTuple
+
+from sqlalchemy import and_
+
+from app.models.user import User
+
+MODE_EXACT = "exact"
+MODE_DAY = "day"
+MODE_WINDOW = "window"
+BIRTHDAY_MODES = (MODE_EXACT, MODE_DAY, MODE_WINDOW)
+BIRTHDAY_MODE_PATTERN = f"^({'|'.join(BIRTHDAY_MODES)})$"
+
+DEFAULT_WINDOW_DAYS = 3
+MAX_WINDOW_DAYS = 15
+
+# Leap year used to walk month-days, so Feb 29 is part of every window it falls in
+_REFERENCE_YEAR = 2000
+
+
+def month_day_key(value: date) -> int:
+    """birth_md value for a date (month * 100 + day)"""
+    return value.month * 100 + value.day
+
+
+def window_keys(value: date, days: int) -> List[int]:
+    """Month-day keys within +/- `days` of `value`, in calendar order"""
+    try:
+        center = value.replace(year=_REFERENCE_YEAR)
+    except ValueError:
+        center = date(_REFERENCE_YEAR, value.month, value.day)
+    keys = []
+    for offset in range(-days, days + 1):
+        key = month_day_key(center + timedelta(days=offset))
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+def birthday_in(birth_date: date, year: int) -> date:
+    """Date of the birthday in `year` (Feb 29 birthdays fall on Feb 28 in common years)"""
+    try:
+        return birth_date.replace(year=year)
+    except ValueError:
+        return date(year, 2, 28)
+
+
+class KeyRange(NamedTuple):
+    """Month-day keys lo..hi (inclusive) whose birthdays fall in `year`"""
+    year: int
+    lo: int
+    hi: int
+
+
+def upcoming_ranges(start: date, days: int) -> List[KeyRange]:
+    """
+    birth_md ranges covering `days` days from `start`, in calendar order
+
+    Within a range, ascending keys are calendar order, so each range is one
+    ordered index scan. `days` must not exceed 365 (no day appears twice).
+    """
+    end = start + timedelta(days=days - 1)
+
+    def last_key(day: date) -> int:
+        key = month_day_key(day)
+        # Feb 29 birthdays are celebrated on Feb 28 in common years
+        return 229 if key == 228 and not calendar.isleap(day.year) else key
+
+    if start.year == end.year:
+        return [KeyRange(start.year, month_day_key(start), last_key(end))]
+    return [
+        KeyRange(start.year, month_day_key(start), 1231),
+        KeyRange(end.year, 101, last_key(end)),
+    ]
+
+
+def birthday_condition(value: date, mode: str = MODE_EXACT, window_days: int = DEFAULT_WINDOW_DAYS):
+    """
+    SQLAlchemy filter on User for birthdays matching `value`
+
+    Raises:
+        ValueError: unknown mode
+    """
+    if mode == MODE_EXACT:
+        return User.birth_date == value
+    if mode == MODE_DAY:
+        return User.birth_md == month_day_key(value)
+    if mode == MODE_WINDOW:
+        return User.birth_md.in_(window_keys(value, window_days))
+    raise ValueError(f"Unknown birthday mode: {mode}")
+
+
+def twins_condition(user: User, mode: str = MODE_EXACT, window_days: int = DEFAULT_WINDOW_DAYS):
+    """Discoverable users (other than `user`) whose birthday matches theirs"""
+    return and_(
+        birthday_condition(user.birth_date, mode, window_days),
+        User.id != user.id,
+        User.is_discoverable == True
+    )
@@ -0,0 +1,167 @@
+"""
+WebSocket chat connections
+
+Tracks the open chat sockets of each user and forwards frames to them.
+Every connection has a bounded send queue drained by its own writer task,
+so one slow client never blocks the sender or other recipients: when a
+queue is full the connection is closed (code 1013) and the client
+reconnects and reloads its conversation.
+
+Connections live in this process; messages reach sockets held by other
+workers through the event bus relay. Each worker logs its connection
+counters every CHAT_METRICS_LOG_INTERVAL seconds.
+"""
+import asyncio
+import uuid
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import WebSocket
+from starlette.websockets import WebSocketState
+
+from app.core.config import settings
+
+# WebSocket close codes
+CLOSE_POLICY_VIOLATION = 1008  # authentication failed
+CLOSE_TRY_AGAIN_LATER = 1013  # send queue overflowed
+
+
+class ChatConnection:
+    """One open chat socket and its outgoing queue"""
+
+    def __init__(self, websocket: WebSocket, user_id: str, queue_size: int):
+        self.id = uuid.uuid4().hex  # Lets events exclude the socket they came from
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closing = False
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def send(self, frame: dict) -> bool:
+        """
+        Queue a frame without waiting
+
+        Returns:
+            False if the connection is overloaded (it is then being closed)
+        """
+        if self.closing:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self.closing = True
+            asyncio.create_task(self._close(CLOSE_TRY_AGAIN_LATER))
+            return False
+
+    async def _write_loop(self):
+        while True:
+            frame = await self.queue.get()
+            await self.websocket.send_json(frame)
+
+    async def _close(self, code: int):
+        if self.websocket.application_state != WebSocketState.DISCONNECTED:
+            try:
+                await self.websocket.close(code=code)
+            except RuntimeError:
+                pass  # Already closed by the other side
+
+
+class ChatConnectionManager:
+    """Open chat connections by user, with counters for monitoring"""
+
+    def __init__(self, queue_size: int = 64):
+        self.queue_size = queue_size
+        self._connections: Dict[str, Set[ChatConnection]] = {}
+        self.connections_opened = 0
+        self.slow_consumer_closes = 0
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(conns) for conns in self._connections.values())
+
+    @property
+    def user_count(self) -> int:
+        return len(self._connections)
+
+    def metrics(self) -> dict:
+        """Counters for operators (logged, not served over HTTP: they are not per-user data)"""
+        return {
+            "connections": self.connection_count,
+            "users": self.user_count,
+            "connections_opened": self.connections_opened,
+            "slow_consumer_closes": self.slow_consumer_closes,
+        }
+
+    def connect(self, websocket: WebSocket, user_id: str) -> ChatConnection:
+        """Register an accepted socket and start its writer"""
+        connection = ChatConnection(websocket, user_id, self.queue_size)
+        connection.start()
+        self._connections.setdefault(user_id, set()).add(connection)
+        self.connections_opened += 1
+        return connection
+
+    async def disconnect(self, connection: ChatConnection):
+        conns = self._connections.get(connection.user_id)
+        if conns is not None:
+            conns.discard(connection)
+            if not conns:
+                del self._connections[connection.user_id]
+        await connection.stop()
+
+    def send_to_user(self, user_id: str, frame: dict, exclude_id: Optional[str] = None):
+        """Queue a frame on every open socket of a user, except connection `exclude_id` (event loop only)"""
+        for connection in list(self._connections.get(user_id, ())):
+            if connection.id == exclude_id or connection.closing:
+                continue
+            if not connection.send(frame):
+                self.slow_consumer_closes += 1
+
+    def send_to_users(self, user_ids: Iterable[str], frame: dict, exclude_id: Optional[str] = None):
+        for user_id in set(user_ids):
+            self.send_to_user(user_id, frame, exclude_id)
+
+
+chat_manager = ChatConnectionManager(queue_size=settings.CHAT_SEND_QUEUE_SIZE)
+
+
+# ----- periodic metrics logging inside the app -----
+
+_metrics_task: Optional[asyncio.Task] = None
+
+
+async def _log_metrics_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        metrics = chat_manager.metrics()
+        print("Chat connections: " + ", ".join(f"{name}={value}" for name, value in metrics.items()))
+
+
+def start_metrics_logger():
+    """Start logging chat_manager.metrics() (call on startup; no-op when the interval is 0)"""
+    global _metrics_task
+    interval = settings.CHAT_METRICS_LOG_INTERVAL
+    if interval <= 0 or _metrics_task is not None:
+        return
+    _metrics_task = asyncio.get_running_loop().create_task(_log_metrics_periodically(interval))
+
+
+async def stop_metrics_logger():
+    global _metrics_task
+    if _metrics_task is not None:
+        _metrics_task.cancel()
+        try:
+            await _metrics_task
+        except asyncio.CancelledError:
+            pass
+        _metrics_task = None
@@ -0,0 +1,408 @@
+"""
+Domain event bus
+
+Routers emit typed events after their transaction commits (PostCreated,
+PostLiked, MessageSent, FriendAdded, ProfileUpdated, ...). Caches,
+denormalizations and push notifications subscribe to the events they care
+about instead of being patched into each router.
+
+Handlers may be plain functions (run inline) or coroutines (scheduled on
+the event loop). A failing handler is reported and never breaks the
+request that emitted the event.
+
+With EVENT_RELAY_PATH set, events are also written to a small SQLite
+relay that every worker process polls, so subscribers in other workers
+(caches, open event streams and chat sockets) see them too. Relay writes
+are queued for a background thread, so emitting never waits on SQLite.
+"""
+import asyncio
+import dataclasses
+import inspect
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+# ===== EVENTS =====
+
+@dataclass(frozen=True)
+class DomainEvent:
+    """Base class: subscribe to it to receive every event"""
+
+
+@dataclass(frozen=True)
+class UserRegistered(DomainEvent):
+    user_id: str
+
+
+@dataclass(frozen=True)
+class ProfileUpdated(DomainEvent):
+    user_id: str
+    fields: Tuple[str, ...]  # Changed columns, e.g. ("city", "profile_picture_url")
+
+
+@dataclass(frozen=True)
+class PostCreated(DomainEvent):
+    post_id: str
+    author_id: str
+
+
+@dataclass(frozen=True)
+class PostUpdated(DomainEvent):
+    post_id: str
+    author_id: str
+
+
+@dataclass(frozen=True)
+class PostDeleted(DomainEvent):
+    post_id: str
+    author_id: str
+
+
+@dataclass(frozen=True)
+class PostLiked(DomainEvent):
+    post_id: str
+    user_id: str
+    like_count: int
+
+
+@dataclass(frozen=True)
+class PostUnliked(DomainEvent):
+    post_id: str
+    user_id: str
+    like_count: int
+
+
+@dataclass(frozen=True)
+class CommentCreated(DomainEvent):
+    comment_id: str
+    post_id: str
+    author_id: str
+    comment_count: int
+
+
+@dataclass(frozen=True)
+class CommentDeleted(DomainEvent):
+    comment_id: str
+    post_id: str
+    author_id: str
+    comment_count: int
+
+
+@dataclass(frozen=True)
+class MessageSent(DomainEvent):
+    message_id: str
+    sender_id: str
+    recipient_id: str
+    message: dict  # Serialized MessageResponse
+    recipient_unread_count: int
+    origin_connection_id: Optional[str] = None  # Chat socket that sent it (gets its own reply)
+
+
+@dataclass(frozen=True)
+class MessagesRead(DomainEvent):
+    reader_id: str
+    message_ids_by_sender: Dict[str, List[str]]
+    reader_unread_count: int
+    origin_connection_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class FriendAdded(DomainEvent):
+    user_id: str
+    friend_id: str
+
+
+@dataclass(frozen=True)
+class FriendRemoved(DomainEvent):
+    user_id: str
+    friend_id: str
+
+
+def _event_types() -> Dict[str, Type[DomainEvent]]:
+    """Event classes by name (for decoding relayed events)"""
+    types = {}
+    pending = [DomainEvent]
+    while pending:
+        cls = pending.pop()
+        types[cls.__name__] = cls
+        pending.extend(cls.__subclasses__())
+    return types
+
+
+def encode_event(event: DomainEvent) -> str:
+    return json.dumps(dataclasses.asdict(event), separators=(",", ":"))
+
+
+def decode_event(event_type: str, payload: str) -> Optional[DomainEvent]:
+    cls = _event_types().get(event_type)
+    if cls is None:
+        return None
+    data = json.loads(payload)
+    # JSON has no tuples
+    for field in dataclasses.fields(cls):
+        if getattr(field.type, "__origin__", None) is tuple and isinstance(data.get(field.name), list):
+            data[field.name] = tuple(data[field.name])
+    return cls(**data)
+
+
+# ===== CROSS-PROCESS RELAY =====
+
+class SQLiteEventRelay:
+    """
+    Shares events between worker processes through one SQLite file
+
+    Each process appends the events it emits and polls for rows written by
+    other processes. Rows are kept for `retention` seconds, which only has
+    to cover a few poll intervals.
+
+    publish() only queues the event: one writer thread per process inserts
+    queued events in order, a batch per transaction.
+    """
+
+    def __init__(self, path: str, retention: float = 300):
+        self.path = path
+        self.retention = retention
+        self.origin = uuid.uuid4().hex
+        self._local = threading.local()
+        self._last_id = 0
+        self._next_cleanup = 0.0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._connection()  # Create the table up front
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS event_relay ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "origin TEXT NOT NULL, "
+                "event_type TEXT NOT NULL, "
+                "payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL"
+                ")"
+            )
+            self._local.conn = conn
+        return conn
+
+    def start_position(self):
+        """Skip events written before this process started listening"""
+        row = self._connection().execute("SELECT MAX(id) FROM event_relay").fetchone()
+        self._last_id = row[0] or 0
+
+    def publish(self, event: DomainEvent):
+        """Queue an event for the writer thread (never blocks)"""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="event-relay-writer", daemon=True)
+                    self._writer.start()
+        self._queue.put((self.origin, type(event).__name__, encode_event(event), time.time()))
+
+    def close(self, timeout: float = 5):
+        """Write the events still queued and stop the writer thread (call on shutdown)"""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout)
+
+    def _write_loop(self):
+        while True:
+            rows = [self._queue.get()]
+            while rows[-1] is not None:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = rows[-1] is None
+            rows = [row for row in rows if row is not None]
+            if rows:
+                try:
+                    self._write(rows)
+                except sqlite3.Error as e:
+                    print(f"Error relaying {len(rows)} events: {e}")
+            if stop:
+                return
+
+    def _write(self, rows: List[tuple]):
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO event_relay (origin, event_type, payload, created_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            if now >= self._next_cleanup:
+                self._next_cleanup = now + self.retention
+                conn.execute("DELETE FROM event_relay WHERE created_at < ?", (now - self.retention,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def fetch(self) -> List[DomainEvent]:
+        """Events from other processes since the last fetch"""
+        rows = self._connection().execute(
+            "SELECT id, origin, event_type, payload FROM event_relay WHERE id > ? ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+
+        events = []
+        for row_id, origin, event_type, payload in rows:
+            self._last_id = row_id
+            if origin == self.origin:
+                continue
+            event = decode_event(event_type, payload)
+            if event is not None:
+                events.append(event)
+        return events
+
+
+# ===== BUS =====
+
+Handler = Callable[[DomainEvent], object]
+
+
+class EventBus:
+    """Synchronous/async publish-subscribe for domain events"""
+
+    def __init__(self, relay: Optional[SQLiteEventRelay] = None, poll_interval: float = 0.5):
+        self.relay = relay
+        self.poll_interval = poll_interval
+        self._handlers: Dict[Type[DomainEvent], List[Handler]] = {}
+        self._tasks = set()  # Keeps scheduled async handlers alive until done
+        self._relay_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, event_type: Type[DomainEvent], handler: Handler):
+        """Call `handler(event)` for every `event_type` (or subclass) event"""
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def on(self, event_type: Type[DomainEvent]):
+        """Decorator form of subscribe()"""
+        def decorator(handler: Handler) -> Handler:
+            self.subscribe(event_type, handler)
+            return handler
+        return decorator
+
+    def _handlers_for(self, event: DomainEvent) -> List[Handler]:
+        handlers = []
+        for cls in type(event).__mro__:
+            handlers.extend(self._handlers.get(cls, ()))
+        return handlers
+
+    def _report(self, event: DomainEvent, handler: Handler, error: BaseException):
+        print(f"Error in {getattr(handler, '__name__', handler)} handling {type(event).__name__}: {error}")
+
+    def _dispatch(self, event: DomainEvent) -> List:
+        """Run sync handlers; return awaitables from async ones"""
+        pending = []
+        for handler in self._handlers_for(event):
+            try:
+                result = handler(event)
+            except Exception as e:
+                self._report(event, handler, e)
+                continue
+            if inspect.isawaitable(result):
+                pending.append((handler, result))
+        return pending
+
+    async def _await_handler(self, event: DomainEvent, handler: Handler, awaitable):
+        try:
+            await awaitable
+        except Exception as e:
+            self._report(event, handler, e)
+
+    def emit(self, event: DomainEvent):
+        """
+        Publish an event (call after commit)
+
+        Sync handlers run before this returns; async handlers are scheduled
+        on the running event loop.
+        """
+        pending = self._dispatch(event)
+        if pending:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            for handler, awaitable in pending:
+                if loop is None:
+                    # No loop (scripts/jobs): run the coroutine to completion here
+                    asyncio.run(self._await_handler(event, handler, awaitable))
+                else:
+                    task = loop.create_task(self._await_handler(event, handler, awaitable))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+        self._relay_publish(event)
+
+    async def emit_async(self, event: DomainEvent):
+        """Publish an event and wait for async handlers too"""
+        pending = self._dispatch(event)
+        await asyncio.gather(*(self._await_handler(event, h, a) for h, a in pending))
+        self._relay_publish(event)
+
+    def _relay_publish(self, event: DomainEvent):
+        if self.relay is not None:
+            self.relay.publish(event)
+
+    # ----- relay polling -----
+
+    def start_relay(self):
+        """Start receiving events from other processes (call on startup)"""
+        if self.relay is None or self._relay_task is not None:
+            return
+        self.relay.start_position()
+        self._relay_task = asyncio.get_running_loop().create_task(self._poll_relay())
+
+    async def stop_relay(self):
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            try:
+                await self._relay_task
+            except asyncio.CancelledError:
+                pass
+            self._relay_task = None
+        if self.relay is not None:
+            await run_in_threadpool(self.relay.close)
+
+    async def _poll_relay(self):
+        while True:
+            try:
+                events = await run_in_threadpool(self.relay.fetch)
+            except sqlite3.Error as e:
+                print(f"Error reading event relay: {e}")
+                events = []
+
+            for event in events:
+                # Deliver locally only: the emitting process already relayed it
+                for handler, awaitable in self._dispatch(event):
+                    await self._await_handler(event, handler, awaitable)
+
+            await asyncio.sleep(self.poll_interval)
+
+
+event_bus = EventBus(
+    relay=SQLiteEventRelay(
+        settings.EVENT_RELAY_PATH,
+        retention=settings.EVENT_RELAY_RETENTION
+    ) if settings.EVENT_RELAY_PATH else None,
+    poll_interval=settings.EVENT_RELAY_POLL_INTERVAL
+)
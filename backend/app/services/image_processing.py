@@ -0,0 +1,290 @@
+"""
+Profile picture processing pipeline
+
+Keeps image work off the event loop and bounds memory per upload:
+- the multipart body is parsed as it arrives and the file part is written
+  straight to a temp file, aborting as soon as the size limit is exceeded
+  (the body is never spooled by the form parser or held in memory)
+- decoding, resizing and encoding run in a process pool
+- JPEGs are decoded at reduced scale with Pillow's draft() mode
+- output files are written from a worker thread, atomically
+
+Each upload is stored as a set of WebP and JPEG variants named by the hash
+of the uploaded bytes (e.g. profile_pictures/<hash>-96.webp), so identical
+uploads share files and clients can pick the smallest size that fits
+(names and URLs are built by app.services.profile_pictures).
+"""
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.profile_pictures import FULL_VARIANT_SIZE, VARIANT_FORMATS, VARIANT_SIZES, variant_filename
+
+MAX_IMAGE_PIXELS = 40_000_000  # Reject absurd dimensions before decoding
+MULTIPART_OVERHEAD = 64 * 1024  # Boundaries, part headers and small form fields around the file
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+class FileTooLargeError(ValueError):
+    """Upload exceeded the allowed size"""
+
+
+class InvalidUploadError(ValueError):
+    """Body is not multipart/form-data or lacks the expected file field"""
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Process pool for image work, created on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS,
+            # spawn: forking a multi-threaded server process is unsafe
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_executor():
+    """Stop the process pool (call on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_in_process_pool(func, *args):
+    """Run a picklable function in the image process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+class _FilePartReader:
+    """MultipartParser callbacks that pick out the data of one file field"""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name.encode()
+        self.filename: Optional[str] = None
+        self.found = False
+        self.data: List[bytes] = []  # File data parsed since the caller last drained it
+        self._in_file = False
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        # Only the first matching file part is kept
+        self._in_file = not self.found and options.get(b"name") == self.field_name and b"filename" in options
+        if self._in_file:
+            self.found = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.data.append(data[start:end])
+
+    def on_part_end(self):
+        self._in_file = False
+
+
+async def stream_upload_to_tempfile(request: Request, field_name: str, max_size: int) -> Tuple[str, str, str]:
+    """
+    Parse a multipart body as it arrives, writing one file field to a temp file
+
+    Reads request.stream() directly instead of a form-parsed UploadFile, so
+    the limit applies while the body is still being received and the file
+    is written once.
+
+    Returns:
+        Tuple of (temp file path, SHA-256 hex digest of the content, client filename).
+        The caller must remove the temp file.
+
+    Raises:
+        FileTooLargeError: As soon as the file exceeds `max_size` bytes (or the
+            body exceeds it plus MULTIPART_OVERHEAD)
+        InvalidUploadError: Not a multipart body, or no `field_name` file in it
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data body")
+
+    reader = _FilePartReader(field_name)
+    parser = MultipartParser(boundary, reader.callbacks())
+    fd, path = tempfile.mkstemp(prefix="upload-")
+    digest = hashlib.sha256()
+    body_size = size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in request.stream():
+                body_size += len(chunk)
+                if body_size > max_size + MULTIPART_OVERHEAD:
+                    raise FileTooLargeError(f"File exceeds {max_size} bytes")
+                parser.write(chunk)
+                if not reader.data:
+                    continue
+                data = b"".join(reader.data)
+                reader.data.clear()
+                size += len(data)
+                if size > max_size:
+                    raise FileTooLargeError(f"File exceeds {max_size} bytes")
+                digest.update(data)
+                await run_in_threadpool(out.write, data)
+            parser.finalize()
+        if not reader.found:
+            raise InvalidUploadError(f"Missing file field '{field_name}'")
+    except MultipartParseError as e:
+        os.remove(path)
+        raise InvalidUploadError(f"Malformed multipart body: {e}")
+    except BaseException:
+        os.remove(path)
+        raise
+
+    return path, digest.hexdigest(), reader.filename
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """
+    Copy of a decoded image in RGB, whatever its mode (both encoders need it)
+
+    Transparency is flattened onto a white background and 16-bit greyscale
+    is scaled to 8 bits (a plain convert would clip it to white).
+    """
+    if image.mode == "RGB":
+        return image.copy()
+
+    if image.mode == "I" or image.mode.startswith("I;16"):
+        scaled = image.convert("I").point(lambda value: value / 256)
+        converted = scaled.convert("L").convert("RGB")
+        scaled.close()
+        return converted
+
+    if image.mode in ("RGBA", "LA", "PA", "P") or "transparency" in image.info:
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        rgba.close()
+        return background
+
+    # 1, L, CMYK, YCbCr, F, ...
+    return image.convert("RGB")
+
+
+def _encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _square_crop(image: Image.Image) -> Image.Image:
+    width, height = image.size
+    min_dim = min(width, height)
+    left = (width - min_dim) // 2
+    top = (height - min_dim) // 2
+    return image.crop((left, top, left + min_dim, top + min_dim))
+
+
+def generate_profile_picture_variants(source_path: str, key: str) -> Dict[str, bytes]:
+    """
+    Decode an upload once and encode every size/format variant (runs in the process pool)
+
+    Returns:
+        Mapping of variant filename -> encoded bytes
+    """
+    full_size = (FULL_VARIANT_SIZE, FULL_VARIANT_SIZE)
+
+    with Image.open(source_path) as source:
+        if source.width * source.height > MAX_IMAGE_PIXELS:
+            raise ValueError("Image dimensions too large")
+
+        # JPEG only: let libjpeg decode at 1/2, 1/4 or 1/8 scale (still >= full_size)
+        source.draft("RGB", full_size)
+        image = _to_rgb(source)
+
+    variants = {}
+    try:
+        # Largest variant keeps the aspect ratio
+        image.thumbnail(full_size, Image.Resampling.LANCZOS)
+        for format_key, (_, image_format, quality) in VARIANT_FORMATS.items():
+            variants[variant_filename(key, FULL_VARIANT_SIZE, format_key)] = _encode(image, image_format, quality)
+
+        # Avatar variants are square, each downscaled from the previous (larger) one
+        current = _square_crop(image)
+        for size in sorted((s for s in VARIANT_SIZES if s != FULL_VARIANT_SIZE), reverse=True):
+            resized = current.resize((size, size), Image.Resampling.LANCZOS)
+            current.close()
+            current = resized
+            for format_key, (_, image_format, quality) in VARIANT_FORMATS.items():
+                variants[variant_filename(key, size, format_key)] = _encode(current, image_format, quality)
+        current.close()
+    finally:
+        image.close()
+
+    return variants
+
+
+def _write_file_atomic(path: str, data: bytes):
+    # Unique temp name: concurrent uploads of the same content write the same path
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; a front proxy serving uploads must read it
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+async def write_file_async(path: str, data: bytes):
+    """Write a file from a worker thread without blocking the event loop"""
+    await run_in_threadpool(_write_file_atomic, path, data)
+
+
+async def remove_files_async(*paths: str):
+    """Delete files (ignoring missing ones) from a worker thread"""
+    def _remove():
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    await run_in_threadpool(_remove)
@@ -0,0 +1,107 @@
+"""
+Post and comment likes as single idempotent statements
+
+Liking is an INSERT ... ON CONFLICT DO NOTHING and unliking a
+DELETE, so repeating either (double clicks, client retries) changes
+nothing. The triggers in schema.sql keep the counters (for posts, as
+pending rows in post_counter_deltas; see app.services.post_counters);
+each statement reports the new count through RETURNING.
+
+SQLite's RETURNING does not see changes made by triggers, so it reads
+the count as it was before the statement's own trigger ran and
+adds/subtracts one. That is exact: the statement and its trigger run
+atomically and writers are serialized by the database lock.
+
+Each add_*/remove_* function returns the new like_count when the like was
+actually added/removed, or None when it was already in that state (or the
+target does not exist); the *_like_count functions read the current count.
+"""
+import uuid
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.post_counters import post_counts
+
+ADD_POST_LIKE_SQL = text("""
+    INSERT INTO post_likes (id, user_id, post_id)
+    SELECT :like_id, :user_id, id FROM posts WHERE id = :post_id
+    ON CONFLICT(user_id, post_id) DO NOTHING
+    RETURNING (SELECT like_count FROM posts WHERE posts.id = post_likes.post_id)
+        + (SELECT COALESCE(SUM(like_delta), 0) FROM post_counter_deltas d WHERE d.post_id = post_likes.post_id)
+        + 1
+""")
+
+REMOVE_POST_LIKE_SQL = text("""
+    DELETE FROM post_likes
+    WHERE user_id = :user_id AND post_id = :post_id
+    RETURNING (SELECT like_count FROM posts WHERE posts.id = post_likes.post_id)
+        + (SELECT COALESCE(SUM(like_delta), 0) FROM post_counter_deltas d WHERE d.post_id = post_likes.post_id)
+        - 1
+""")
+
+ADD_COMMENT_LIKE_SQL = text("""
+    INSERT INTO comment_likes (id, user_id, comment_id)
+    SELECT :like_id, :user_id, id FROM comments WHERE id = :comment_id AND post_id = :post_id
+    ON CONFLICT(user_id, comment_id) DO NOTHING
+    RETURNING (SELECT like_count FROM comments WHERE comments.id = comment_likes.comment_id) + 1
+""")
+
+REMOVE_COMMENT_LIKE_SQL = text("""
+    DELETE FROM comment_likes
+    WHERE user_id = :user_id AND comment_id = :comment_id
+      AND comment_id IN (SELECT id FROM comments WHERE post_id = :post_id)
+    RETURNING (SELECT like_count FROM comments WHERE comments.id = comment_likes.comment_id) - 1
+""")
+
+
+def add_post_like(db: Session, post_id: str, user_id: str) -> Optional[int]:
+    like_count = db.execute(ADD_POST_LIKE_SQL, {
+        "like_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "post_id": post_id
+    }).scalar()
+    db.commit()
+    return like_count
+
+
+def remove_post_like(db: Session, post_id: str, user_id: str) -> Optional[int]:
+    like_count = db.execute(REMOVE_POST_LIKE_SQL, {"user_id": user_id, "post_id": post_id}).scalar()
+    db.commit()
+    return like_count
+
+
+def post_like_count(db: Session, post_id: str) -> Optional[int]:
+    """Current like_count, or None if there is no such post"""
+    counts = post_counts(db, post_id)
+    return None if counts is None else counts[0]
+
+
+def add_comment_like(db: Session, post_id: str, comment_id: str, user_id: str) -> Optional[int]:
+    like_count = db.execute(ADD_COMMENT_LIKE_SQL, {
+        "like_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "comment_id": comment_id,
+        "post_id": post_id
+    }).scalar()
+    db.commit()
+    return like_count
+
+
+def remove_comment_like(db: Session, post_id: str, comment_id: str, user_id: str) -> Optional[int]:
+    like_count = db.execute(REMOVE_COMMENT_LIKE_SQL, {
+        "user_id": user_id,
+        "comment_id": comment_id,
+        "post_id": post_id
+    }).scalar()
+    db.commit()
+    return like_count
+
+
+def comment_like_count(db: Session, post_id: str, comment_id: str) -> Optional[int]:
+    """Current like_count, or None if there is no such comment on the post"""
+    return db.execute(
+        text("SELECT like_count FROM comments WHERE id = :comment_id AND post_id = :post_id"),
+        {"comment_id": comment_id, "post_id": post_id}
+    ).scalar()
@@ -0,0 +1,247 @@
+"""
+People search over the users_search trigram index
+
+users_search (schema.sql) holds the names (full and display name) of
+discoverable users, kept in sync by triggers on users. Trigram tokens make
+a name query a substring lookup in the index; location and birth date
+filters are applied through indexes on users joined by rowid.
+
+A search runs in two passes: words as typed (prefix/substring), then, if
+that found too few people, one-typo variants of each word (a deleted,
+swapped or replaced letter). Candidates from either pass are re-scored
+here so word-prefix matches rank above substring and typo matches.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import literal_column, text
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.services.birthdays import DEFAULT_WINDOW_DAYS, MODE_DAY, MODE_EXACT, month_day_key, window_keys
+
+MIN_INDEXED_LENGTH = 3  # Shortest substring the trigram index can look up
+MIN_TYPO_LENGTH = 4  # Shorter words must match as typed
+MAX_QUERY_TERMS = 5
+
+# Candidates read from the index per pass before re-scoring
+EXACT_CANDIDATES = 100
+FUZZY_CANDIDATES = 200
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class PeopleFilters:
+    """Optional exact-value filters (location compared case-insensitively)"""
+    city: Optional[str] = None
+    region: Optional[str] = None
+    country: Optional[str] = None
+    birth_date: Optional[date] = None
+    birthday_mode: str = MODE_EXACT  # See app.services.birthdays
+    window_days: int = DEFAULT_WINDOW_DAYS
+
+    def sql(self) -> Tuple[str, dict]:
+        """WHERE conditions on users u, and their parameters"""
+        # Unary + keeps SQLite from picking the (unselective) is_discoverable index
+        conditions = ["+u.is_discoverable = 1"]
+        params = {}
+        for column in ("city", "region", "country"):
+            value = getattr(self, column)
+            if value:
+                conditions.append(f"u.{column} = :{column} COLLATE NOCASE")
+                params[column] = value.strip()
+        if self.birth_date and self.birthday_mode == MODE_EXACT:
+            conditions.append("u.birth_date = :birth_date")
+            params["birth_date"] = self.birth_date.isoformat()
+        elif self.birth_date and self.birthday_mode == MODE_DAY:
+            conditions.append("u.birth_md = :birth_md")
+            params["birth_md"] = month_day_key(self.birth_date)
+        elif self.birth_date:
+            keys = window_keys(self.birth_date, self.window_days)
+            conditions.append(f"u.birth_md IN ({', '.join(str(key) for key in keys)})")
+        return " AND ".join(conditions), params
+
+    def __bool__(self) -> bool:
+        return any((self.city, self.region, self.country, self.birth_date))
+
+
+def _phrase(value: str) -> str:
+    """FTS5 string literal (matches `value` as a substring)"""
+    return '"' + value.replace('"', '""') + '"'
+
+
+def query_terms(query: Optional[str]) -> List[str]:
+    """Lower-cased words of a search query"""
+    return [term.lower() for term in TERM_PATTERN.findall(query or "")][:MAX_QUERY_TERMS]
+
+
+def typo_variants(term: str) -> List[str]:
+    """
+    FTS5 expressions matching words within one edit of `term`
+
+    Deleting or swapping a letter gives a substring to look up; a replaced
+    letter splits the word into the parts before and after it. Parts too
+    short for the trigram index are left out, so these only narrow the
+    candidates and the real distance is checked afterwards.
+    """
+    variants = set()
+    for i in range(len(term)):
+        deleted = term[:i] + term[i + 1:]
+        if len(deleted) >= MIN_INDEXED_LENGTH:
+            variants.add(_phrase(deleted))
+
+        if i + 1 < len(term):
+            swapped = term[:i] + term[i + 1] + term[i] + term[i + 2:]
+            variants.add(_phrase(swapped))
+
+        parts = [part for part in (term[:i], term[i + 1:]) if len(part) >= MIN_INDEXED_LENGTH]
+        if parts:
+            variants.add(" AND ".join(_phrase(part) for part in parts))
+
+    return sorted(f"({variant})" for variant in variants)
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insert, delete, replace or adjacent swap"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+
+    i = 0
+    while i < len(a) and i < len(b) and a[i] == b[i]:
+        i += 1
+    if i == len(a) or i == len(b):
+        return True  # Equal, or one trailing extra letter
+
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (
+            a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    if len(a) > len(b):
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
+
+
+def term_score(term: str, words: List[str]) -> Optional[int]:
+    """
+    How well one query word matches a name: 0 word prefix, 1 substring,
+    2 one typo (compared with the word and its prefixes, as the user may
+    still be typing); None if it does not match
+    """
+    if any(word.startswith(term) for word in words):
+        return 0
+    if len(term) >= MIN_INDEXED_LENGTH and any(term in word for word in words):
+        return 1
+    if len(term) < MIN_TYPO_LENGTH:
+        return None
+
+    for word in words:
+        if within_one_edit(term, word):
+            return 2
+        for n in (len(term) - 1, len(term), len(term) + 1):
+            if n < len(word) and within_one_edit(term, word[:n]):
+                return 2
+    return None
+
+
+def name_score(terms: List[str], name: str) -> Optional[int]:
+    """Sum of term scores, or None if any query word does not match"""
+    words = TERM_PATTERN.findall(name.lower())
+    total = 0
+    for term in terms:
+        score = term_score(term, words)
+        if score is None:
+            return None
+        total += score
+    return total
+
+
+def _name_candidates(db: Session, match: str, filters: PeopleFilters, limit: int) -> List[Tuple[int, str]]:
+    # CROSS JOIN keeps the full-text match as the outer loop; users rows are
+    # then looked up by rowid only to check the filters
+    conditions, params = filters.sql()
+    rows = db.execute(text(f"""
+        SELECT s.rowid, s.name
+        FROM users_search s
+        CROSS JOIN users u ON u.rowid = s.rowid
+        WHERE users_search MATCH :match AND {conditions}
+        LIMIT :limit
+    """), {"match": match, "limit": limit, **params}).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def _filter_candidates(db: Session, filters: PeopleFilters, limit: int) -> List[Tuple[int, str]]:
+    conditions, params = filters.sql()
+    rows = db.execute(text(f"""
+        SELECT u.rowid, u.full_name || ' ' || COALESCE(u.display_name, '')
+        FROM users u
+        WHERE {conditions}
+        LIMIT :limit
+    """), {"limit": limit, **params}).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def search_people(
+    db: Session,
+    query: Optional[str],
+    filters: PeopleFilters,
+    limit: int = 20,
+    exclude_user_id: Optional[str] = None
+) -> List[User]:
+    """
+    Discoverable users matching a name query and/or filters, best first
+
+    Args:
+        query: free text matched against full and display names (may be
+            empty if filters are given)
+        exclude_user_id: leave this user out (the searcher)
+
+    Returns:
+        Up to `limit` users
+    """
+    terms = query_terms(query)
+    indexed_terms = [term for term in terms if len(term) >= MIN_INDEXED_LENGTH]
+    if not indexed_terms and not filters:
+        return []
+
+    # One spare result in case the searcher is among them
+    wanted = limit + 1 if exclude_user_id else limit
+    scores: Dict[int, Tuple[int, str]] = {}
+
+    def collect(candidates: List[Tuple[int, str]]):
+        for rowid, name in candidates:
+            if rowid in scores:
+                continue
+            score = name_score(terms, name)
+            if score is not None:
+                scores[rowid] = (score, name.lower())
+
+    if indexed_terms:
+        exact = " AND ".join(f"name : {_phrase(term)}" for term in indexed_terms)
+        collect(_name_candidates(db, exact, filters, EXACT_CANDIDATES))
+    else:
+        # Filters only (plus words too short for the index, checked by name_score)
+        collect(_filter_candidates(db, filters, EXACT_CANDIDATES))
+
+    if len(scores) < wanted and any(len(term) >= MIN_TYPO_LENGTH for term in indexed_terms):
+        fuzzy = " AND ".join(
+            f"name : ({' OR '.join(typo_variants(term))})" if len(term) >= MIN_TYPO_LENGTH
+            else f"name : {_phrase(term)}"
+            for term in indexed_terms
+        )
+        collect(_name_candidates(db, fuzzy, filters, FUZZY_CANDIDATES))
+
+    ranked = sorted(scores, key=lambda rowid: scores[rowid])[:wanted]
+    if not ranked:
+        return []
+
+    user_rowid = literal_column("users.rowid")
+    users_by_rowid = {
+        rowid: user
+        for user, rowid in db.query(User, user_rowid).filter(user_rowid.in_(ranked)).all()
+    }
+
+    results = [users_by_rowid[rowid] for rowid in ranked if rowid in users_by_rowid]
+    return [user for user in results if user.id != exclude_user_id][:limit]
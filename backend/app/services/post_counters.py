@@ -0,0 +1,147 @@
+"""
+Buffered post counters
+
+Likes and comments no longer update posts.like_count / comment_count
+directly: their triggers append a row to post_counter_deltas, so writers
+to a viral post do not each rewrite its row (and fire the posts timestamp
+and feed change triggers). The deltas are folded into posts periodically,
+one UPDATE per changed post, and every read adds the still-pending deltas
+so counts are always exact.
+
+Folds run on their own connection (never a request's session, which shares
+the single pooled connection and its transaction with every request) and
+only consume the deltas that existed when they started.
+
+Usage (from the backend directory):
+    python -m app.services.post_counters   # fold pending deltas once
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import background_session
+
+# Folded (posts) count plus the pending deltas, for one post
+COUNTS_SQL = text("""
+    SELECT
+        p.like_count + COALESCE((SELECT SUM(like_delta) FROM post_counter_deltas WHERE post_id = p.id), 0),
+        p.comment_count + COALESCE((SELECT SUM(comment_delta) FROM post_counter_deltas WHERE post_id = p.id), 0)
+    FROM posts p WHERE p.id = :post_id
+""")
+
+# Only deltas up to :max_id are folded, and only those are deleted: rows
+# appended meanwhile stay pending for the next fold
+FOLD_SQL = text("""
+    UPDATE posts
+    SET like_count = like_count + d.likes, comment_count = comment_count + d.comments
+    FROM (
+        SELECT post_id, SUM(like_delta) AS likes, SUM(comment_delta) AS comments
+        FROM post_counter_deltas WHERE id <= :max_id GROUP BY post_id
+        HAVING likes != 0 OR comments != 0
+    ) AS d
+    WHERE posts.id = d.post_id
+""")
+
+
+def pending_counts(db: Session, post_ids: List[str]) -> Dict[str, Tuple[int, int]]:
+    """Not yet folded (like, comment) deltas of the given posts; posts without any are left out"""
+    if not post_ids:
+        return {}
+    params = {f"id{i}": post_id for i, post_id in enumerate(post_ids)}
+    rows = db.execute(text(f"""
+        SELECT post_id, SUM(like_delta), SUM(comment_delta) FROM post_counter_deltas
+        WHERE post_id IN ({', '.join(':' + name for name in params)})
+        GROUP BY post_id
+    """), params)
+    return {post_id: (likes, comments) for post_id, likes, comments in rows}
+
+
+def apply_pending_counts(db: Session, responses: list) -> list:
+    """Add pending deltas to the like_count/comment_count of post responses (one query)"""
+    pending = pending_counts(db, [response.id for response in responses])
+    for response in responses:
+        likes, comments = pending.get(response.id, (0, 0))
+        response.like_count += likes
+        response.comment_count += comments
+    return responses
+
+
+def post_counts(db: Session, post_id: str) -> Optional[Tuple[int, int]]:
+    """Exact (like_count, comment_count) of a post, or None if there is no such post"""
+    row = db.execute(COUNTS_SQL, {"post_id": post_id}).first()
+    return None if row is None else (row[0], row[1])
+
+
+def fold(db: Session) -> int:
+    """
+    Move the pending deltas into posts, in one transaction
+
+    `db` must be a session of its own (see fold_pending), not a request's.
+
+    Returns:
+        Number of posts updated
+    """
+    max_id = db.execute(text("SELECT MAX(id) FROM post_counter_deltas")).scalar()
+    if max_id is None:
+        db.commit()
+        return 0
+    updated = db.execute(FOLD_SQL, {"max_id": max_id}).rowcount
+    db.execute(text("DELETE FROM post_counter_deltas WHERE id <= :max_id"), {"max_id": max_id})
+    db.commit()
+    return updated
+
+
+def fold_pending() -> int:
+    """One fold on its own connection, holding the write lock from the first read to the commit"""
+    db = background_session(immediate=True)
+    try:
+        return fold(db)
+    finally:
+        db.close()
+
+
+# ----- periodic folding inside the app -----
+
+_fold_task: Optional[asyncio.Task] = None
+
+
+async def _fold_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(fold_pending)
+        except Exception as e:
+            print(f"Error folding post counters: {e}")
+
+
+def start_folder():
+    """Start the periodic fold (call on startup; no-op when the interval is 0)"""
+    global _fold_task
+    interval = settings.POST_COUNTER_FOLD_INTERVAL
+    if interval <= 0 or _fold_task is not None:
+        return
+    _fold_task = asyncio.get_running_loop().create_task(_fold_periodically(interval))
+
+
+async def stop_folder():
+    global _fold_task
+    if _fold_task is not None:
+        _fold_task.cancel()
+        try:
+            await _fold_task
+        except asyncio.CancelledError:
+            pass
+        _fold_task = None
+
+
+def main():
+    updated = fold_pending()
+    print(f"Folded pending counter deltas into {updated} posts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Profile picture variant names and URLs
+
+Pure string logic shared by the image pipeline (app.services.image_processing),
+the uploads server and the response schemas, kept free of Pillow and the
+process pool so those can import it cheaply.
+"""
+import os
+import re
+from typing import Dict, List, Optional
+
+# Variant pixel sizes: square crops for avatars, plus the largest one which
+# keeps the aspect ratio (fits in 800x800) and is the canonical profile_picture_url
+VARIANT_SIZES = (48, 96, 150, 800)
+FULL_VARIANT_SIZE = 800
+
+# format key -> (file extension, Pillow format, quality)
+VARIANT_FORMATS = {
+    "webp": ("webp", "WEBP", 80),
+    "jpeg": ("jpg", "JPEG", 85),
+}
+
+URL_PREFIX = "profile_pictures"
+CONTENT_KEY_LENGTH = 24  # hex chars of the SHA-256 of the uploaded bytes
+CANONICAL_NAME = re.compile(rf"^([0-9a-f]{{{CONTENT_KEY_LENGTH}}})-{FULL_VARIANT_SIZE}\.jpg$")
+
+
+def content_key(digest: str) -> str:
+    """Short content-address used in variant filenames"""
+    return digest[:CONTENT_KEY_LENGTH]
+
+
+def variant_filename(key: str, size: int, format_key: str) -> str:
+    """e.g. 3f2a...-96.webp"""
+    return f"{key}-{size}.{VARIANT_FORMATS[format_key][0]}"
+
+
+def variant_filenames(key: str) -> List[str]:
+    """Every file generated for one upload"""
+    return [
+        variant_filename(key, size, format_key)
+        for size in VARIANT_SIZES
+        for format_key in VARIANT_FORMATS
+    ]
+
+
+def canonical_url(key: str) -> str:
+    """Value stored in users.profile_picture_url (largest JPEG variant)"""
+    return f"{URL_PREFIX}/{variant_filename(key, FULL_VARIANT_SIZE, 'jpeg')}"
+
+
+def parse_content_key(profile_picture_url: Optional[str]) -> Optional[str]:
+    """Content key of a variant-style URL, or None for legacy single-file uploads"""
+    if not profile_picture_url:
+        return None
+    match = CANONICAL_NAME.match(os.path.basename(profile_picture_url))
+    return match.group(1) if match else None
+
+
+def profile_picture_variant_urls(profile_picture_url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    Variant URLs for a stored profile picture
+
+    Returns:
+        {"webp": {"48": url, "96": url, ...}, "jpeg": {...}} or None
+        when the picture predates variants
+    """
+    key = parse_content_key(profile_picture_url)
+    if key is None:
+        return None
+
+    return {
+        format_key: {
+            str(size): f"{URL_PREFIX}/{variant_filename(key, size, format_key)}"
+            for size in VARIANT_SIZES
+        }
+        for format_key in VARIANT_FORMATS
+    }
@@ -0,0 +1,125 @@
+"""
+Public profile cache
+
+/api/users/public/{user_id} is unauthenticated and shared as a link, so
+the slow-changing part of the response (the user and their latest public
+posts) is kept here per user and dropped when an event says it changed:
+profile edits, the user's posts being created, edited or deleted, and
+likes or comments on the posts it shows. Stats come from maintained
+counters instead (users.post_count, birth_date_counts, the friend graph),
+so a cached hit costs a single query. That query also re-reads
+is_discoverable, so a profile made private stops being served at once.
+
+Each worker keeps its own cache; with EVENT_RELAY_PATH set, events from
+other workers invalidate it too. Without the relay a change made through
+another worker only shows once the entry expires, so entries live at most
+PUBLIC_PROFILE_CACHE_TTL seconds either way.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.event_bus import (
+    EventBus, ProfileUpdated, PostCreated, PostUpdated, PostDeleted, PostLiked, PostUnliked,
+    CommentCreated, CommentDeleted
+)
+
+MAX_CACHED_PROFILES = 10_000
+
+# Counters for the stats block; twin counts are for the exact birth date and
+# include the (discoverable) user themselves
+PROFILE_STATS_SQL = text("""
+    SELECT u.post_count, COALESCE(b.user_count, 0), u.is_discoverable
+    FROM users u LEFT JOIN birth_date_counts b ON b.birth_date = u.birth_date
+    WHERE u.id = :user_id
+""")
+
+
+class PublicProfileCache:
+    """Profile documents ({"user": ..., "posts": [...]}) by user ID, least recently used dropped first"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_PROFILES, ttl: float = settings.PUBLIC_PROFILE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._documents: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()  # user -> (expires at, document)
+        self._post_owners: Dict[str, str] = {}  # Post shown in a cached document -> its user
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._documents.get(user_id)
+            if entry is None:
+                return None
+            expires_at, document = entry
+            if time.monotonic() >= expires_at:
+                self._forget(user_id)
+                return None
+            self._documents.move_to_end(user_id)
+            return document
+
+    def put(self, user_id: str, document: dict):
+        with self._lock:
+            self._forget(user_id)
+            self._documents[user_id] = (time.monotonic() + self.ttl, document)
+            for post in document["posts"]:
+                self._post_owners[post["id"]] = user_id
+            while len(self._documents) > self.max_entries:
+                self._forget(next(iter(self._documents)))
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._forget(user_id)
+
+    def invalidate_post(self, post_id: str):
+        """Drop the document showing `post_id`, if any"""
+        with self._lock:
+            user_id = self._post_owners.get(post_id)
+            if user_id is not None:
+                self._forget(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._post_owners.clear()
+
+    def _forget(self, user_id: str):
+        entry = self._documents.pop(user_id, None)
+        if entry is not None:
+            for post in entry[1]["posts"]:
+                self._post_owners.pop(post["id"], None)
+
+
+public_profile_cache = PublicProfileCache()
+
+
+def profile_stats(db: Session, user_id: str) -> Optional[tuple]:
+    """(post count, exact birth date count, is discoverable) of a user, or None if there is no such user"""
+    row = db.execute(PROFILE_STATS_SQL, {"user_id": user_id}).first()
+    return None if row is None else (row[0], row[1], bool(row[2]))
+
+
+def on_profile_updated(event: ProfileUpdated):
+    public_profile_cache.invalidate(event.user_id)
+
+
+def on_post_changed(event):
+    # New posts are not in any document yet: drop their author's
+    public_profile_cache.invalidate(event.author_id)
+
+
+def on_post_counts_changed(event):
+    public_profile_cache.invalidate_post(event.post_id)
+
+
+def register(bus: EventBus):
+    """Drop cached profiles when their contents change"""
+    bus.subscribe(ProfileUpdated, on_profile_updated)
+    for event_type in (PostCreated, PostUpdated, PostDeleted):
+        bus.subscribe(event_type, on_post_changed)
+    for event_type in (PostLiked, PostUnliked, CommentCreated, CommentDeleted):
+        bus.subscribe(event_type, on_post_counts_changed)
@@ -0,0 +1,222 @@
+"""
+In-process publish/subscribe for server-pushed events
+
+Domain event handlers (app.services.realtime) publish small events (new
+message, unread count, like/comment counts); every open event stream of
+the target user receives them right away. Post events (like/comment counts)
+go only to the streams that watch the post: a stream names the posts it
+shows when it opens, after checking the user may see them. Events carry an id, and the last
+events are kept in a ring buffer so a reconnecting client can resume from
+its Last-Event-ID without missing anything.
+
+The broker itself is per process; events reach streams held by other
+workers through the event bus relay (see app.services.realtime).
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, FrozenSet, Iterable, Optional, Set
+
+from app.core.config import settings
+
+# Sent when a client must reload instead of resuming (events were lost)
+RESYNC_EVENT = "resync"
+
+
+@dataclass(frozen=True)
+class Event:
+    """One pushed event, for a user's streams, the streams watching a post, or (neither set) every stream"""
+    id: str
+    sequence: int
+    type: str
+    data: dict
+    user_id: Optional[str] = None
+    post_id: Optional[str] = None
+
+    def is_for(self, user_id: str, post_ids: FrozenSet[str]) -> bool:
+        if self.post_id is not None:
+            return self.post_id in post_ids
+        return self.user_id in (None, user_id)
+
+    def encode(self) -> str:
+        """Server-Sent Events wire format"""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    """Queue of events for one open stream"""
+
+    def __init__(self, broker: "EventBroker", user_id: str, queue_size: int, post_ids: FrozenSet[str] = frozenset()):
+        self.broker = broker
+        self.user_id = user_id
+        self.post_ids = post_ids  # Posts whose like/comment events this stream receives
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def deliver(self, event: Event):
+        """Queue an event (event loop thread only)"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: drop the backlog and tell it to reload instead
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """Next event, or None if nothing arrived within `timeout` seconds"""
+        if self.overflowed:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = False
+            return self.broker.resync_event(self.user_id)
+
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """
+    Routes published events to subscriptions
+
+    Event ids are "<epoch>-<sequence>": the epoch changes on every restart,
+    so a Last-Event-ID from a previous process is recognised and answered
+    with a resync event rather than a wrong replay.
+    """
+
+    def __init__(self, history_size: int = 1000, queue_size: int = 100):
+        self.epoch = format(int(time.time() * 1000), "x")
+        self.queue_size = queue_size
+        self._sequence = itertools.count(1)
+        self._last_sequence = 0
+        self._history: Deque[Event] = deque(maxlen=history_size)
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._watchers: Dict[str, Set[Subscription]] = {}  # Post ID -> subscriptions watching it
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def _next_event(self, event_type: str, data: dict, user_id: Optional[str], post_id: Optional[str]) -> Event:
+        with self._lock:
+            sequence = next(self._sequence)
+            self._last_sequence = sequence
+            event = Event(f"{self.epoch}-{sequence}", sequence, event_type, data, user_id, post_id)
+            self._history.append(event)
+        return event
+
+    def resync_event(self, user_id: str) -> Event:
+        """Resync marker carrying the current position (not stored in history)"""
+        sequence = self._last_sequence
+        return Event(f"{self.epoch}-{sequence}", sequence, RESYNC_EVENT, {}, user_id)
+
+    def subscribe(
+        self,
+        user_id: str,
+        last_event_id: Optional[str] = None,
+        post_ids: Iterable[str] = ()
+    ) -> Subscription:
+        """
+        Open a subscription (call from the event loop)
+
+        `post_ids` are the posts whose events the stream receives; the caller
+        must have checked that the user can see them. With `last_event_id`,
+        events the client missed are queued first; if they are no longer in
+        the history a resync event is queued.
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self, user_id, self.queue_size, frozenset(post_ids))
+
+        if last_event_id:
+            for event in self._replay(subscription, last_event_id):
+                subscription.deliver(event)
+
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        for post_id in subscription.post_ids:
+            self._watchers.setdefault(post_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._discard(self._subscribers, subscription.user_id, subscription)
+        for post_id in subscription.post_ids:
+            self._discard(self._watchers, post_id, subscription)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[Subscription]], key: str, subscription: Subscription):
+        subs = index.get(key)
+        if subs is not None:
+            subs.discard(subscription)
+            if not subs:
+                del index[key]
+
+    def _replay(self, subscription: Subscription, last_event_id: str) -> Iterable[Event]:
+        epoch, _, sequence = last_event_id.partition("-")
+        try:
+            last_sequence = int(sequence)
+        except ValueError:
+            return [self.resync_event(subscription.user_id)]
+
+        with self._lock:
+            history = list(self._history)
+
+        # Different process, or events evicted from the ring buffer since
+        if epoch != self.epoch or last_sequence > self._last_sequence:
+            return [self.resync_event(subscription.user_id)]
+        if history and history[0].sequence > last_sequence + 1:
+            return [self.resync_event(subscription.user_id)]
+
+        return [
+            event for event in history
+            if event.sequence > last_sequence and event.is_for(subscription.user_id, subscription.post_ids)
+        ]
+
+    def publish(self, event_type: str, data: dict, user_id: Optional[str] = None, post_id: Optional[str] = None):
+        """
+        Publish an event to one user's streams, to the streams watching
+        `post_id`, or to everyone if neither is given
+
+        Safe to call from worker threads: delivery is handed to the event loop.
+        """
+        event = self._next_event(event_type, data, user_id, post_id)
+        loop = self._loop
+        if loop is None:
+            return  # Nobody has subscribed yet (history still records the event)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            self._dispatch(event)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._dispatch, event)
+
+    def publish_to_users(self, event_type: str, data: dict, user_ids: Iterable[str]):
+        for user_id in set(user_ids):
+            self.publish(event_type, data, user_id)
+
+    def _dispatch(self, event: Event):
+        if event.post_id is not None:
+            targets = list(self._watchers.get(event.post_id, ()))
+        elif event.user_id is not None:
+            targets = list(self._subscribers.get(event.user_id, ()))
+        else:
+            targets = [sub for subs in self._subscribers.values() for sub in subs]
+
+        for subscription in targets:
+            subscription.deliver(event)
+
+
+broker = EventBroker(
+    history_size=settings.EVENT_STREAM_HISTORY_SIZE,
+    queue_size=settings.EVENT_STREAM_QUEUE_SIZE
+)
@@ -0,0 +1,215 @@
+"""
+Rate limiting service
+
+Limits use GCRA (generic cell rate algorithm): each key stores a single
+"theoretical arrival time", so every check is O(1) in time and space.
+State lives in a small SQLite database shared by all worker processes, so
+limits hold across workers and survive restarts. Drained buckets are
+deleted periodically so the store does not grow without bound.
+
+A check can wait up to 5 seconds for the store's write lock, so it must not
+run on the event loop: the route dependencies below are plain functions,
+which FastAPI runs in its threadpool.
+"""
+import math
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.core.config import settings
+
+PERIOD_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+# "count/time_window", e.g. "5/minute", "10/5minutes", "3/hour"
+RATE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A parsed rate limit such as 10/5minutes"""
+    count: int
+    period: float  # seconds
+    description: str
+
+    @property
+    def emission_interval(self) -> float:
+        """Seconds between requests at the sustained rate"""
+        return self.period / self.count
+
+    @property
+    def burst_tolerance(self) -> float:
+        """How far ahead of schedule a key may get (allows `count` requests in a burst)"""
+        return self.period - self.emission_interval
+
+    @classmethod
+    def parse(cls, rate: str) -> "RateLimit":
+        """Parse the "count/time_window" format used in settings"""
+        match = RATE_PATTERN.match(rate.lower())
+        if not match:
+            raise ValueError(f"Invalid rate limit format: {rate!r}")
+
+        count = int(match.group(1))
+        multiplier = int(match.group(2) or 1)
+        unit = match.group(3)
+        if count < 1 or multiplier < 1:
+            raise ValueError(f"Invalid rate limit format: {rate!r}")
+
+        window = f"{multiplier} {unit}s" if multiplier > 1 else unit
+        return cls(
+            count=count,
+            period=float(multiplier * PERIOD_SECONDS[unit]),
+            description=f"{count} per {window}"
+        )
+
+
+class SQLiteRateLimitStore:
+    """
+    GCRA state shared across processes through one SQLite file
+
+    Each key maps to its theoretical arrival time (TAT). A key whose TAT is
+    in the past is equivalent to a missing key, which is what makes periodic
+    expiry safe.
+    """
+
+    def __init__(self, path: str, cleanup_interval: float = 300):
+        self.path = path
+        self.cleanup_interval = cleanup_interval
+        self._local = threading.local()
+        self._next_cleanup = 0.0
+        self._connection()  # Create the table up front
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, "
+                "tat REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limits_tat ON rate_limits(tat)")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        """
+        Record a request for `key`
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds)
+        """
+        conn = self._connection()
+        now = time.time()
+
+        # BEGIN IMMEDIATE takes the write lock, so read-modify-write is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0], now) if row else now
+
+            if tat - now > limit.burst_tolerance:
+                conn.execute("COMMIT")
+                return False, tat - now - limit.burst_tolerance
+
+            conn.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, tat + limit.emission_interval)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if now >= self._next_cleanup:
+            self.expire(now)
+
+        return True, 0.0
+
+    def expire(self, now: float = None):
+        """Delete drained buckets (TAT in the past)"""
+        now = time.time() if now is None else now
+        self._next_cleanup = now + self.cleanup_interval
+        self._connection().execute("DELETE FROM rate_limits WHERE tat < ?", (now,))
+
+    def reset(self):
+        """Clear all limits"""
+        self._connection().execute("DELETE FROM rate_limits")
+
+
+class RateLimiter:
+    """Checks requests against limits and raises 429 when exceeded"""
+
+    def __init__(self, store: SQLiteRateLimitStore):
+        self.store = store
+
+    def check(self, key: str, limit: RateLimit):
+        """Count a request for `key`, raising HTTP 429 if it is over the limit"""
+        allowed, retry_after = self.store.hit(key, limit)
+        if not allowed:
+            retry_after = max(1, math.ceil(retry_after))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded: {limit.description}. Try again in {retry_after} seconds.",
+                headers={"Retry-After": str(retry_after)}
+            )
+
+
+rate_limiter = RateLimiter(
+    SQLiteRateLimitStore(
+        settings.RATE_LIMIT_STORAGE_PATH,
+        cleanup_interval=settings.RATE_LIMIT_CLEANUP_INTERVAL
+    )
+)
+
+
+def get_client_ip(request: Request) -> str:
+    """Client address used as the key for unauthenticated routes"""
+    return request.client.host if request.client else "127.0.0.1"
+
+
+def ip_rate_limit(scope: str, rate: str):
+    """
+    Dependency factory: limit a route per client IP
+
+    Usage: @router.post("/login", dependencies=[Depends(ip_rate_limit("login", settings.RATE_LIMIT_LOGIN))])
+    """
+    limit = RateLimit.parse(rate)
+
+    def dependency(request: Request):
+        rate_limiter.check(f"{scope}:ip:{get_client_ip(request)}", limit)
+
+    return dependency
+
+
+def user_rate_limit(scope: str, rate: str):
+    """
+    Dependency factory: limit an authenticated route per user
+
+    The current user dependency is cached per request, so this does not add
+    a second user lookup to routes that also depend on get_current_user.
+    """
+    # Imported here because app.api.auth itself uses ip_rate_limit
+    from app.api.auth import get_current_user
+    from app.models.user import User
+
+    limit = RateLimit.parse(rate)
+
+    def dependency(current_user: User = Depends(get_current_user)):
+        rate_limiter.check(f"{scope}:user:{current_user.id}", limit)
+
+    return dependency
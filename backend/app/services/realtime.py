@@ -0,0 +1,65 @@
+"""
+Realtime delivery of domain events
+
+Subscribes the event stream broker (SSE) and the chat connection manager
+(WebSocket) to domain events, so routers only emit events and never talk
+to the transports directly. Relayed events from other workers arrive
+here too, which is how a user connected to another worker is notified.
+"""
+from app.services.chat import chat_manager
+from app.services.event_bus import (
+    EventBus, MessageSent, MessagesRead, PostLiked, PostUnliked,
+    CommentCreated, CommentDeleted
+)
+from app.services.pubsub import broker
+
+
+def on_message_sent(event: MessageSent):
+    parties = [event.recipient_id, event.sender_id]
+    # The sending socket gets its own "sent" reply instead
+    chat_manager.send_to_users(
+        parties, {"type": "message", "message": event.message},
+        exclude_id=event.origin_connection_id
+    )
+    broker.publish_to_users("new_message", event.message, parties)
+    broker.publish("unread_count", {"unread_count": event.recipient_unread_count}, event.recipient_id)
+
+
+def on_messages_read(event: MessagesRead):
+    for sender_id, message_ids in event.message_ids_by_sender.items():
+        # Read receipt for the sender, and sync for the reader's other sockets
+        frame = {"type": "read", "reader_id": event.reader_id, "message_ids": message_ids}
+        chat_manager.send_to_user(sender_id, frame)
+        chat_manager.send_to_user(event.reader_id, frame, exclude_id=event.origin_connection_id)
+    broker.publish("unread_count", {"unread_count": event.reader_unread_count}, event.reader_id)
+
+
+def on_like_count_changed(event):
+    # Only streams showing the post (whose viewers were checked when they subscribed)
+    broker.publish("like_count", {"post_id": event.post_id, "like_count": event.like_count}, post_id=event.post_id)
+
+
+def on_comment_created(event: CommentCreated):
+    broker.publish("new_comment", {
+        "post_id": event.post_id,
+        "comment_id": event.comment_id,
+        "comment_count": event.comment_count
+    }, post_id=event.post_id)
+
+
+def on_comment_deleted(event: CommentDeleted):
+    broker.publish("comment_deleted", {
+        "post_id": event.post_id,
+        "comment_id": event.comment_id,
+        "comment_count": event.comment_count
+    }, post_id=event.post_id)
+
+
+def register(bus: EventBus):
+    """Subscribe the realtime transports to the bus"""
+    bus.subscribe(MessageSent, on_message_sent)
+    bus.subscribe(MessagesRead, on_messages_read)
+    bus.subscribe(PostLiked, on_like_count_changed)
+    bus.subscribe(PostUnliked, on_like_count_changed)
+    bus.subscribe(CommentCreated, on_comment_created)
+    bus.subscribe(CommentDeleted, on_comment_deleted)
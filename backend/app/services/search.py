@@ -0,0 +1,145 @@
+"""
+Full-text search over posts and comments (SQLite FTS5)
+
+posts_fts / comments_fts are external-content FTS5 tables maintained by
+triggers in schema.sql. Results are ranked with BM25 (title matches weigh
+more than body matches) and paginated by (score, rowid) keyset, and only
+posts the searcher is allowed to see are returned.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+# BM25 column weights for posts_fts(title, content)
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+MAX_QUERY_TERMS = 8
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Posts a user may see: their own, public ones, friends-only posts of
+# their friends and twins-only posts of their birthday twins
+VISIBLE_POST_CONDITION = """
+    (
+        p.author_id = :user_id
+        OR p.visibility = 'public'
+        OR (p.visibility = 'friends' AND p.author_id IN (
+            SELECT user_high_id FROM friendships WHERE user_low_id = :user_id
+            UNION ALL
+            SELECT user_low_id FROM friendships WHERE user_high_id = :user_id
+        ))
+        OR (p.visibility = 'birthday_twins' AND p.author_id IN (
+            SELECT id FROM users WHERE birth_date = :birth_date
+        ))
+    )
+"""
+
+
+def visible_post_ids(db: Session, viewer: User, post_ids: List[str]) -> List[str]:
+    """The subset of `post_ids` that exist and `viewer` may see (one query)"""
+    if not post_ids:
+        return []
+    params = {f"id{i}": post_id for i, post_id in enumerate(post_ids)}
+    rows = db.execute(text(f"""
+        SELECT p.id FROM posts p
+        WHERE p.id IN ({', '.join(':' + name for name in params)})
+          AND {VISIBLE_POST_CONDITION}
+    """), {"user_id": viewer.id, "birth_date": viewer.birth_date.isoformat(), **params})
+    return [row[0] for row in rows]
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression
+
+    Every word is quoted (so FTS5 operators typed by users are plain text)
+    and all words must match; the last one also matches as a prefix so
+    results show up while typing.
+
+    Returns:
+        MATCH expression, or None if the query has no searchable words
+    """
+    terms = TERM_PATTERN.findall(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _keyset_params(after: Optional[dict]) -> dict:
+    if after is None:
+        return {"after_score": None, "after_rowid": None}
+    return {"after_score": after["score"], "after_rowid": after["rowid"]}
+
+
+def search_posts(
+    db: Session,
+    viewer: User,
+    match: str,
+    limit: int,
+    after: Optional[dict] = None
+) -> List[Tuple[str, float, int]]:
+    """
+    Visible posts matching `match`, best first
+
+    Returns:
+        Up to `limit` (post_id, score, rowid) tuples; (score, rowid) is the cursor key
+    """
+    sql = text(f"""
+        SELECT p.id, bm25(posts_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS score, p.rowid AS rid
+        FROM posts_fts
+        JOIN posts p ON p.rowid = posts_fts.rowid
+        WHERE posts_fts MATCH :match
+          AND {VISIBLE_POST_CONDITION}
+          AND (:after_score IS NULL OR score > :after_score OR (score = :after_score AND rid > :after_rowid))
+        ORDER BY score, rid
+        LIMIT :limit
+    """)
+    rows = db.execute(sql, {
+        "match": match,
+        "user_id": viewer.id,
+        "birth_date": viewer.birth_date.isoformat(),
+        "limit": limit,
+        **_keyset_params(after)
+    }).all()
+    return [(row[0], row[1], row[2]) for row in rows]
+
+
+def search_comments(
+    db: Session,
+    viewer: User,
+    match: str,
+    limit: int,
+    after: Optional[dict] = None
+) -> List[Tuple[str, float, int]]:
+    """
+    Comments matching `match` on posts the viewer can see, best first
+
+    Returns:
+        Up to `limit` (comment_id, score, rowid) tuples
+    """
+    sql = text(f"""
+        SELECT c.id, bm25(comments_fts) AS score, c.rowid AS rid
+        FROM comments_fts
+        JOIN comments c ON c.rowid = comments_fts.rowid
+        JOIN posts p ON p.id = c.post_id
+        WHERE comments_fts MATCH :match
+          AND {VISIBLE_POST_CONDITION}
+          AND (:after_score IS NULL OR score > :after_score OR (score = :after_score AND rid > :after_rowid))
+        ORDER BY score, rid
+        LIMIT :limit
+    """)
+    rows = db.execute(sql, {
+        "match": match,
+        "user_id": viewer.id,
+        "birth_date": viewer.birth_date.isoformat(),
+        "limit": limit,
+        **_keyset_params(after)
+    }).all()
+    return [(row[0], row[1], row[2]) for row in rows]
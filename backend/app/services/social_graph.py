@@ -0,0 +1,329 @@
+"""
+In-memory friendship graph
+
+Friend counts, mutual friends and suggestion candidates are answered from
+memory instead of the friendships table. User IDs are
+interned to ints and each user's friends are kept as a sorted array of
+them (4 bytes per edge), so membership is a binary search and mutual
+friends are a sorted-array intersection.
+
+The graph is loaded from friendships at startup (or on first use) and
+kept current by the FriendAdded/FriendRemoved events emitted by the
+friends router; other workers receive them through the event bus relay.
+Events arriving while a load runs are replayed onto the new graph. Rows
+changed without events (ON DELETE CASCADE, clear_all_data.sql, migrations,
+other workers without the relay) are picked up by the periodic reload
+(FRIEND_GRAPH_RELOAD_INTERVAL), so the graph can lag: access decisions
+(friendship checks, friends-only visibility) use friend_ids_in_db() and
+are_friends_in_db() instead.
+"""
+import asyncio
+import threading
+from array import array
+from bisect import bisect_left, insort
+from math import log2
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import background_session
+from app.models.friendship import friendship_key
+from app.services.event_bus import EventBus, FriendAdded, FriendRemoved
+
+_EMPTY = array("i")
+
+
+def intersect_sorted(a: array, b: array) -> List[int]:
+    """Common values of two ascending arrays"""
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return []
+
+    result = []
+    if len(a) * log2(len(b) + 1) < len(a) + len(b):
+        # Much smaller side: binary search each value in the larger one
+        lo = 0
+        for value in a:
+            lo = bisect_left(b, value, lo)
+            if lo == len(b):
+                break
+            if b[lo] == value:
+                result.append(value)
+        return result
+
+    # Similar sizes: linear merge
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            result.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class FriendGraph:
+    """Friend lists as sorted int arrays, keyed by interned user ID"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._user_ids: List[str] = []
+        self._friends: Dict[int, array] = {}
+        self._lock = threading.Lock()
+        self._replay: Optional[list] = None  # Updates received while a load is running
+        self._load_lock = threading.Lock()  # One load at a time
+        self.loaded = False
+
+    # ----- loading -----
+
+    def load(self, db: Session):
+        """(Re)build the graph from the friendships table"""
+        with self._load_lock:
+            with self._lock:
+                # Buffer updates from now on: the SELECT below may or may not see their rows
+                self._replay = []
+
+            try:
+                ids, user_ids, friends = self._read(db)
+            except BaseException:
+                with self._lock:
+                    self._replay = None
+                raise
+
+            with self._lock:
+                self._ids, self._user_ids, self._friends = ids, user_ids, friends
+                replay, self._replay = self._replay, None
+                for apply, user_id, friend_id in replay:
+                    apply(user_id, friend_id)  # Both are idempotent
+                self.loaded = True
+
+    @staticmethod
+    def _read(db: Session):
+        ids: Dict[str, int] = {}
+        user_ids: List[str] = []
+        lists: Dict[int, List[int]] = {}
+
+        def intern(user_id: str) -> int:
+            number = ids.get(user_id)
+            if number is None:
+                number = ids[user_id] = len(user_ids)
+                user_ids.append(user_id)
+            return number
+
+        # One row per friendship: record it on both sides
+        rows = db.execute(text("SELECT user_low_id, user_high_id FROM friendships"))
+        for low_id, high_id in rows:
+            low, high = intern(low_id), intern(high_id)
+            lists.setdefault(low, []).append(high)
+            lists.setdefault(high, []).append(low)
+
+        friends = {user: array("i", sorted(set(values))) for user, values in lists.items()}
+        return ids, user_ids, friends
+
+    def ensure_loaded(self, db: Session):
+        """Load on first use (when the startup hook did not run, e.g. in scripts)"""
+        if not self.loaded:
+            self.load(db)
+
+    def stats(self) -> dict:
+        edges = sum(len(values) for values in self._friends.values())
+        return {
+            "users": len(self._user_ids),
+            "edges": edges,
+            "edge_bytes": edges * _EMPTY.itemsize,
+        }
+
+    # ----- updates -----
+
+    def _intern(self, user_id: str) -> int:
+        number = self._ids.get(user_id)
+        if number is None:
+            number = self._ids[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+        return number
+
+    def add(self, user_id: str, friend_id: str):
+        """Record a (two-way) friendship"""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((self._add, user_id, friend_id))
+            if self.loaded:
+                self._add(user_id, friend_id)
+            # Not loaded and no load running: the first load reads it from the database
+
+    def remove(self, user_id: str, friend_id: str):
+        """Forget a (two-way) friendship"""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((self._remove, user_id, friend_id))
+            if self.loaded:
+                self._remove(user_id, friend_id)
+
+    def _add(self, user_id: str, friend_id: str):
+        a, b = self._intern(user_id), self._intern(friend_id)
+        for owner, other in ((a, b), (b, a)):
+            values = self._friends.setdefault(owner, array("i"))
+            index = bisect_left(values, other)
+            if index == len(values) or values[index] != other:
+                insort(values, other)
+
+    def _remove(self, user_id: str, friend_id: str):
+        a, b = self._ids.get(user_id), self._ids.get(friend_id)
+        if a is None or b is None:
+            return
+        for owner, other in ((a, b), (b, a)):
+            values = self._friends.get(owner)
+            if values is None:
+                continue
+            index = bisect_left(values, other)
+            if index < len(values) and values[index] == other:
+                del values[index]
+
+    # ----- queries -----
+
+    def _adjacency(self, user_id: str) -> array:
+        number = self._ids.get(user_id)
+        return _EMPTY if number is None else self._friends.get(number, _EMPTY)
+
+    def is_friend(self, user_id: str, other_id: str) -> bool:
+        other = self._ids.get(other_id)
+        if other is None:
+            return False
+        values = self._adjacency(user_id)
+        index = bisect_left(values, other)
+        return index < len(values) and values[index] == other
+
+    def friend_count(self, user_id: str) -> int:
+        return len(self._adjacency(user_id))
+
+    def friend_ids(self, user_id: str) -> List[str]:
+        return [self._user_ids[number] for number in self._adjacency(user_id)]
+
+    def mutual_ids(self, user_id: str, other_id: str, limit: Optional[int] = None) -> List[str]:
+        mutual = intersect_sorted(self._adjacency(user_id), self._adjacency(other_id))
+        if limit is not None:
+            mutual = mutual[:limit]
+        return [self._user_ids[number] for number in mutual]
+
+    def mutual_count(self, user_id: str, other_id: str) -> int:
+        return len(intersect_sorted(self._adjacency(user_id), self._adjacency(other_id)))
+
+    def mutual_counts(self, user_id: str, other_ids: List[str]) -> Dict[str, int]:
+        """Mutual friend count between `user_id` and each of `other_ids`"""
+        mine = self._adjacency(user_id)
+        return {
+            other_id: len(intersect_sorted(mine, self._adjacency(other_id))) if mine else 0
+            for other_id in other_ids
+        }
+
+    def friends_of_friends(self, user_id: str) -> Dict[str, int]:
+        """Non-friends reachable through a friend, with their mutual friend count"""
+        number = self._ids.get(user_id)
+        if number is None:
+            return {}
+        friends = self._adjacency(user_id)
+        counts: Dict[int, int] = {}
+        for friend in friends:
+            for other in self._friends.get(friend, _EMPTY):
+                counts[other] = counts.get(other, 0) + 1
+
+        counts.pop(number, None)
+        for friend in friends:
+            counts.pop(friend, None)
+        return {self._user_ids[other]: count for other, count in counts.items()}
+
+
+friend_graph = FriendGraph()
+
+
+def get_friend_graph(db: Session) -> FriendGraph:
+    """The graph, loaded from `db` if this is the first use"""
+    friend_graph.ensure_loaded(db)
+    return friend_graph
+
+
+def load():
+    """Load the graph on its own connection (startup hook and reloads, run in a worker thread)"""
+    db = background_session()
+    try:
+        friend_graph.load(db)
+    finally:
+        db.close()
+
+
+# ----- authoritative reads, for access decisions -----
+
+FRIEND_IDS_SQL = text("""
+    SELECT user_high_id FROM friendships WHERE user_low_id = :user_id
+    UNION ALL
+    SELECT user_low_id FROM friendships WHERE user_high_id = :user_id
+""")
+
+
+def friend_ids_in_db(db: Session, user_id: str) -> List[str]:
+    """A user's friends, from the friendships table"""
+    return [row[0] for row in db.execute(FRIEND_IDS_SQL, {"user_id": user_id})]
+
+
+def are_friends_in_db(db: Session, user_id: str, other_id: str) -> bool:
+    """Whether two users are friends, from the friendships table"""
+    low_id, high_id = friendship_key(user_id, other_id)
+    return db.execute(
+        text("SELECT 1 FROM friendships WHERE user_low_id = :low_id AND user_high_id = :high_id"),
+        {"low_id": low_id, "high_id": high_id}
+    ).first() is not None
+
+
+# ----- periodic reload inside the app -----
+
+_reload_task: Optional[asyncio.Task] = None
+
+
+async def _reload_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(load)
+        except Exception as e:
+            print(f"Error reloading friend graph: {e}")
+
+
+def start_reloader():
+    """Start the periodic reload (call on startup; no-op when the interval is 0)"""
+    global _reload_task
+    interval = settings.FRIEND_GRAPH_RELOAD_INTERVAL
+    if interval <= 0 or _reload_task is not None:
+        return
+    _reload_task = asyncio.get_running_loop().create_task(_reload_periodically(interval))
+
+
+async def stop_reloader():
+    global _reload_task
+    if _reload_task is not None:
+        _reload_task.cancel()
+        try:
+            await _reload_task
+        except asyncio.CancelledError:
+            pass
+        _reload_task = None
+
+
+def on_friend_added(event: FriendAdded):
+    friend_graph.add(event.user_id, event.friend_id)
+
+
+def on_friend_removed(event: FriendRemoved):
+    friend_graph.remove(event.user_id, event.friend_id)
+
+
+def register(bus: EventBus):
+    """Keep the graph in sync with friendship events"""
+    bus.subscribe(FriendAdded, on_friend_added)
+    bus.subscribe(FriendRemoved, on_friend_removed)
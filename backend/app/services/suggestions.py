@@ -0,0 +1,244 @@
+"""
+Friend suggestions ("people you may know")
+
+A batch job ranks candidates for each user and stores the best
+SUGGESTIONS_PER_USER in friend_suggestions, so /api/friends/suggestions is
+a single primary-key range read. Candidates are:
+
+- friends of friends (from the in-memory graph), scored by mutual friends
+- birthday twins (same month and day) and people in the same city, read
+  through the birth_md and city indexes
+
+Only users in friend_suggestion_queue are recomputed. Triggers queue a user
+when their friendships, their friends' friendships, their birthday or city
+change (and on sign-up); `--full` queues everyone, e.g. from a nightly cron,
+to pick up other users' profile changes.
+
+The job runs in one place: from cron, or inside the app on a single worker
+(FRIEND_SUGGESTIONS_REFRESH_INTERVAL, off by default). It uses its own
+connection and takes the write lock for each batch, so a batch's suggestions
+and queue entries are replaced together or not at all.
+
+Usage (from the backend directory):
+    python -m app.services.suggestions          # queued users
+    python -m app.services.suggestions --full   # everyone
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import background_session
+from app.services.social_graph import get_friend_graph
+
+SUGGESTIONS_PER_USER = 20
+
+# Score weights: each mutual friend, a shared birthday, a shared city
+MUTUAL_FRIEND_WEIGHT = 10
+BIRTHDAY_TWIN_WEIGHT = 15
+SAME_CITY_WEIGHT = 5
+
+# Candidates considered per user before scoring
+MAX_MUTUAL_CANDIDATES = 200  # Friends of friends with the most mutual friends
+MAX_TWIN_CANDIDATES = 50
+MAX_CITY_CANDIDATES = 50
+
+BATCH_SIZE = 100  # Users computed per transaction
+
+
+class Suggestion(NamedTuple):
+    suggested_id: str
+    score: int
+    mutual_count: int
+    birthday_twin: bool
+    same_city: bool
+
+
+def _profiles(db: Session, user_ids: List[str]) -> Dict[str, tuple]:
+    """(birth_md, lower-cased city) of discoverable users, by ID"""
+    profiles = {}
+    for start in range(0, len(user_ids), 500):
+        chunk = user_ids[start:start + 500]
+        params = {f"id{i}": user_id for i, user_id in enumerate(chunk)}
+        rows = db.execute(text(f"""
+            SELECT id, birth_md, lower(city) FROM users
+            WHERE id IN ({', '.join(':' + name for name in params)}) AND is_discoverable = 1
+        """), params)
+        for user_id, birth_md, city in rows:
+            profiles[user_id] = (birth_md, city)
+    return profiles
+
+
+def compute_suggestions(db: Session, user_id: str) -> List[Suggestion]:
+    """Best suggestions for one user, best first"""
+    user = db.execute(
+        text("SELECT birth_md, city FROM users WHERE id = :id"), {"id": user_id}
+    ).first()
+    if user is None:
+        return []
+    birth_md, city = user
+
+    graph = get_friend_graph(db)
+    mutual = graph.friends_of_friends(user_id)
+    candidates = sorted(mutual, key=lambda other: -mutual[other])[:MAX_MUTUAL_CANDIDATES]
+
+    twins = db.execute(text("""
+        SELECT id FROM users
+        WHERE birth_md = :birth_md AND id != :id AND +is_discoverable = 1
+        LIMIT :limit
+    """), {"birth_md": birth_md, "id": user_id, "limit": MAX_TWIN_CANDIDATES}).scalars().all()
+    neighbours = db.execute(text("""
+        SELECT id FROM users
+        WHERE city = :city COLLATE NOCASE AND id != :id AND +is_discoverable = 1
+        LIMIT :limit
+    """), {"city": city, "id": user_id, "limit": MAX_CITY_CANDIDATES}).scalars().all()
+
+    seen = set(candidates)
+    for other in list(twins) + list(neighbours):
+        if other not in seen and not graph.is_friend(user_id, other):
+            seen.add(other)
+            candidates.append(other)
+
+    profiles = _profiles(db, candidates)
+    city = city.lower()
+    suggestions = []
+    for other in candidates:
+        profile = profiles.get(other)
+        if profile is None:
+            continue  # Not discoverable
+        mutual_count = mutual.get(other, 0)
+        birthday_twin = profile[0] == birth_md
+        same_city = profile[1] == city
+        score = (
+            mutual_count * MUTUAL_FRIEND_WEIGHT
+            + birthday_twin * BIRTHDAY_TWIN_WEIGHT
+            + same_city * SAME_CITY_WEIGHT
+        )
+        suggestions.append(Suggestion(other, score, mutual_count, birthday_twin, same_city))
+
+    suggestions.sort(key=lambda s: (-s.score, s.suggested_id))
+    return suggestions[:SUGGESTIONS_PER_USER]
+
+
+def _store(db: Session, user_id: str, suggestions: List[Suggestion]):
+    db.execute(text("DELETE FROM friend_suggestions WHERE user_id = :id"), {"id": user_id})
+    if suggestions:
+        db.execute(text("""
+            INSERT INTO friend_suggestions
+                (user_id, rank, suggested_id, score, mutual_count, birthday_twin, same_city)
+            VALUES (:user_id, :rank, :suggested_id, :score, :mutual_count, :birthday_twin, :same_city)
+        """), [
+            {"user_id": user_id, "rank": rank, **s._asdict()}
+            for rank, s in enumerate(suggestions)
+        ])
+
+
+def queue_all(db: Session):
+    """Queue every user for a refresh"""
+    db.execute(text("""
+        INSERT INTO friend_suggestion_queue (user_id)
+        SELECT id FROM users WHERE true
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+    """))
+    db.commit()
+
+
+def refresh_queued(db: Session, max_users: Optional[int] = None) -> int:
+    """
+    Recompute suggestions for queued users
+
+    A user queued again while being computed keeps their (newer) queue
+    entry and is picked up by the next run.
+
+    Returns:
+        Number of users refreshed
+    """
+    done = 0
+    while max_users is None or done < max_users:
+        size = BATCH_SIZE if max_users is None else min(BATCH_SIZE, max_users - done)
+        batch = db.execute(
+            text("SELECT user_id, version FROM friend_suggestion_queue LIMIT :limit"),
+            {"limit": size}
+        ).all()
+        if not batch:
+            break
+
+        # The batch's SELECT began the transaction; with BEGIN IMMEDIATE sessions
+        # it holds the write lock until the commit below
+        for user_id, version in batch:
+            _store(db, user_id, compute_suggestions(db, user_id))
+        db.execute(
+            text("DELETE FROM friend_suggestion_queue WHERE user_id = :user_id AND version = :version"),
+            [{"user_id": user_id, "version": version} for user_id, version in batch]
+        )
+        db.commit()
+        done += len(batch)
+    return done
+
+
+def refresh():
+    """One run over the queue on its own connection"""
+    db = background_session(immediate=True)
+    try:
+        return refresh_queued(db)
+    finally:
+        db.close()
+
+
+# ----- periodic runs inside the app -----
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+async def _refresh_periodically(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(refresh)
+        except Exception as e:
+            print(f"Error refreshing friend suggestions: {e}")
+
+
+def start_refresher():
+    """Start the periodic job (call on startup; no-op when the interval is 0)"""
+    global _refresh_task
+    interval = settings.FRIEND_SUGGESTIONS_REFRESH_INTERVAL
+    if interval <= 0 or _refresh_task is not None:
+        return
+    _refresh_task = asyncio.get_running_loop().create_task(_refresh_periodically(interval))
+
+
+async def stop_refresher():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="recompute every user, not only queued ones")
+    args = parser.parse_args()
+
+    db = background_session(immediate=True)
+    try:
+        if args.full:
+            queue_all(db)
+        started = time.perf_counter()
+        count = refresh_queued(db)
+        print(f"Refreshed suggestions for {count} users in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Uploads file server
+
+Serves /uploads with caching-friendly responses:
+- content-addressed files (profile picture variants) are immutable and get
+  far-future Cache-Control, so browsers never re-request them
+- strong ETags with If-None-Match -> 304 for everything else
+- single byte-range requests (206 / 416)
+- zero-copy sends when the ASGI server offers the zerocopysend extension
+
+Offload mode (UPLOADS_OFFLOAD_MODE) lets a front proxy send the bytes: the
+app only checks the request and replies with X-Accel-Redirect (nginx) or
+X-Sendfile (Apache/lighttpd) plus the caching headers.
+"""
+import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.services.profile_pictures import CONTENT_KEY_LENGTH
+
+mimetypes.add_type("image/webp", ".webp")
+
+CHUNK_SIZE = 64 * 1024
+ONE_YEAR = 365 * 24 * 3600
+
+# <hash>-<size>.<ext>: the bytes behind these names never change
+CONTENT_ADDRESSED_NAME = re.compile(rf"^[0-9a-f]{{{CONTENT_KEY_LENGTH}}}-\d+\.[a-z]+$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+OFFLOAD_MODES = ("", "x-accel-redirect", "x-sendfile")
+
+
+class UploadsServer:
+    """ASGI app serving user uploads (mount at /uploads)"""
+
+    def __init__(
+        self,
+        directory: str,
+        allowed_prefixes: Tuple[str, ...] = ("profile_pictures/",),
+        offload_mode: str = "",
+        offload_prefix: str = "/protected-uploads",
+        max_age: int = ONE_YEAR
+    ):
+        if offload_mode not in OFFLOAD_MODES:
+            raise ValueError(f"Invalid uploads offload mode: {offload_mode!r}")
+
+        self.directory = os.path.realpath(directory)
+        self.allowed_prefixes = allowed_prefixes
+        self.offload_mode = offload_mode
+        self.offload_prefix = offload_prefix.rstrip("/")
+        self.max_age = max_age
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        assert scope["type"] == "http"
+
+        if scope["method"] not in ("GET", "HEAD"):
+            response = Response("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+            await response(scope, receive, send)
+            return
+
+        # Path relative to the mount point
+        root_path = scope.get("root_path", "")
+        path = scope["path"]
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        relative_path = path.lstrip("/")
+        full_path = self.authorize(relative_path)
+        stat_result = await run_in_threadpool(self._stat, full_path) if full_path else None
+
+        if stat_result is None:
+            await Response("Not Found", status_code=404)(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        headers = self.cache_headers(relative_path, stat_result)
+
+        # Conditional request: the client's copy is current
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and headers["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        headers["content-type"] = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+        if self.offload_mode:
+            await self.send_offloaded(scope, receive, send, relative_path, full_path, headers)
+            return
+
+        size = stat_result.st_size
+        byte_range = self.parse_range(request_headers, headers["etag"], size)
+
+        if byte_range == "unsatisfiable":
+            headers["content-range"] = f"bytes */{size}"
+            await Response(status_code=416, headers=headers)(scope, receive, send)
+            return
+
+        status_code = 200
+        start, end = 0, size - 1
+        if byte_range is not None:
+            status_code = 206
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        headers["content-length"] = str(end - start + 1)
+
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+        })
+
+        if scope["method"] == "HEAD" or end < start:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await self.send_file(scope, send, full_path, start, end - start + 1)
+
+    def authorize(self, relative_path: str) -> Optional[str]:
+        """
+        Decide whether a path may be served
+
+        Returns:
+            Absolute file path, or None if the request must be refused
+        """
+        if not relative_path.startswith(self.allowed_prefixes):
+            return None
+
+        full_path = os.path.realpath(os.path.join(self.directory, relative_path))
+        # Refuse traversal outside the uploads directory
+        if not full_path.startswith(self.directory + os.sep):
+            return None
+        return full_path
+
+    @staticmethod
+    def _stat(full_path: str) -> Optional[os.stat_result]:
+        try:
+            stat_result = os.stat(full_path)
+        except OSError:
+            return None
+        return stat_result if stat.S_ISREG(stat_result.st_mode) else None
+
+    def cache_headers(self, relative_path: str, stat_result: os.stat_result) -> dict:
+        """ETag / Cache-Control / Last-Modified for a file"""
+        filename = os.path.basename(relative_path)
+
+        if CONTENT_ADDRESSED_NAME.match(filename):
+            # The name is derived from the content: strong and permanent
+            etag = f'"{filename}"'
+            cache_control = f"public, max-age={self.max_age}, immutable"
+        else:
+            # Legacy files are overwritten in place: revalidate every time
+            etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+            cache_control = "public, no-cache"
+
+        return {
+            "etag": etag,
+            "cache-control": cache_control,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "accept-ranges": "bytes",
+        }
+
+    @staticmethod
+    def parse_range(request_headers: Headers, etag: str, size: int):
+        """
+        Parse a single "bytes=" range
+
+        Returns:
+            None for a full response, (start, end) inclusive, or "unsatisfiable"
+        """
+        range_header = request_headers.get("range")
+        if not range_header:
+            return None
+
+        # If-Range with a stale validator: send the whole (new) file
+        if_range = request_headers.get("if-range")
+        if if_range and if_range.strip() != etag:
+            return None
+
+        match = RANGE_PATTERN.match(range_header.strip())
+        if not match:
+            # Multiple or malformed ranges: fall back to the full body
+            return None
+
+        first, last = match.groups()
+        if first == "" and last == "":
+            return None
+
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                return "unsatisfiable"
+            return max(0, size - length), size - 1
+
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            return "unsatisfiable"
+        return start, end
+
+    async def send_offloaded(self, scope, receive, send, relative_path, full_path, headers):
+        """Let the front proxy send the file; the app only sends headers"""
+        if self.offload_mode == "x-accel-redirect":
+            headers["x-accel-redirect"] = f"{self.offload_prefix}/{relative_path}"
+        else:
+            headers["x-sendfile"] = full_path
+
+        # The proxy takes Content-Length/Range handling from the real file
+        await Response(status_code=200, headers=headers)(scope, receive, send)
+
+    async def send_file(self, scope: Scope, send: Send, full_path: str, offset: int, count: int):
+        """Send `count` bytes from `offset`, zero-copy when the server supports it"""
+        fd = await run_in_threadpool(os.open, full_path, os.O_RDONLY)
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": offset,
+                    "count": count,
+                })
+                return
+
+            remaining = count
+            while remaining > 0:
+                chunk = await run_in_threadpool(os.pread, fd, min(CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+            if remaining > 0:
+                # File shrank while sending: close the response
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            os.close(fd)
@@ -0,0 +1,196 @@
+"""
+Friendship storage benchmark
+Builds the same random friendship graph twice, in the old directed layout
+(two rows per pair) and in the current one-row-per-pair layout from
+schema.sql, and compares their size on disk and lookup times
+
+Usage (from the backend directory):
+    python -m benchmarks.friendship_storage_benchmark --users 100000 --degree 20
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database" / "schema.sql"
+
+# The directed layout, as it was before single-row friendships
+DIRECTED_SCHEMA = """
+CREATE TABLE friendships (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    friend_id TEXT NOT NULL,
+    friend_birth_md INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, friend_id)
+);
+CREATE INDEX idx_friendships_user_id ON friendships(user_id);
+CREATE INDEX idx_friendships_friend_id ON friendships(friend_id);
+CREATE INDEX idx_friendships_user_birth_md ON friendships(user_id, friend_birth_md, friend_id);
+"""
+
+# Lookups in each layout: (name, directed SQL, single-row SQL); parameters :a and :b are users
+QUERIES = [
+    (
+        "is friend",
+        "SELECT 1 FROM friendships WHERE (user_id = :a AND friend_id = :b) OR (user_id = :b AND friend_id = :a)",
+        "SELECT 1 FROM friendships WHERE user_low_id = min(:a, :b) AND user_high_id = max(:a, :b)",
+    ),
+    (
+        "friends page",
+        "SELECT friend_birth_md, friend_id FROM friendships WHERE user_id = :a "
+        "ORDER BY friend_birth_md, friend_id LIMIT 50",
+        "SELECT * FROM ("
+        "SELECT * FROM (SELECT high_birth_md AS md, user_high_id AS id FROM friendships WHERE user_low_id = :a "
+        "ORDER BY 1, 2 LIMIT 50) "
+        "UNION ALL "
+        "SELECT * FROM (SELECT low_birth_md, user_low_id FROM friendships WHERE user_high_id = :a "
+        "ORDER BY 1, 2 LIMIT 50)"
+        ") ORDER BY 1, 2 LIMIT 50",
+    ),
+    (
+        "next 30 days",
+        "SELECT friend_birth_md, friend_id FROM friendships WHERE user_id = :a "
+        "AND friend_birth_md BETWEEN 601 AND 701 ORDER BY friend_birth_md, friend_id LIMIT 20",
+        "SELECT * FROM ("
+        "SELECT * FROM (SELECT high_birth_md AS md, user_high_id AS id FROM friendships WHERE user_low_id = :a "
+        "AND high_birth_md BETWEEN 601 AND 701 ORDER BY 1, 2 LIMIT 20) "
+        "UNION ALL "
+        "SELECT * FROM (SELECT low_birth_md, user_low_id FROM friendships WHERE user_high_id = :a "
+        "AND low_birth_md BETWEEN 601 AND 701 ORDER BY 1, 2 LIMIT 20)"
+        ") ORDER BY 1, 2 LIMIT 20",
+    ),
+    (
+        "all friends",
+        "SELECT friend_id FROM friendships WHERE user_id = :a",
+        "SELECT user_high_id FROM friendships WHERE user_low_id = :a "
+        "UNION ALL SELECT user_low_id FROM friendships WHERE user_high_id = :a",
+    ),
+]
+
+
+def random_pairs(users: int, degree: int, rng: random.Random):
+    """Distinct unordered pairs giving each user `degree` friends on average"""
+    pairs = set()
+    target = users * degree // 2
+    while len(pairs) < target:
+        a, b = rng.randrange(users), rng.randrange(users)
+        if a != b:
+            pairs.add((a, b) if a < b else (b, a))
+    return list(pairs)
+
+
+def build(path: str, schema: str, rows, insert_sql: str):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA cache_size = -262144")  # 256 MB, so the load is not dominated by index page misses
+    conn.executescript(schema)
+    for start in range(0, len(rows), 50000):
+        conn.executemany(insert_sql, rows[start:start + 50000])
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+
+def friendship_bytes(conn: sqlite3.Connection) -> int:
+    """Bytes used by the friendships table and its indexes"""
+    return conn.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+        "(SELECT name FROM sqlite_master WHERE tbl_name = 'friendships' AND type IN ('table', 'index'))"
+    ).fetchone()[0]
+
+
+def timed(conn: sqlite3.Connection, sql: str, samples):
+    times = []
+    for params in samples:
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        times.append((time.perf_counter() - start) * 1e6)
+    times.sort()
+    return statistics.median(times), times[max(0, int(len(times) * 0.95) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--degree", type=int, default=20, help="average friends per user")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    work_dir = tempfile.mkdtemp(prefix="friendship-bench-")
+
+    print("=" * 60)
+    print(f"Friendships: {args.users:,} users, ~{args.degree} friends each")
+    print("=" * 60)
+
+    ids = sorted(str(uuid.uuid4()) for _ in range(args.users))
+    birth_md = [rng.randint(1, 12) * 100 + rng.randint(1, 28) for _ in range(args.users)]
+    pairs = random_pairs(args.users, args.degree, rng)
+    print(f"{len(pairs):,} friendships")
+
+    directed_rows = []
+    for a, b in pairs:
+        directed_rows.append((str(uuid.uuid4()), ids[a], ids[b], birth_md[b]))
+        directed_rows.append((str(uuid.uuid4()), ids[b], ids[a], birth_md[a]))
+    single_rows = [(ids[a], ids[b], birth_md[a], birth_md[b]) for a, b in pairs]
+    del pairs
+
+    layouts = {}
+    start = time.perf_counter()
+    layouts["directed"] = build(
+        os.path.join(work_dir, "directed.db"), DIRECTED_SCHEMA, directed_rows,
+        "INSERT INTO friendships (id, user_id, friend_id, friend_birth_md) VALUES (?, ?, ?, ?)"
+    )
+    directed_load = time.perf_counter() - start
+
+    # Full schema, minus the friendship triggers (birth keys are inserted directly)
+    # and foreign key checks (no users rows)
+    single_schema = SCHEMA_PATH.read_text() + """
+        PRAGMA foreign_keys = OFF;
+        DROP TRIGGER friendships_birth_md_insert;
+        DROP TRIGGER friend_suggestion_queue_friendship_insert;
+    """
+    start = time.perf_counter()
+    layouts["single-row"] = build(
+        os.path.join(work_dir, "single.db"), single_schema, single_rows,
+        "INSERT INTO friendships (user_low_id, user_high_id, low_birth_md, high_birth_md) VALUES (?, ?, ?, ?)"
+    )
+    single_load = time.perf_counter() - start
+
+    directed_size = friendship_bytes(layouts["directed"])
+    single_size = friendship_bytes(layouts["single-row"])
+    print(f"\n{'layout':<12} {'rows':>11} {'size':>10} {'load':>8}")
+    print(f"{'directed':<12} {len(directed_rows):>11,} {directed_size / 1e6:>8.1f}MB {directed_load:>7.1f}s")
+    print(f"{'single-row':<12} {len(single_rows):>11,} {single_size / 1e6:>8.1f}MB {single_load:>7.1f}s")
+    print(f"single-row is {single_size / directed_size:.0%} of the directed size")
+
+    # Every other sample is an existing friendship (either way round)
+    samples = []
+    for i in range(args.samples):
+        if i % 2:
+            a, b = rng.choice(single_rows)[:2]
+        else:
+            a, b = rng.choice(ids), rng.choice(ids)
+        samples.append({"a": a, "b": b} if rng.random() < 0.5 else {"a": b, "b": a})
+
+    print(f"\n{'query':<14} {'directed p50/p95':>20} {'single-row p50/p95':>22}")
+    for name, directed_sql, single_sql in QUERIES:
+        d50, d95 = timed(layouts["directed"], directed_sql, samples)
+        s50, s95 = timed(layouts["single-row"], single_sql, samples)
+        print(f"{name:<14} {d50:8.1f}us {d95:8.1f}us {s50:10.1f}us {s95:8.1f}us")
+
+    for conn in layouts.values():
+        conn.close()
+    for name in os.listdir(work_dir):
+        os.remove(os.path.join(work_dir, name))
+    os.rmdir(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Post like stress test
+Several worker processes (one SQLite connection each, like app workers)
+like and unlike a handful of hot posts at random on a throwaway database
+built from schema.sql, with many of them hitting the same (user, post)
+pairs at once, as double clicks and retries do. Compares the idempotent
+statements in app.services.likes with the old read-then-write toggle and
+checks afterwards that:
+
+- every post's like count (folded plus pending) equals its number of
+  post_likes rows
+- for the statements, the changes they reported add up to those counts
+
+Usage (from the backend directory):
+    python -m benchmarks.like_stress --workers 8 --ops 2000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.services.likes import add_post_like, remove_post_like
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database" / "schema.sql"
+
+
+def build(path: str, users: int, posts: int):
+    """Database with `users` users and `posts` posts; returns their IDs"""
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    post_ids = [str(uuid.uuid4()) for _ in range(posts)]
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash, full_name, birth_date, gender, city, region, country) "
+        "VALUES (?, ?, 'x', 'Stress User', '1990-01-01', 'Other', 'Austin', 'TX', 'USA')",
+        [(user_id, f"{user_id}@example.com") for user_id in user_ids]
+    )
+    conn.executemany(
+        "INSERT INTO posts (id, author_id, content, visibility) VALUES (?, ?, 'hot post', 'public')",
+        [(post_id, user_ids[0]) for post_id in post_ids]
+    )
+    conn.commit()
+    conn.close()
+    return user_ids, post_ids
+
+
+def legacy_toggle(db: Session, post_id: str, user_id: str, like: bool):
+    """The old like_post: look up the like, then insert or delete it, then re-read the count"""
+    existing = db.execute(
+        text("SELECT id FROM post_likes WHERE user_id = :user_id AND post_id = :post_id"),
+        {"user_id": user_id, "post_id": post_id}
+    ).first()
+    if existing and not like:
+        db.execute(text("DELETE FROM post_likes WHERE id = :id"), {"id": existing[0]})
+    elif not existing and like:
+        db.execute(
+            text("INSERT INTO post_likes (id, user_id, post_id) VALUES (:id, :user_id, :post_id)"),
+            {"id": str(uuid.uuid4()), "user_id": user_id, "post_id": post_id}
+        )
+    db.commit()
+    db.execute(text("SELECT like_count FROM posts WHERE id = :post_id"), {"post_id": post_id}).scalar()
+
+
+def worker(args):
+    path, mode, user_ids, post_ids, ops, seed = args
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+    net = Counter()  # post_id -> net change reported by the statements
+    errors = Counter()
+    with Session(engine) as db:
+        for _ in range(ops):
+            post_id, user_id, like = rng.choice(post_ids), rng.choice(user_ids), rng.random() < 0.6
+            try:
+                if mode == "legacy":
+                    legacy_toggle(db, post_id, user_id, like)
+                elif like:
+                    if add_post_like(db, post_id, user_id) is not None:
+                        net[post_id] += 1
+                elif remove_post_like(db, post_id, user_id) is not None:
+                    net[post_id] -= 1
+            except IntegrityError:
+                db.rollback()
+                errors["duplicate like (500)"] += 1
+            except OperationalError:
+                db.rollback()
+                errors["database locked"] += 1
+    engine.dispose()
+    return net, errors
+
+
+def run(mode: str, args) -> dict:
+    work_dir = tempfile.mkdtemp(prefix="like-stress-")
+    path = os.path.join(work_dir, "likes.db")
+    user_ids, post_ids = build(path, args.users, args.posts)
+
+    jobs = [(path, mode, user_ids, post_ids, args.ops, args.seed + i) for i in range(args.workers)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        results = pool.map(worker, jobs)
+    elapsed = time.perf_counter() - start
+
+    net, errors = Counter(), Counter()
+    for worker_net, worker_errors in results:
+        net.update(worker_net)
+        errors.update(worker_errors)
+
+    conn = sqlite3.connect(path)
+    counts = dict(conn.execute(
+        "SELECT id, like_count + COALESCE((SELECT SUM(like_delta) FROM post_counter_deltas WHERE post_id = posts.id), 0) "
+        "FROM posts"
+    ))
+    rows = dict(conn.execute("SELECT post_id, COUNT(*) FROM post_likes GROUP BY post_id"))
+    conn.close()
+    for name in os.listdir(work_dir):
+        os.remove(os.path.join(work_dir, name))
+    os.rmdir(work_dir)
+
+    return {
+        "ops_per_sec": args.workers * args.ops / elapsed,
+        "errors": errors,
+        "counts_match_rows": all(counts[p] == rows.get(p, 0) for p in post_ids),
+        "reported_match_rows": mode == "legacy" or all(net[p] == rows.get(p, 0) for p in post_ids),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=2000, help="like/unlike requests per worker")
+    parser.add_argument("--users", type=int, default=50, help="few users, so requests collide")
+    parser.add_argument("--posts", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Likes: {args.workers} workers x {args.ops} ops, {args.users} users, {args.posts} posts")
+    print("=" * 60)
+
+    failed = False
+    for mode in ("legacy", "statements"):
+        result = run(mode, args)
+        errors = ", ".join(f"{count} {name}" for name, count in result["errors"].items()) or "none"
+        print(f"\n{mode}")
+        print(f"  throughput:            {result['ops_per_sec']:,.0f} ops/s")
+        print(f"  failed requests:       {errors}")
+        print(f"  like_count == rows:    {result['counts_match_rows']}")
+        if mode == "statements":
+            print(f"  reported net == rows:  {result['reported_match_rows']}")
+            failed = bool(result["errors"]) or not (result["counts_match_rows"] and result["reported_match_rows"])
+
+    if failed:
+        raise SystemExit("idempotent like statements were not consistent")
+
+
+if __name__ == "__main__":
+    main()
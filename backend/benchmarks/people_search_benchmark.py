@@ -0,0 +1,145 @@
+"""
+People search benchmark
+Builds a throwaway database from schema.sql with synthetic users and times
+the queries behind /api/users/search (name prefix, typo, location and
+birth date filters)
+
+Usage (from the backend directory):
+    python -m benchmarks.people_search_benchmark --users 3000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.services.people_search import PeopleFilters, search_people
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database" / "schema.sql"
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth",
+    "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Christopher", "Nancy", "Daniel", "Lisa", "Matthew", "Betty", "Anthony", "Margaret", "Mark", "Sandra",
+    "Jonathan", "Maria", "Olivia", "Noah", "Emma", "Liam", "Ava", "Sophia", "Isabella", "Mason",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+]
+PLACES = [
+    ("Austin", "TX"), ("Dallas", "TX"), ("Houston", "TX"), ("Seattle", "WA"), ("Portland", "OR"),
+    ("Denver", "CO"), ("Chicago", "IL"), ("Boston", "MA"), ("Miami", "FL"), ("Phoenix", "AZ"),
+    ("Atlanta", "GA"), ("Nashville", "TN"), ("Columbus", "OH"), ("Madison", "WI"), ("Raleigh", "NC"),
+]
+
+
+def random_surname(rng: random.Random) -> str:
+    # A long tail of rarer surnames next to the common ones
+    if rng.random() < 0.5:
+        return rng.choice(LAST_NAMES)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return "".join(rng.choice(letters) for _ in range(rng.randint(5, 9))).capitalize()
+
+
+def build_users(conn: sqlite3.Connection, users: int, rng: random.Random):
+    first_day = date(1950, 1, 1)
+    batch = []
+    for i in range(users):
+        city, region = rng.choice(PLACES)
+        birth_date = first_day + timedelta(days=rng.randrange(365 * 55))
+        batch.append((
+            str(uuid.uuid4()), f"user{i}@example.com",
+            f"{rng.choice(FIRST_NAMES)} {random_surname(rng)}",
+            birth_date.isoformat(), city, region,
+            0 if rng.random() < 0.1 else 1
+        ))
+        if len(batch) == 10000:
+            insert_users(conn, batch)
+            batch.clear()
+            print(f"\r  {i + 1:,} users", end="", flush=True)
+    if batch:
+        insert_users(conn, batch)
+    conn.commit()
+    print()
+
+
+def insert_users(conn: sqlite3.Connection, batch):
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash, full_name, birth_date, gender, city, region, country, is_discoverable) "
+        "VALUES (?, ?, 'x', ?, ?, 'Other', ?, ?, 'USA', ?)",
+        batch
+    )
+
+
+def timed(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)], len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    work_dir = tempfile.mkdtemp(prefix="people-bench-")
+    db_path = os.path.join(work_dir, "bench.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+
+    print("=" * 60)
+    print(f"People search: {args.users:,} users")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    build_users(conn, args.users, rng)
+    print(f"Users built in {time.perf_counter() - start:.1f}s ({os.path.getsize(db_path) / 1e6:.0f} MB)")
+
+    birth_date = date.fromisoformat(conn.execute("SELECT birth_date FROM users LIMIT 1").fetchone()[0])
+    rare_surname = next(
+        name.split()[-1] for (name,) in conn.execute("SELECT full_name FROM users")
+        if name.split()[-1] not in LAST_NAMES
+    )
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    queries = [
+        ("prefix", "jonat", {}),
+        ("full name", "john smith", {}),
+        ("typo", "jonh smiht", {}),
+        ("rare surname", rare_surname, {}),
+        ("name + city", "maria", {"city": "austin", "region": "tx"}),
+        ("city only", None, {"city": "Denver"}),
+        ("birth date", None, {"birth_date": birth_date}),
+    ]
+
+    print(f"\n{'query':<14} {'results':>8} {'p50':>9} {'p95':>9}")
+    with Session(engine) as db:
+        for name, text, filters in queries:
+            p50, p95, count = timed(lambda: search_people(db, text, PeopleFilters(**filters), limit=20), args.repeat)
+            print(f"{name:<14} {count:>8} {p50:7.2f}ms {p95:7.2f}ms")
+
+    engine.dispose()
+    os.remove(db_path)
+    os.rmdir(work_dir)
+
+
+if __name__ == "__main__":
+    main()
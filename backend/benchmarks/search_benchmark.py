@@ -0,0 +1,150 @@
+"""
+Post search benchmark
+Builds a throwaway database from schema.sql with a synthetic corpus and
+compares the FTS5 search query used by /api/posts/search with a
+LIKE '%term%' scan
+
+Usage (from the backend directory):
+    python -m benchmarks.search_benchmark --posts 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from app.services.search import CONTENT_WEIGHT, TITLE_WEIGHT, VISIBLE_POST_CONDITION, build_match_query
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database" / "schema.sql"
+
+COMMON_WORDS = [
+    "birthday", "party", "cake", "friends", "today", "happy", "celebrate", "year",
+    "family", "dinner", "gift", "weekend", "summer", "music", "beach", "coffee",
+]
+
+
+def make_vocabulary(size: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return COMMON_WORDS + ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+
+def build_corpus(conn: sqlite3.Connection, posts: int, users: int, rng: random.Random):
+    vocabulary = make_vocabulary(20000, rng)
+    # Zipf-like word frequencies: a few very common words, a long tail of rare ones
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash, full_name, birth_date, gender, city, region, country) "
+        "VALUES (?, ?, 'x', ?, ?, 'Other', 'Austin', 'TX', 'USA')",
+        [(uid, f"user{i}@example.com", f"User {i}", f"19{rng.randint(50, 99)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}")
+         for i, uid in enumerate(user_ids)]
+    )
+
+    visibilities = ["public", "public", "friends", "birthday_twins"]
+    batch = []
+    for i in range(posts):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(8, 40))
+        batch.append((str(uuid.uuid4()), rng.choice(user_ids), " ".join(words), rng.choice(visibilities)))
+        if len(batch) == 10000:
+            conn.executemany("INSERT INTO posts (id, author_id, content, visibility) VALUES (?, ?, ?, ?)", batch)
+            batch.clear()
+            print(f"\r  {i + 1:,} posts", end="", flush=True)
+    if batch:
+        conn.executemany("INSERT INTO posts (id, author_id, content, visibility) VALUES (?, ?, ?, ?)", batch)
+    conn.commit()
+    print()
+    return user_ids, vocabulary
+
+
+def fts_query(conn: sqlite3.Connection, viewer_id: str, birth_date: str, text: str, limit: int = 20):
+    sql = f"""
+        SELECT p.id, bm25(posts_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS score, p.rowid AS rid
+        FROM posts_fts
+        JOIN posts p ON p.rowid = posts_fts.rowid
+        WHERE posts_fts MATCH :match
+          AND {VISIBLE_POST_CONDITION}
+        ORDER BY score, rid
+        LIMIT :limit
+    """
+    return conn.execute(sql, {
+        "match": build_match_query(text),
+        "user_id": viewer_id,
+        "birth_date": birth_date,
+        "limit": limit
+    }).fetchall()
+
+
+def like_query(conn: sqlite3.Connection, text: str, limit: int = 20):
+    return conn.execute(
+        "SELECT id FROM posts WHERE content LIKE ? ORDER BY created_at DESC LIMIT ?",
+        (f"%{text}%", limit)
+    ).fetchall()
+
+
+def timed(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1] if len(samples) > 1 else samples[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    work_dir = tempfile.mkdtemp(prefix="search-bench-")
+    db_path = os.path.join(work_dir, "bench.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+
+    print("=" * 60)
+    print(f"Post search: {args.posts:,} posts, {args.users:,} users")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    user_ids, vocabulary = build_corpus(conn, args.posts, args.users, rng)
+    print(f"Corpus built in {time.perf_counter() - start:.1f}s ({os.path.getsize(db_path) / 1e6:.0f} MB)")
+
+    viewer_id = user_ids[0]
+    birth_date = conn.execute("SELECT birth_date FROM users WHERE id = ?", (viewer_id,)).fetchone()[0]
+
+    queries = [
+        ("common word", "birthday"),
+        ("two words", "birthday cake"),
+        ("prefix", "celeb"),
+        ("rare word", vocabulary[-1]),
+    ]
+
+    # Ranking cost grows with the number of matches (BM25 scores every one),
+    # while LIKE can stop after the first `limit` hits but scans everything
+    # when the term is rare
+    print(f"\n{'query':<14} {'matches':>9} {'FTS5 p50':>10} {'FTS5 p95':>10} {'LIKE p50':>10}")
+    for name, text in queries:
+        matches = conn.execute(
+            "SELECT COUNT(*) FROM posts_fts WHERE posts_fts MATCH ?", (build_match_query(text),)
+        ).fetchone()[0]
+        fts_p50, fts_p95 = timed(lambda: fts_query(conn, viewer_id, birth_date, text), args.repeat)
+        like_p50, _ = timed(lambda: like_query(conn, text), max(1, args.repeat // 10))
+        print(f"{name:<14} {matches:>9,} {fts_p50:8.2f}ms {fts_p95:8.2f}ms {like_p50:8.2f}ms")
+
+    conn.close()
+    os.remove(db_path)
+    os.rmdir(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+SMTP throughput benchmark
+Compares one-session-per-email sending with the pooled SMTP connections
+against a local SMTP stand-in (no real emails are sent)
+
+Usage (from the backend directory):
+    python -m benchmarks.smtp_throughput --messages 200 --handshake-ms 40
+"""
+import argparse
+import smtplib
+import socketserver
+import threading
+import time
+
+from app.core.email import SMTPConnectionPool, build_email_message
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server: accepts and discards every message"""
+
+    # Simulated cost of TLS handshake + AUTH round trips per session
+    handshake_delay = 0.0
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        time.sleep(self.handshake_delay)
+        self.reply("220 localhost SMTP stand-in ready")
+
+        in_data = False
+        for raw_line in self.rfile:
+            line = raw_line.decode(errors="replace").rstrip("\r\n")
+
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.server.message_count += 1
+                    self.reply("250 OK: queued")
+                continue
+
+            command = line[:4].upper()
+            if command == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250 SIZE 10485760")
+            elif command == "HELO":
+                self.reply("250 localhost")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    message_count = 0
+
+
+def make_messages(count: int):
+    return [
+        build_email_message(
+            to_email=f"user{i}@example.com",
+            subject="Verify Your AnotherMe Email Address",
+            html_content=f"<p>Hi user {i}, please verify your email.</p>",
+            text_content=f"Hi user {i}, please verify your email."
+        )
+        for i in range(count)
+    ]
+
+
+def bench_session_per_email(host: str, port: int, messages) -> float:
+    """Previous behaviour: new SMTP session for every email"""
+    start = time.perf_counter()
+    for message in messages:
+        with smtplib.SMTP(host, port) as server:
+            server.send_message(message)
+    return time.perf_counter() - start
+
+
+def bench_pooled(pool: SMTPConnectionPool, messages) -> float:
+    """One send_many() call per email, reusing pooled sessions"""
+    start = time.perf_counter()
+    for message in messages:
+        pool.send_many([message])
+    return time.perf_counter() - start
+
+
+def bench_batch(pool: SMTPConnectionPool, messages) -> float:
+    """All emails in a single send_many() batch over one session"""
+    start = time.perf_counter()
+    pool.send_many(messages)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=40.0,
+                        help="simulated TLS + AUTH cost per new session")
+    args = parser.parse_args()
+
+    SMTPStandInHandler.handshake_delay = args.handshake_ms / 1000
+    server = SMTPStandIn(("127.0.0.1", 0), SMTPStandInHandler)
+    host, port = server.server_address
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    messages = make_messages(args.messages)
+    pool = SMTPConnectionPool(host, port, use_tls=False, size=2)
+
+    print("=" * 60)
+    print(f"SMTP throughput: {args.messages} messages, {args.handshake_ms:.0f}ms handshake")
+    print("=" * 60)
+
+    results = [
+        ("session per email", bench_session_per_email(host, port, messages)),
+        ("pooled sessions", bench_pooled(pool, messages)),
+        ("single batch", bench_batch(pool, messages)),
+    ]
+
+    for name, elapsed in results:
+        print(f"{name:<20} {elapsed:8.3f}s  {args.messages / elapsed:10.1f} msg/s")
+
+    pool.close_all()
+    server.shutdown()
+    print(f"Messages received by stand-in: {server.message_count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Trigger write amplification benchmark
+Runs the writes behind a login, a post like (with the counter fold that
+later applies it), a comment like and a reply on two throwaway databases
+built from schema.sql: one with the old updated_at triggers (fired by any
+UPDATE, plus the ORM's onupdate bump) and one with the current ones (only
+user-edited columns). Reports rows written per operation, including those
+written by triggers, and the time per operation.
+
+Usage (from the backend directory):
+    python -m benchmarks.trigger_writes_benchmark --ops 5000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database" / "schema.sql"
+
+# The updated_at triggers as they were: every UPDATE rewrote the row
+OLD_TIMESTAMP_TRIGGERS = """
+DROP TRIGGER update_users_timestamp;
+DROP TRIGGER update_posts_timestamp;
+DROP TRIGGER update_comments_timestamp;
+
+CREATE TRIGGER update_users_timestamp AFTER UPDATE ON users
+BEGIN
+    UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER update_posts_timestamp AFTER UPDATE ON posts
+BEGIN
+    UPDATE posts SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER update_comments_timestamp AFTER UPDATE ON comments
+BEGIN
+    UPDATE comments SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+"""
+
+# Login as the ORM wrote it: with onupdate=func.now() on updated_at (old)
+# and without it (current)
+OLD_LOGIN_SQL = "UPDATE users SET last_login = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+NEW_LOGIN_SQL = "UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?"
+
+FOLD_SQL = """
+    UPDATE posts
+    SET like_count = like_count + d.likes, comment_count = comment_count + d.comments
+    FROM (
+        SELECT post_id, SUM(like_delta) AS likes, SUM(comment_delta) AS comments
+        FROM post_counter_deltas GROUP BY post_id
+    ) AS d
+    WHERE posts.id = d.post_id
+"""
+
+
+def build(path: str, old_triggers: bool, ops: int):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_PATH.read_text() + "PRAGMA foreign_keys = OFF;")
+    if old_triggers:
+        conn.executescript(OLD_TIMESTAMP_TRIGGERS)
+
+    user_ids = [str(uuid.uuid4()) for _ in range(ops)]
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash, full_name, birth_date, gender, city, region, country) "
+        "VALUES (?, ?, 'x', 'Bench User', '1990-01-01', 'Other', 'Austin', 'TX', 'USA')",
+        [(user_id, f"{user_id}@example.com") for user_id in user_ids]
+    )
+    conn.execute("INSERT INTO posts (id, author_id, content, visibility) VALUES ('post', ?, 'hot post', 'public')",
+                 (user_ids[0],))
+    conn.execute("INSERT INTO comments (id, post_id, author_id, content) VALUES ('comment', 'post', ?, 'hot comment')",
+                 (user_ids[0],))
+    conn.execute("UPDATE posts SET updated_at = '2000-01-01 00:00:00'")  # Sentinel: did anything bump it?
+    conn.commit()
+    return conn, user_ids
+
+
+def measure(conn: sqlite3.Connection, operation, user_ids):
+    """(rows written per op, microseconds per op); one transaction per op, like requests"""
+    before = conn.total_changes
+    start = time.perf_counter()
+    for user_id in user_ids:
+        operation(conn, user_id)
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    return (conn.total_changes - before) / len(user_ids), elapsed / len(user_ids) * 1e6
+
+
+def like_post_and_fold(conn: sqlite3.Connection, user_id: str):
+    conn.execute("INSERT INTO post_likes (id, user_id, post_id) VALUES (?, ?, 'post')", (str(uuid.uuid4()), user_id))
+    conn.execute(FOLD_SQL)
+    conn.execute("DELETE FROM post_counter_deltas")
+
+
+def like_comment(conn: sqlite3.Connection, user_id: str):
+    conn.execute("INSERT INTO comment_likes (id, user_id, comment_id) VALUES (?, ?, 'comment')",
+                 (str(uuid.uuid4()), user_id))
+
+
+def reply(conn: sqlite3.Connection, user_id: str):
+    conn.execute(
+        "INSERT INTO comments (id, post_id, author_id, parent_comment_id, content) VALUES (?, 'post', ?, 'comment', 'reply')",
+        (str(uuid.uuid4()), user_id)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=5000, help="operations of each kind")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="trigger-writes-")
+    results = {}
+    for layout, old_triggers in (("old", True), ("current", False)):
+        conn, user_ids = build(os.path.join(work_dir, f"{layout}.db"), old_triggers, args.ops)
+        login_sql = OLD_LOGIN_SQL if old_triggers else NEW_LOGIN_SQL
+        operations = [
+            ("login", lambda c, user_id: c.execute(login_sql, (user_id,))),
+            ("post like + fold", like_post_and_fold),
+            ("comment like", like_comment),
+            ("reply", reply),
+        ]
+        results[layout] = {name: measure(conn, operation, user_ids) for name, operation in operations}
+        updated_at_moved = conn.execute(
+            "SELECT updated_at != '2000-01-01 00:00:00' FROM posts WHERE id = 'post'"
+        ).fetchone()[0]
+        results[layout]["post updated_at moved by likes"] = bool(updated_at_moved)
+        conn.close()
+
+    print("=" * 60)
+    print(f"Trigger writes: {args.ops:,} operations of each kind")
+    print("=" * 60)
+    print(f"\n{'operation':<18} {'old rows/op':>12} {'current':>9} {'old us/op':>11} {'current':>9}")
+    for name in ("login", "post like + fold", "comment like", "reply"):
+        old_rows, old_us = results["old"][name]
+        new_rows, new_us = results["current"][name]
+        print(f"{name:<18} {old_rows:>12.1f} {new_rows:>9.1f} {old_us:>11.1f} {new_us:>9.1f}")
+    print(f"\npost updated_at moved by likes: old {results['old']['post updated_at moved by likes']}, "
+          f"current {results['current']['post updated_at moved by likes']}")
+
+    for name in os.listdir(work_dir):
+        os.remove(os.path.join(work_dir, name))
+    os.rmdir(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+-- ============================================
+-- Migrate friendships to one row per pair
+-- ============================================
+-- Friendships used to be stored twice (A -> B and B -> A). This collapses
+-- every pair, in either or both directions, into one canonical row
+-- (user_low_id < user_high_id), keeping the earliest created_at.
+--
+-- Run once, before re-running schema.sql (which then adds the indexes and
+-- triggers for the new layout):
+--   sqlite3 database/anotherme.db < database/migrate_single_row_friendships.sql
+--   sqlite3 database/anotherme.db < database/schema.sql
+
+BEGIN;
+
+-- Triggers and indexes written for the directed layout
+DROP TRIGGER IF EXISTS friendships_birth_md_insert;
+DROP TRIGGER IF EXISTS friendships_birth_md_update;
+DROP TRIGGER IF EXISTS friend_suggestion_queue_friendship_insert;
+DROP TRIGGER IF EXISTS friend_suggestion_queue_friendship_delete;
+DROP INDEX IF EXISTS idx_friendships_user_id;
+DROP INDEX IF EXISTS idx_friendships_friend_id;
+DROP INDEX IF EXISTS idx_friendships_user_birth_md;
+
+ALTER TABLE friendships RENAME TO friendships_directed;
+
+CREATE TABLE friendships (
+    user_low_id TEXT NOT NULL,
+    user_high_id TEXT NOT NULL,
+    low_birth_md INTEGER,
+    high_birth_md INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_low_id, user_high_id),
+    CHECK (user_low_id < user_high_id),
+    FOREIGN KEY (user_low_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_high_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Oldest first, so rowids keep following creation order
+INSERT INTO friendships (user_low_id, user_high_id, created_at)
+SELECT MIN(user_id, friend_id), MAX(user_id, friend_id), MIN(created_at)
+FROM friendships_directed
+WHERE user_id != friend_id
+GROUP BY MIN(user_id, friend_id), MAX(user_id, friend_id)
+ORDER BY MIN(created_at);
+
+UPDATE friendships SET
+    low_birth_md = (SELECT birth_md FROM users WHERE id = friendships.user_low_id),
+    high_birth_md = (SELECT birth_md FROM users WHERE id = friendships.user_high_id);
+
+DROP TABLE friendships_directed;
+
+COMMIT;
+
+SELECT 'friendships', COUNT(*) FROM friendships;
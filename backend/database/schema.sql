@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS users (
     full_name TEXT NOT NULL,
     display_name TEXT,
     birth_date DATE NOT NULL,  -- Format: YYYY-MM-DD
+    birth_md INTEGER GENERATED ALWAYS AS (CAST(strftime('%m%d', birth_date) AS INTEGER)) VIRTUAL,  -- Month-day key, e.g. 517
     gender TEXT NOT NULL CHECK(gender IN ('Male', 'Female', 'Other', 'Prefer not to say')),
     city TEXT NOT NULL,
     region TEXT NOT NULL,
@@ -27,14 +28,20 @@ CREATE TABLE IF NOT EXISTS users (
     oauth_id TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    last_login TIMESTAMP
+    last_login TIMESTAMP,
+    post_count INTEGER DEFAULT 0  -- Posts by this user (maintained by triggers)
 );
 
 -- Indexes for users
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
-CREATE INDEX IF NOT EXISTS idx_users_birth_date ON users(birth_date);
+-- Birthday lookups, with id so matches come out in id order (keyset pagination)
+CREATE INDEX IF NOT EXISTS idx_users_birth_date_id ON users(birth_date, id);
+CREATE INDEX IF NOT EXISTS idx_users_birth_md_id ON users(birth_md, id);
 CREATE INDEX IF NOT EXISTS idx_users_city ON users(city);
 CREATE INDEX IF NOT EXISTS idx_users_is_discoverable ON users(is_discoverable);
+-- Case-insensitive location filters for people search
+CREATE INDEX IF NOT EXISTS idx_users_city_nocase ON users(city COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_users_region_nocase ON users(region COLLATE NOCASE);
 
 -- ============================================
 -- Posts Table
@@ -67,6 +74,7 @@ CREATE TABLE IF NOT EXISTS comments (
     parent_comment_id TEXT,  -- NULL for top-level comments, set for replies
     content TEXT NOT NULL CHECK(length(content) <= 500),
     like_count INTEGER DEFAULT 0,
+    reply_count INTEGER DEFAULT 0,  -- Direct replies (maintained by triggers)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE,
@@ -75,7 +83,9 @@ CREATE TABLE IF NOT EXISTS comments (
 );
 
 -- Indexes for comments
-CREATE INDEX IF NOT EXISTS idx_comments_post_id ON comments(post_id);
+-- Threads: a post's top-level comments (parent NULL) and a comment's
+-- replies, each in rowid (creation) order for keyset pagination
+CREATE INDEX IF NOT EXISTS idx_comments_post_parent ON comments(post_id, parent_comment_id);
 CREATE INDEX IF NOT EXISTS idx_comments_author_id ON comments(author_id);
 CREATE INDEX IF NOT EXISTS idx_comments_parent_id ON comments(parent_comment_id);
 CREATE INDEX IF NOT EXISTS idx_comments_created_at ON comments(created_at);
@@ -104,21 +114,58 @@ CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(sender_id, recipient_id, created_at);
 
 -- ============================================
--- Friendships Table (One-way)
+-- Friendships Table (undirected, one row per pair)
 -- ============================================
+-- Friendships are mutual, so each pair is stored once in canonical order
+-- (user_low_id < user_high_id). A user's friends are the high side of rows
+-- where they are low plus the low side of rows where they are high; each
+-- side has its own covering index. Rowids grow with creation.
 CREATE TABLE IF NOT EXISTS friendships (
-    id TEXT PRIMARY KEY,
-    user_id TEXT NOT NULL,      -- The person who added the friend
-    friend_id TEXT NOT NULL,    -- The person being added as friend
+    user_low_id TEXT NOT NULL,
+    user_high_id TEXT NOT NULL,
+    low_birth_md INTEGER,       -- Copies of each user's users.birth_md (maintained by triggers)
+    high_birth_md INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    FOREIGN KEY (friend_id) REFERENCES users(id) ON DELETE CASCADE,
-    UNIQUE(user_id, friend_id)  -- Prevent duplicate friendships
+    PRIMARY KEY (user_low_id, user_high_id),
+    CHECK (user_low_id < user_high_id),
+    FOREIGN KEY (user_low_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_high_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
--- Indexes for friendships
-CREATE INDEX IF NOT EXISTS idx_friendships_user_id ON friendships(user_id);
-CREATE INDEX IF NOT EXISTS idx_friendships_friend_id ON friendships(friend_id);
+-- Indexes for friendships: each side's friends bucketed by birthday, in
+-- calendar order (friend lists, upcoming birthdays). The primary key
+-- covers pair lookups.
+CREATE INDEX IF NOT EXISTS idx_friendships_low_birth_md ON friendships(user_low_id, high_birth_md, user_high_id);
+CREATE INDEX IF NOT EXISTS idx_friendships_high_birth_md ON friendships(user_high_id, low_birth_md, user_low_id);
+
+-- ============================================
+-- Friend Suggestions ("people you may know")
+-- ============================================
+-- Top suggestions per user, written by the batch job in
+-- app/services/suggestions.py and read by one primary key range scan.
+CREATE TABLE IF NOT EXISTS friend_suggestions (
+    user_id TEXT NOT NULL,
+    rank INTEGER NOT NULL,          -- 0 = best
+    suggested_id TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    mutual_count INTEGER NOT NULL DEFAULT 0,
+    birthday_twin INTEGER NOT NULL DEFAULT 0,   -- Same birthday (month and day)
+    same_city INTEGER NOT NULL DEFAULT 0,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, rank),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (suggested_id) REFERENCES users(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_friend_suggestions_suggested_id ON friend_suggestions(suggested_id);
+
+-- Users whose suggestions are out of date (their friendships or their
+-- friends' friendships changed, or their own profile did). version is bumped
+-- on every change so the job only dequeues what it actually computed.
+CREATE TABLE IF NOT EXISTS friend_suggestion_queue (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 1
+) WITHOUT ROWID;
 
 -- ============================================
 -- Post Likes Table
@@ -154,6 +201,33 @@ CREATE TABLE IF NOT EXISTS comment_likes (
 CREATE INDEX IF NOT EXISTS idx_comment_likes_user_id ON comment_likes(user_id);
 CREATE INDEX IF NOT EXISTS idx_comment_likes_comment_id ON comment_likes(comment_id);
 
+-- ============================================
+-- Birth Date Counts Table
+-- ============================================
+-- Discoverable users per birth date (maintained by triggers), so a user's
+-- exact birthday twin count is a primary-key read
+CREATE TABLE IF NOT EXISTS birth_date_counts (
+    birth_date DATE PRIMARY KEY,
+    user_count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- ============================================
+-- Post Counter Deltas Table
+-- ============================================
+-- Pending changes to posts.like_count / comment_count. Likes and comments
+-- append a row here instead of updating the (possibly very hot) posts row;
+-- app.services.post_counters folds them into posts periodically, and reads
+-- add the pending deltas so counts stay exact.
+CREATE TABLE IF NOT EXISTS post_counter_deltas (
+    id INTEGER PRIMARY KEY,  -- rowid: appends go to the end of the table
+    post_id TEXT NOT NULL,
+    like_delta INTEGER NOT NULL DEFAULT 0,
+    comment_delta INTEGER NOT NULL DEFAULT 0
+);
+
+-- Covers the pending-count lookups for a page of posts
+CREATE INDEX IF NOT EXISTS idx_post_counter_deltas_post_id ON post_counter_deltas(post_id, like_delta, comment_delta);
+
 -- ============================================
 -- Password Reset Tokens Table
 -- ============================================
@@ -188,21 +262,72 @@ CREATE TABLE IF NOT EXISTS email_verification_tokens (
 CREATE INDEX IF NOT EXISTS idx_email_verification_tokens_user_id ON email_verification_tokens(user_id);
 CREATE INDEX IF NOT EXISTS idx_email_verification_tokens_token ON email_verification_tokens(token);
 
+-- ============================================
+-- Post Change Log (feed delta sync)
+-- ============================================
+-- One row per post holding the sequence number of its latest change
+-- (global, increasing). Deleted posts stay as tombstones so clients can
+-- drop them. created_seq is 0 for posts that predate the log.
+CREATE TABLE IF NOT EXISTS post_changes (
+    post_id TEXT PRIMARY KEY,
+    author_id TEXT NOT NULL,
+    created_seq INTEGER NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_post_changes_seq ON post_changes(seq);
+CREATE INDEX IF NOT EXISTS idx_post_changes_author_seq ON post_changes(author_id, seq);
+
+-- ============================================
+-- Full-Text Search (FTS5)
+-- ============================================
+-- External-content indexes: text stays in posts/comments, the index maps
+-- terms to their rowids. Kept in sync by the triggers below; rebuild after
+-- importing data or VACUUM (which may renumber rowids):
+--   INSERT INTO posts_fts(posts_fts) VALUES('rebuild');
+--   INSERT INTO comments_fts(comments_fts) VALUES('rebuild');
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    title,
+    content,
+    content='posts',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+    content,
+    content='comments',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+-- People search: names of discoverable users, rowid = users.rowid.
+-- Trigram tokens give case-insensitive substring and typo-tolerant
+-- matching. Rebuild after importing users or VACUUM:
+--   DELETE FROM users_search;
+--   INSERT INTO users_search (rowid, name)
+--       SELECT rowid, full_name || ' ' || COALESCE(display_name, '') FROM users WHERE is_discoverable = 1;
+CREATE VIRTUAL TABLE IF NOT EXISTS users_search USING fts5(
+    name,
+    tokenize='trigram'
+);
+
 -- ============================================
 -- Triggers for maintaining counts
 -- ============================================
 
--- Update post like_count when post_likes changes
-CREATE TRIGGER IF NOT EXISTS update_post_like_count_insert
+-- Record post like_count changes as deltas (folded into posts later)
+CREATE TRIGGER IF NOT EXISTS post_counter_deltas_like_insert
 AFTER INSERT ON post_likes
 BEGIN
-    UPDATE posts SET like_count = like_count + 1 WHERE id = NEW.post_id;
+    INSERT INTO post_counter_deltas (post_id, like_delta) VALUES (NEW.post_id, 1);
 END;
 
-CREATE TRIGGER IF NOT EXISTS update_post_like_count_delete
+CREATE TRIGGER IF NOT EXISTS post_counter_deltas_like_delete
 AFTER DELETE ON post_likes
 BEGIN
-    UPDATE posts SET like_count = like_count - 1 WHERE id = OLD.post_id;
+    INSERT INTO post_counter_deltas (post_id, like_delta) VALUES (OLD.post_id, -1);
 END;
 
 -- Update comment like_count when comment_likes changes
@@ -218,34 +343,238 @@ BEGIN
     UPDATE comments SET like_count = like_count - 1 WHERE id = OLD.comment_id;
 END;
 
--- Update post comment_count when comments changes
-CREATE TRIGGER IF NOT EXISTS update_post_comment_count_insert
+-- Record post comment_count changes as deltas (folded into posts later)
+CREATE TRIGGER IF NOT EXISTS post_counter_deltas_comment_insert
+AFTER INSERT ON comments
+BEGIN
+    INSERT INTO post_counter_deltas (post_id, comment_delta) VALUES (NEW.post_id, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS post_counter_deltas_comment_delete
+AFTER DELETE ON comments
+BEGIN
+    INSERT INTO post_counter_deltas (post_id, comment_delta) VALUES (OLD.post_id, -1);
+END;
+
+-- Update users.post_count when posts changes
+CREATE TRIGGER IF NOT EXISTS update_user_post_count_insert
+AFTER INSERT ON posts
+BEGIN
+    UPDATE users SET post_count = post_count + 1 WHERE id = NEW.author_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_user_post_count_delete
+AFTER DELETE ON posts
+BEGIN
+    UPDATE users SET post_count = post_count - 1 WHERE id = OLD.author_id;
+END;
+
+-- Update birth_date_counts when discoverable users come, go or change birthday
+CREATE TRIGGER IF NOT EXISTS birth_date_counts_user_insert
+AFTER INSERT ON users
+WHEN NEW.is_discoverable = 1
+BEGIN
+    INSERT INTO birth_date_counts (birth_date, user_count) VALUES (NEW.birth_date, 1)
+    ON CONFLICT(birth_date) DO UPDATE SET user_count = user_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS birth_date_counts_user_delete
+AFTER DELETE ON users
+WHEN OLD.is_discoverable = 1
+BEGIN
+    UPDATE birth_date_counts SET user_count = user_count - 1 WHERE birth_date = OLD.birth_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS birth_date_counts_user_update
+AFTER UPDATE OF birth_date, is_discoverable ON users
+BEGIN
+    UPDATE birth_date_counts SET user_count = user_count - 1
+    WHERE birth_date = OLD.birth_date AND OLD.is_discoverable = 1;
+    INSERT INTO birth_date_counts (birth_date, user_count)
+    SELECT NEW.birth_date, 1 WHERE NEW.is_discoverable = 1
+    ON CONFLICT(birth_date) DO UPDATE SET user_count = user_count + 1;
+END;
+
+-- Update comment reply_count when replies are added or removed
+CREATE TRIGGER IF NOT EXISTS update_comment_reply_count_insert
 AFTER INSERT ON comments
+WHEN NEW.parent_comment_id IS NOT NULL
 BEGIN
-    UPDATE posts SET comment_count = comment_count + 1 WHERE id = NEW.post_id;
+    UPDATE comments SET reply_count = reply_count + 1 WHERE id = NEW.parent_comment_id;
 END;
 
-CREATE TRIGGER IF NOT EXISTS update_post_comment_count_delete
+CREATE TRIGGER IF NOT EXISTS update_comment_reply_count_delete
 AFTER DELETE ON comments
+WHEN OLD.parent_comment_id IS NOT NULL
 BEGIN
-    UPDATE posts SET comment_count = comment_count - 1 WHERE id = OLD.post_id;
+    UPDATE comments SET reply_count = reply_count - 1 WHERE id = OLD.parent_comment_id;
 END;
 
--- Update timestamps
+-- Keep full-text indexes in sync
+CREATE TRIGGER IF NOT EXISTS posts_fts_insert
+AFTER INSERT ON posts
+BEGIN
+    INSERT INTO posts_fts (rowid, title, content) VALUES (NEW.rowid, NEW.title, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS posts_fts_delete
+AFTER DELETE ON posts
+BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, content) VALUES ('delete', OLD.rowid, OLD.title, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS posts_fts_update
+AFTER UPDATE OF title, content ON posts
+BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, content) VALUES ('delete', OLD.rowid, OLD.title, OLD.content);
+    INSERT INTO posts_fts (rowid, title, content) VALUES (NEW.rowid, NEW.title, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS comments_fts_insert
+AFTER INSERT ON comments
+BEGIN
+    INSERT INTO comments_fts (rowid, content) VALUES (NEW.rowid, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS comments_fts_delete
+AFTER DELETE ON comments
+BEGIN
+    INSERT INTO comments_fts (comments_fts, rowid, content) VALUES ('delete', OLD.rowid, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS comments_fts_update
+AFTER UPDATE OF content ON comments
+BEGIN
+    INSERT INTO comments_fts (comments_fts, rowid, content) VALUES ('delete', OLD.rowid, OLD.content);
+    INSERT INTO comments_fts (rowid, content) VALUES (NEW.rowid, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS users_search_insert
+AFTER INSERT ON users
+WHEN NEW.is_discoverable = 1
+BEGIN
+    INSERT INTO users_search (rowid, name) VALUES (NEW.rowid, NEW.full_name || ' ' || COALESCE(NEW.display_name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS users_search_delete
+AFTER DELETE ON users
+BEGIN
+    DELETE FROM users_search WHERE rowid = OLD.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS users_search_update
+AFTER UPDATE OF full_name, display_name, is_discoverable ON users
+BEGIN
+    DELETE FROM users_search WHERE rowid = OLD.rowid;
+    INSERT INTO users_search (rowid, name)
+    SELECT NEW.rowid, NEW.full_name || ' ' || COALESCE(NEW.display_name, '')
+    WHERE NEW.is_discoverable = 1;
+END;
+
+-- Keep friendships.low_birth_md / high_birth_md in sync with the users' birthdays
+CREATE TRIGGER IF NOT EXISTS friendships_birth_md_insert
+AFTER INSERT ON friendships
+BEGIN
+    UPDATE friendships
+    SET low_birth_md = (SELECT birth_md FROM users WHERE id = NEW.user_low_id),
+        high_birth_md = (SELECT birth_md FROM users WHERE id = NEW.user_high_id)
+    WHERE user_low_id = NEW.user_low_id AND user_high_id = NEW.user_high_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS friendships_birth_md_update
+AFTER UPDATE OF birth_date ON users
+BEGIN
+    UPDATE friendships SET low_birth_md = NEW.birth_md WHERE user_low_id = NEW.id;
+    UPDATE friendships SET high_birth_md = NEW.birth_md WHERE user_high_id = NEW.id;
+END;
+
+-- Queue users for a suggestions refresh when their neighbourhood changes:
+-- a new or removed friendship changes the friends of friends of both users
+-- and of everyone already friends with either of them
+CREATE TRIGGER IF NOT EXISTS friend_suggestion_queue_friendship_insert
+AFTER INSERT ON friendships
+BEGIN
+    INSERT INTO friend_suggestion_queue (user_id)
+    SELECT NEW.user_low_id
+    UNION SELECT NEW.user_high_id
+    UNION SELECT user_high_id FROM friendships WHERE user_low_id IN (NEW.user_low_id, NEW.user_high_id)
+    UNION SELECT user_low_id FROM friendships WHERE user_high_id IN (NEW.user_low_id, NEW.user_high_id)
+    ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS friend_suggestion_queue_friendship_delete
+AFTER DELETE ON friendships
+BEGIN
+    INSERT INTO friend_suggestion_queue (user_id)
+    SELECT OLD.user_low_id
+    UNION SELECT OLD.user_high_id
+    UNION SELECT user_high_id FROM friendships WHERE user_low_id IN (OLD.user_low_id, OLD.user_high_id)
+    UNION SELECT user_low_id FROM friendships WHERE user_high_id IN (OLD.user_low_id, OLD.user_high_id)
+    ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS friend_suggestion_queue_user_insert
+AFTER INSERT ON users
+BEGIN
+    INSERT INTO friend_suggestion_queue (user_id) VALUES (NEW.id)
+    ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS friend_suggestion_queue_user_update
+AFTER UPDATE OF birth_date, city ON users
+BEGIN
+    INSERT INTO friend_suggestion_queue (user_id) VALUES (NEW.id)
+    ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+END;
+
+-- Update timestamps when users edit a row. Only the columns they edit are
+-- listed: counters, last_login, verification flags etc. change without
+-- touching updated_at (and without a second write of the row)
 CREATE TRIGGER IF NOT EXISTS update_users_timestamp
-AFTER UPDATE ON users
+AFTER UPDATE OF email, full_name, display_name, birth_date, gender, city, region, country,
+    profile_picture_url, bio, is_discoverable ON users
 BEGIN
     UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
 
 CREATE TRIGGER IF NOT EXISTS update_posts_timestamp
-AFTER UPDATE ON posts
+AFTER UPDATE OF title, content, visibility ON posts
 BEGIN
     UPDATE posts SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
 
 CREATE TRIGGER IF NOT EXISTS update_comments_timestamp
-AFTER UPDATE ON comments
+AFTER UPDATE OF content ON comments
 BEGIN
     UPDATE comments SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
+
+-- Record post changes for feed delta sync
+CREATE TRIGGER IF NOT EXISTS record_post_change_insert
+AFTER INSERT ON posts
+BEGIN
+    INSERT INTO post_changes (post_id, author_id, created_seq, seq, deleted)
+    VALUES (
+        NEW.id, NEW.author_id,
+        (SELECT COALESCE(MAX(seq), 0) + 1 FROM post_changes),
+        (SELECT COALESCE(MAX(seq), 0) + 1 FROM post_changes),
+        0
+    )
+    ON CONFLICT(post_id) DO UPDATE SET seq = excluded.seq, created_seq = excluded.created_seq, deleted = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS record_post_change_update
+AFTER UPDATE OF title, content, visibility, like_count, comment_count ON posts
+BEGIN
+    INSERT INTO post_changes (post_id, author_id, seq)
+    VALUES (NEW.id, NEW.author_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM post_changes))
+    ON CONFLICT(post_id) DO UPDATE SET seq = excluded.seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS record_post_change_delete
+AFTER DELETE ON posts
+BEGIN
+    INSERT INTO post_changes (post_id, author_id, seq, deleted)
+    VALUES (OLD.id, OLD.author_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM post_changes), 1)
+    ON CONFLICT(post_id) DO UPDATE SET seq = excluded.seq, deleted = 1;
+END;
@@ -4,25 +4,25 @@ Main FastAPI application entry point
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
 from fastapi.exceptions import RequestValidationError
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.core.config import settings
 from app.core.database import engine, Base
-from app.api import auth, posts, users, friends, messages, contact, statistics
+from app.core.email import smtp_pool
+from app.services.image_processing import shutdown_executor
+from app.services.uploads import UploadsServer
+from app.services.event_bus import event_bus
+from app.services import realtime, social_graph, suggestions, post_counters, public_profiles
+from app.services.chat import start_metrics_logger, stop_metrics_logger
+from app.api import auth, posts, users, friends, messages, contact, statistics, events
 import os
 
 # Create database tables (only needed if not using schema.sql)
 # Base.metadata.create_all(bind=engine)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 app = FastAPI(
     title=settings.APP_NAME,
     description="Connect with your birthday twins",
@@ -31,10 +31,6 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Add rate limiter to app state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -46,28 +42,41 @@ app.add_middleware(
 
 
 # Security headers middleware
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-
-        # Content Security Policy - relaxed for development
-        # Adjust for production with your actual domain
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' https://cdn.tailwindcss.com https://unpkg.com; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: blob:; "
-            "font-src 'self' data:; "
-            "connect-src 'self'"
-        )
-
-        return response
+# Plain ASGI (not BaseHTTPMiddleware) so response bodies - including file and
+# zero-copy responses from /uploads - pass straight through without re-streaming
+class SecurityHeadersMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+
+                # Security headers
+                headers["X-Content-Type-Options"] = "nosniff"
+                headers["X-Frame-Options"] = "DENY"
+                headers["X-XSS-Protection"] = "1; mode=block"
+                headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+
+                # Content Security Policy - relaxed for development
+                # Adjust for production with your actual domain
+                headers["Content-Security-Policy"] = (
+                    "default-src 'self'; "
+                    "script-src 'self' 'unsafe-inline' https://cdn.tailwindcss.com https://unpkg.com; "
+                    "style-src 'self' 'unsafe-inline'; "
+                    "img-src 'self' data: blob:; "
+                    "font-src 'self' data:; "
+                    "connect-src 'self'"
+                )
+
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 
 app.add_middleware(SecurityHeadersMiddleware)
@@ -89,6 +98,80 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Domain event subscribers (routers only emit events)
+realtime.register(event_bus)
+social_graph.register(event_bus)
+public_profiles.register(event_bus)
+
+
+@app.on_event("startup")
+async def start_event_relay():
+    """Receive domain events from other worker processes (when EVENT_RELAY_PATH is set)"""
+    event_bus.start_relay()
+
+
+@app.on_event("startup")
+async def load_friend_graph():
+    """Build the in-memory friendship graph before serving requests, then reload it every FRIEND_GRAPH_RELOAD_INTERVAL seconds"""
+    await run_in_threadpool(social_graph.load)
+    social_graph.start_reloader()
+
+
+@app.on_event("startup")
+async def start_suggestions_refresher():
+    """Recompute queued friend suggestions every FRIEND_SUGGESTIONS_REFRESH_INTERVAL seconds"""
+    suggestions.start_refresher()
+
+
+@app.on_event("startup")
+async def start_post_counter_folder():
+    """Fold buffered like/comment counts into posts every POST_COUNTER_FOLD_INTERVAL seconds"""
+    post_counters.start_folder()
+
+
+@app.on_event("startup")
+async def start_chat_metrics_logger():
+    """Log open chat connection counts every CHAT_METRICS_LOG_INTERVAL seconds"""
+    start_metrics_logger()
+
+
+@app.on_event("shutdown")
+async def stop_event_relay():
+    await event_bus.stop_relay()
+
+
+@app.on_event("shutdown")
+async def stop_friend_graph_reloader():
+    await social_graph.stop_reloader()
+
+
+@app.on_event("shutdown")
+async def stop_suggestions_refresher():
+    await suggestions.stop_refresher()
+
+
+@app.on_event("shutdown")
+async def stop_post_counter_folder():
+    await post_counters.stop_folder()
+
+
+@app.on_event("shutdown")
+async def stop_chat_metrics_logger():
+    await stop_metrics_logger()
+
+
+@app.on_event("shutdown")
+async def close_smtp_connections():
+    """Close pooled SMTP sessions on shutdown"""
+    smtp_pool.close_all()
+
+
+@app.on_event("shutdown")
+async def stop_image_workers():
+    """Stop the image processing process pool on shutdown"""
+    shutdown_executor()
+
+
 # Register API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(posts.router, prefix="/api/posts", tags=["Posts"])
@@ -97,11 +180,21 @@ app.include_router(friends.router, prefix="/api/friends", tags=["Friends"])
 app.include_router(messages.router, prefix="/api/messages", tags=["Messages"])
 app.include_router(contact.router, prefix="/api/contact", tags=["Contact"])
 app.include_router(statistics.router, prefix="/api/statistics", tags=["Statistics"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
 
-# Mount static files for uploads (profile pictures)
+# Serve uploads (profile pictures) with immutable caching, ETags and ranges,
+# or hand the bytes to a front proxy when UPLOADS_OFFLOAD_MODE is set
 # Ensure uploads directory exists
 os.makedirs("uploads/profile_pictures", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount(
+    "/uploads",
+    UploadsServer(
+        directory="uploads",
+        offload_mode=settings.UPLOADS_OFFLOAD_MODE,
+        offload_prefix=settings.UPLOADS_OFFLOAD_PREFIX
+    ),
+    name="uploads"
+)
 
 
 # Custom error handlers
@@ -111,12 +204,13 @@ async def custom_http_exception_handler(request: Request, exc: StarletteHTTPExce
     Custom handler for HTTP exceptions
     Returns custom error pages for 404 and 500 errors
     """
-    # For API requests, return JSON
+    # For API requests, return JSON (keeping headers such as Retry-After / WWW-Authenticate)
     if request.url.path.startswith("/api/"):
-        return {
-            "detail": exc.detail,
-            "status_code": exc.status_code
-        }
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail, "status_code": exc.status_code},
+            headers=getattr(exc, "headers", None)
+        )
 
     # For page requests, return custom HTML error pages
     if exc.status_code == 404:
@@ -125,10 +219,11 @@ async def custom_http_exception_handler(request: Request, exc: StarletteHTTPExce
             return FileResponse(error_page_path, status_code=404)
 
     # For other errors, return default JSON
-    return {
-        "detail": exc.detail,
-        "status_code": exc.status_code
-    }
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail, "status_code": exc.status_code},
+        headers=getattr(exc, "headers", None)
+    )
 
 
 @app.exception_handler(Exception)
@@ -139,10 +234,10 @@ async def custom_server_error_handler(request: Request, exc: Exception):
     """
     # For API requests, return JSON
     if request.url.path.startswith("/api/"):
-        return {
-            "detail": "Internal server error",
-            "status_code": 500
-        }
+        return JSONResponse(
+            status_code=500,
+            content={"detail": "Internal server error", "status_code": 500}
+        )
 
     # For page requests, return custom HTML error page
     error_page_path = os.path.join(os.path.dirname(__file__), "..", "frontend", "pages", "500.html")
@@ -150,10 +245,10 @@ async def custom_server_error_handler(request: Request, exc: Exception):
         return FileResponse(error_page_path, status_code=500)
 
     # Fallback to JSON
-    return {
-        "detail": "Internal server error",
-        "status_code": 500
-    }
+    return JSONResponse(
+        status_code=500,
+        content={"detail": "Internal server error", "status_code": 500}
+    )
 
 
 # Additional routers to be added:
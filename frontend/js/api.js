@@ -32,7 +32,7 @@ async function apiRequest(endpoint, options = {}) {
             if (response.status === 429) {
                 try {
                     const error = await response.json();
-                    // slowapi returns error in "error" field, not "detail"
+                    // Rate limit errors carry the message in "detail" ("error" kept for older responses)
                     const errorMessage = error.error || error.detail || 'Rate limit exceeded. Please try again later.';
                     throw new Error(errorMessage);
                 } catch (parseError) {
@@ -98,9 +98,23 @@ const api = {
     users: {
         getMe: () => apiRequest('/users/me'),
         getStats: () => apiRequest('/users/me/stats'),
-        getBirthdayTwins: () => apiRequest('/users/birthday-twins'),
+        // mode: 'exact' (same birth date), 'day' (same day, any year) or 'window' (within windowDays)
+        // Pages are { items, next_cursor }; pass next_cursor back as `cursor` for the next page
+        getBirthdayTwins: (mode = 'exact', windowDays = 3, cursor = null) => apiRequest(
+            `/users/birthday-twins?mode=${mode}&window_days=${windowDays}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`
+        ),
         getUser: (userId) => apiRequest(`/users/${userId}`),
-        searchByBirthday: (year, month, day) => apiRequest(`/users/search/by-birthday?year=${year}&month=${month}&day=${day}`),
+        searchByBirthday: (year, month, day, cursor = null) => apiRequest(
+            `/users/search/by-birthday?year=${year}&month=${month}&day=${day}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`
+        ),
+        // filters: { q, city, region, country, birth_date, limit } (empty values are left out)
+        search: (filters = {}) => {
+            const params = new URLSearchParams();
+            Object.entries(filters).forEach(([key, value]) => {
+                if (value !== undefined && value !== null && value !== '') params.append(key, value);
+            });
+            return apiRequest(`/users/search?${params}`);
+        },
         updateProfile: (data) => apiRequest('/users/me', {
             method: 'PUT',
             body: JSON.stringify(data),
@@ -134,6 +148,10 @@ const api = {
     posts: {
         getFeed: (filter = 'friends') => apiRequest(`/posts/feed?filter_type=${filter}`),
         getMyPosts: () => apiRequest('/posts/feed?filter_type=my'),
+        // Feed delta: omit `since` to get the current token, then pass the returned token each time
+        getFeedChanges: (filter = 'friends', since = null) => apiRequest(
+            `/posts/feed/changes?filter_type=${filter}${since !== null ? `&since=${encodeURIComponent(since)}` : ''}`
+        ),
         create: (content, visibility = 'public') => apiRequest('/posts', {
             method: 'POST',
             body: JSON.stringify({ content, visibility }),
@@ -145,10 +163,17 @@ const api = {
         delete: (postId) => apiRequest(`/posts/${postId}`, {
             method: 'DELETE',
         }),
+        // Both return { liked, like_count } and are safe to repeat
         like: (postId) => apiRequest(`/posts/${postId}/like`, {
-            method: 'POST',
+            method: 'PUT',
         }),
-        getComments: (postId) => apiRequest(`/posts/${postId}/comments`),
+        unlike: (postId) => apiRequest(`/posts/${postId}/like`, {
+            method: 'DELETE',
+        }),
+        getComments: (postId, cursor = null) =>
+            apiRequest(`/posts/${postId}/comments${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`),
+        getReplies: (postId, commentId, cursor = null) =>
+            apiRequest(`/posts/${postId}/comments/${commentId}/replies${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`),
         createComment: (postId, content) => apiRequest(`/posts/${postId}/comments`, {
             method: 'POST',
             body: JSON.stringify({ content }),
@@ -156,6 +181,13 @@ const api = {
         deleteComment: (postId, commentId) => apiRequest(`/posts/${postId}/comments/${commentId}`, {
             method: 'DELETE',
         }),
+        // Both return { liked, like_count } and are safe to repeat
+        likeComment: (postId, commentId) => apiRequest(`/posts/${postId}/comments/${commentId}/like`, {
+            method: 'POST',
+        }),
+        unlikeComment: (postId, commentId) => apiRequest(`/posts/${postId}/comments/${commentId}/like`, {
+            method: 'DELETE',
+        }),
     },
 
     // Messages
@@ -170,18 +202,131 @@ const api = {
         markAsRead: (messageId) => apiRequest(`/messages/${messageId}/read`, {
             method: 'PUT',
         }),
+
+        /**
+         * Open the chat WebSocket
+         * handlers maps a server frame type (message, read, close) to a callback.
+         * Returns { send, markRead, isOpen, close }, or null if unavailable.
+         */
+        connect: (handlers) => {
+            const token = localStorage.getItem('token');
+            if (!token || typeof WebSocket === 'undefined') {
+                return null;
+            }
+
+            const socketUrl = `${API_BASE_URL.replace(/^http/, 'ws')}/messages/ws?token=${encodeURIComponent(token)}`;
+            const socket = new WebSocket(socketUrl);
+            const pending = new Map();  // client_id -> { resolve, reject } for sends awaiting "sent"
+            let nextClientId = 1;
+
+            socket.addEventListener('message', (event) => {
+                const frame = JSON.parse(event.data);
+                const request = frame.client_id && pending.get(frame.client_id);
+                if (request && (frame.type === 'sent' || frame.type === 'error')) {
+                    pending.delete(frame.client_id);
+                    if (frame.type === 'sent') {
+                        request.resolve(frame.message);
+                    } else {
+                        request.reject(new Error(frame.detail));
+                    }
+                    return;
+                }
+                if (handlers[frame.type]) {
+                    handlers[frame.type](frame);
+                }
+            });
+
+            socket.addEventListener('close', (event) => {
+                pending.forEach(request => request.reject(new Error('Connection closed')));
+                pending.clear();
+                if (handlers.close) {
+                    handlers.close(event);
+                }
+            });
+
+            return {
+                isOpen: () => socket.readyState === WebSocket.OPEN,
+                send: (recipientId, content) => new Promise((resolve, reject) => {
+                    const clientId = String(nextClientId++);
+                    pending.set(clientId, { resolve, reject });
+                    socket.send(JSON.stringify({ type: 'send', client_id: clientId, recipient_id: recipientId, content }));
+                }),
+                markRead: (messageIds) => socket.send(JSON.stringify({ type: 'read', message_ids: messageIds })),
+                close: () => socket.close(),
+            };
+        },
+    },
+
+    // Server-pushed events (replaces polling)
+    events: {
+        /**
+         * Open the event stream for the logged-in user
+         * handlers maps an event type (new_message, unread_count, like_count,
+         * new_comment, comment_deleted, resync) to a callback receiving its data.
+         * like_count/new_comment/comment_deleted arrive only for postIds (up to 100,
+         * the posts on screen). When those change, open a new stream passing the
+         * old one's lastSeenEventId as lastEventId, so nothing in between is missed.
+         * The browser reconnects by itself and resumes from the last event id.
+         * Returns the EventSource (call close() to stop), or null if unavailable.
+         */
+        subscribe: (handlers, { postIds = [], lastEventId = null } = {}) => {
+            const token = localStorage.getItem('token');
+            if (!token || typeof EventSource === 'undefined') {
+                return null;
+            }
+
+            // EventSource cannot send an Authorization header
+            let url = `${API_BASE_URL}/events/stream?token=${encodeURIComponent(token)}`;
+            if (postIds.length) {
+                url += `&posts=${postIds.slice(0, 100).map(encodeURIComponent).join(',')}`;
+            }
+            if (lastEventId) {
+                url += `&last_event_id=${encodeURIComponent(lastEventId)}`;
+            }
+            const source = new EventSource(url);
+            source.lastSeenEventId = lastEventId;
+            Object.entries(handlers).forEach(([type, handler]) => {
+                source.addEventListener(type, (event) => {
+                    if (event.lastEventId) {
+                        source.lastSeenEventId = event.lastEventId;
+                    }
+                    try {
+                        handler(event.data ? JSON.parse(event.data) : {});
+                    } catch (error) {
+                        console.error(`Error handling ${type} event:`, error);
+                    }
+                });
+            });
+            return source;
+        },
     },
 
     // Friends
     friends: {
-        getAll: () => apiRequest('/friends'),
+        // { items, next_cursor }, in birthday (calendar) order from January 1st; pass next_cursor for the next page
+        getAll: (cursor = null) => apiRequest(`/friends${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`),
         getMutual: (userId) => apiRequest(`/friends/mutual/${userId}`),
+        // { counts: { userId: n } } for up to 100 users in one call
+        getMutualCounts: (userIds) => apiRequest(`/friends/mutual-counts?ids=${userIds.map(encodeURIComponent).join(',')}`),
+        getSuggestions: (limit = 10) => apiRequest(`/friends/suggestions?limit=${limit}`),
+        getUpcomingBirthdays: (days = 30, cursor = null) => apiRequest(
+            `/friends/upcoming-birthdays?days=${days}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`
+        ),
         add: (userId) => apiRequest(`/friends/${userId}`, {
             method: 'POST',
         }),
         remove: (userId) => apiRequest(`/friends/${userId}`, {
             method: 'DELETE',
         }),
+        // Up to 500 IDs; returns { changed, results: [{ user_id, status }] }
+        addMany: (userIds) => apiRequest('/friends/bulk', {
+            method: 'POST',
+            body: JSON.stringify({ user_ids: userIds }),
+        }),
+        removeMany: (userIds) => apiRequest('/friends/bulk', {
+            method: 'DELETE',
+            body: JSON.stringify({ user_ids: userIds }),
+        }),
         check: (userId) => apiRequest(`/friends/check/${userId}`),
     },
 
@@ -44,7 +44,7 @@ function renderHeader() {
                         <div class="relative" id="userMenuContainer">
                             <button onclick="toggleUserMenu()" class="flex items-center space-x-2 text-gray-700 hover:text-primary transition">
                                 ${currentUser && currentUser.profile_picture_url ? `
-                                    <img src="http://localhost:8000/uploads/${currentUser.profile_picture_url}"
+                                    <img src="${profilePictureUrl(currentUser, 32)}"
                                          alt="${currentUser.full_name}"
                                          class="w-8 h-8 rounded-full object-cover border-2 border-primary" />
                                 ` : `
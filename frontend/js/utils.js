@@ -149,6 +149,33 @@ function validatePassword(password) {
     };
 }
 
+const UPLOADS_BASE_URL = 'http://localhost:8000/uploads';
+
+/**
+ * Get the smallest profile picture variant that covers the displayed size
+ * @param {Object} user - User object with profile_picture_url and profile_picture_variants
+ * @param {number} displaySize - Rendered width in CSS pixels
+ * @returns {string|null} Image URL, or null if the user has no picture
+ */
+function profilePictureUrl(user, displaySize = 48) {
+    if (!user || !user.profile_picture_url) {
+        return null;
+    }
+
+    // Pictures uploaded before variants existed only have the full-size file
+    const variants = user.profile_picture_variants;
+    if (!variants) {
+        return `${UPLOADS_BASE_URL}/${user.profile_picture_url}`;
+    }
+
+    const urls = variants.webp || variants.jpeg;
+    const needed = displaySize * (window.devicePixelRatio || 1);
+    const sizes = Object.keys(urls).map(Number).sort((a, b) => a - b);
+    const size = sizes.find(s => s >= needed) || sizes[sizes.length - 1];
+
+    return `${UPLOADS_BASE_URL}/${urls[size]}`;
+}
+
 /**
  * Render avatar HTML with profile picture or initials
  * @param {Object} user - User object with profile_picture_url, full_name, and id
@@ -162,7 +189,10 @@ function renderAvatar(user, size = 'w-10 h-10', extraClasses = '') {
     }
 
     if (user.profile_picture_url) {
-        return `<img src="http://localhost:8000/uploads/${user.profile_picture_url}"
+        // Tailwind w-N is N * 4px
+        const widthMatch = size.match(/w-(\d+)/);
+        const displaySize = widthMatch ? Number(widthMatch[1]) * 4 : 48;
+        return `<img src="${profilePictureUrl(user, displaySize)}"
                      alt="${user.full_name || 'User'}"
                      class="${size} rounded-full object-cover ${extraClasses}" />`;
     }